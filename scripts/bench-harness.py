@@ -0,0 +1,348 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = ["pyyaml", "requests", "httpx"]
+# ///
+"""Benchmark scripts/test-skills.py itself against a fake Edge.
+
+Generates thousands of synthetic skills, then measures the harness's own
+per-test cost: skill discovery, YAML loading, fingerprinting, scheduling and
+report writing in-process, plus whole runs against scripts/fake-edge.py with
+a cold and a warm result cache. Edge and network time is as close to zero as
+a local echo server gets, so what remains is harness overhead.
+
+Usage:
+  uv run -s scripts/bench-harness.py
+  uv run -s scripts/bench-harness.py --skills 5000 --repeat 5
+  uv run -s scripts/bench-harness.py --output bench.json --update-baseline
+  uv run -s scripts/bench-harness.py --baseline bench-harness.baseline.json --fail-on-regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import requests
+import yaml
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+TEST_SKILLS = SCRIPTS_DIR / "test-skills.py"
+FAKE_EDGE = SCRIPTS_DIR / "fake-edge.py"
+DEFAULT_BASELINE = SCRIPTS_DIR.parent / ".cache" / "bench-harness.baseline.json"
+CATEGORIES = ("ai", "connectors", "security", "transforms", "utilities", "workflows")
+
+# Metrics under this many milliseconds move by whole percents on timer noise
+# alone; they never count as regressed.
+NOISE_FLOOR_MS = 0.02
+
+
+def write_skill(root: Path, index: int, tests_per_skill: int) -> None:
+    """One synthetic skill shaped like the real ones: an http_server, a mapping, sync_response."""
+    name = f"synthetic-{index:05d}"
+    skill_dir = root / CATEGORIES[index % len(CATEGORIES)] / name
+    (skill_dir / "test").mkdir(parents=True)
+    skill = {
+        "name": name,
+        "version": "1.0.0",
+        "description": f"Synthetic skill {index} for benchmarking the test harness",
+        "inputs": [
+            {"name": "text", "type": "string", "required": True, "description": "Text to echo"},
+            {"name": "count", "type": "integer", "required": False, "description": "Repetitions"},
+        ],
+        "outputs": [{"name": "text", "type": "string", "description": "Echoed text"}],
+        "author": "expanso",
+        "license": "MIT",
+    }
+    pipeline = {
+        "name": f"{name}-mcp",
+        "type": "pipeline",
+        "config": {
+            "http": {"enabled": True, "address": "0.0.0.0:${PORT:-8080}"},
+            "input": {"http_server": {"path": f"/{name}", "allowed_verbs": ["POST"], "timeout": "30s"}},
+            "pipeline": {
+                "processors": [
+                    {"mapping": 'root.text = this.text.or("").string()\n'
+                     f'root.metadata = {{"skill": "{name}", "mode": "mcp", "trace_id": uuid_v4()}}\n'},
+                ]
+            },
+            "output": {"sync_response": {}},
+        },
+    }
+    tests = {
+        "tests": [
+            {
+                "name": f"Case {case}",
+                "input": json.dumps({"text": f"{name} case {case}", "count": case}),
+                "expected": {"has_field": "text"},
+            }
+            for case in range(tests_per_skill)
+        ]
+    }
+    (skill_dir / "skill.yaml").write_text(yaml.safe_dump(skill, sort_keys=False))
+    (skill_dir / "pipeline-mcp.yaml").write_text(yaml.safe_dump(pipeline, sort_keys=False))
+    (skill_dir / "test" / "test.yaml").write_text(yaml.safe_dump(tests, sort_keys=False))
+
+
+def load_harness(skills_dir: Path) -> tuple[Any, Any]:
+    """Import the harness runner and cache modules with the skill tree pointed at ``skills_dir``."""
+    os.environ["EXPANSO_SKILLS_DIR"] = str(skills_dir)
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    return importlib.import_module("skilltest.runner"), importlib.import_module("skilltest.cache")
+
+
+def timed(fn: Callable[[], Any]) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def micro_benchmarks(ts: Any, store: Any, report: dict[str, Any], scratch: Path) -> dict[str, float]:
+    """In-process timings of the harness phases that never touch Edge, per skill or per test."""
+    metrics: dict[str, float] = {}
+    elapsed, skills = timed(lambda: ts.find_skills(None))
+    metrics["discover_ms_per_skill"] = elapsed / len(skills)
+
+    def load_all() -> list[tuple[Path, str, dict[str, Any]]]:
+        loaded = []
+        for skill_dir in skills:
+            ts.load_yaml(skill_dir / "skill.yaml")
+            text = (skill_dir / "pipeline-mcp.yaml").read_text()
+            yaml.load(text, Loader=ts.DupKeyLoader)
+            loaded.append((skill_dir, text, ts.load_yaml(skill_dir / "test" / "test.yaml")))
+        return loaded
+
+    elapsed, loaded = timed(load_all)
+    metrics["yaml_ms_per_skill"] = elapsed / len(skills)
+
+    def fingerprint_all() -> int:
+        count = 0
+        for skill_dir, text, test_yaml in loaded:
+            for test in test_yaml["tests"]:
+                harness_hash = ts.harness_fingerprint(text, test["expected"], True)
+                ts.compute_test_fingerprint(skill_dir, test, test["input"], {}, True, harness_hash)
+                count += 1
+        return count
+
+    elapsed, tests = timed(fingerprint_all)
+    metrics["fingerprint_ms_per_test"] = elapsed / tests
+
+    history = {
+        store.cache_key(skill["category"], skill["name"], test["name"]): [(test["status"], float(test.get("duration_ms") or 1.0))]
+        for skill in report["skills"]
+        for test in skill.get("tests", [])
+        if test.get("status")
+    }
+    elapsed, _ = timed(lambda: ts.schedule_skills(skills, history))
+    metrics["schedule_ms_per_skill"] = elapsed / len(skills)
+
+    elapsed, _ = timed(lambda: store.write_report(scratch / "micro-report.json", report, None))
+    metrics["report_ms_per_test"] = elapsed / tests
+    return metrics
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_edge() -> tuple[subprocess.Popen[bytes], str]:
+    api_url = f"http://127.0.0.1:{free_port()}"
+    process = subprocess.Popen(
+        [sys.executable, str(FAKE_EDGE), "--listen", api_url.split("://", 1)[1]],
+        stdout=subprocess.DEVNULL,
+    )
+    jobs_url = api_url + os.environ.get("EXPANSO_EDGE_JOBS_PATH", "/api/v1/jobs")
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            if requests.get(jobs_url, timeout=1).ok:
+                return process, api_url
+        except requests.RequestException:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"fake Edge did not come up at {api_url}")
+
+
+def run_harness(skills_dir: Path, api_url: str, cache_dir: Path, report_path: Path, jobs: int) -> tuple[float, dict[str, Any]]:
+    """One full test-skills.py run; returns its wall time and report."""
+    command = [
+        sys.executable, str(TEST_SKILLS),
+        "--api-url", api_url,
+        "--cache-dir", str(cache_dir),
+        "--report", str(report_path),
+        "--jobs", str(jobs),
+    ]
+    env = {**os.environ, "EXPANSO_SKILLS_DIR": str(skills_dir)}
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"test-skills.py exited {result.returncode}:\n{result.stderr[-2000:]}")
+    with open(report_path) as f:
+        return wall_ms, json.load(f)
+
+
+def end_to_end(skills_dir: Path, api_url: str, scratch: Path, jobs: int, tests: int, repeat: int) -> tuple[dict[str, float], dict[str, Any]]:
+    """Per-test wall time of a cold run (every test executes) and a warm one (every test cached)."""
+    metrics: dict[str, float] = {}
+    cache_dir = scratch / f"cache-{repeat}"
+    cold_ms, report = run_harness(skills_dir, api_url, cache_dir, scratch / f"cold-{repeat}.json", jobs)
+    executed = report["timings"].get("executed_tests") or tests
+    metrics["cold_run_ms_per_test"] = cold_ms / tests
+    for phase, total in report["timings"].get("phases", {}).items():
+        if phase in {"parse_ms", "mock_ms", "deploy_ms", "delete_ms"}:
+            metrics[f"cold_{phase}_per_test"] = total / executed
+    warm_ms, _ = run_harness(skills_dir, api_url, cache_dir, scratch / f"warm-{repeat}.json", jobs)
+    metrics["warm_run_ms_per_test"] = warm_ms / tests
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return metrics, report
+
+
+def summarize(samples: list[dict[str, float]]) -> dict[str, dict[str, float]]:
+    """Median, min and max of each metric over the repeats."""
+    summary = {}
+    for key in samples[0]:
+        values = [sample[key] for sample in samples if key in sample]
+        summary[key] = {
+            "median": round(statistics.median(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+        }
+    return summary
+
+
+def compare(metrics: dict[str, dict[str, float]], baseline: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """A metric regresses when its median grew past ``threshold`` and no repeat was as fast as the baseline's slowest."""
+    comparisons = []
+    for key, current in metrics.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        change = (current["median"] - base["median"]) / base["median"] if base["median"] else 0.0
+        regressed = (
+            change > threshold
+            and current["min"] > base["max"]
+            and current["median"] - base["median"] > NOISE_FLOOR_MS
+        )
+        comparisons.append({
+            "metric": key,
+            "median": current["median"],
+            "baseline_median": base["median"],
+            "change": round(change, 4),
+            "regressed": regressed,
+        })
+    return sorted(comparisons, key=lambda c: (not c["regressed"], -c["change"]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the skill test harness against a fake Edge")
+    parser.add_argument("--skills", type=int, default=2000, help="Number of synthetic skills to generate (default: 2000)")
+    parser.add_argument("--tests-per-skill", type=int, default=2, help="Tests in each synthetic skill (default: 2)")
+    parser.add_argument("--repeat", type=int, default=3, help="Measure this many times and keep the median (default: 3)")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="--jobs for the end-to-end harness runs (default: 8)")
+    parser.add_argument("--micro-only", action="store_true", help="Skip the end-to-end runs against the fake Edge")
+    parser.add_argument("--output", type=str, default=None, help="Write the measurements as JSON to this file")
+    parser.add_argument("--baseline", type=str, default=str(DEFAULT_BASELINE), help=f"Baseline file to compare against (default: {DEFAULT_BASELINE.relative_to(SCRIPTS_DIR.parent)})")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run as the new baseline")
+    parser.add_argument("--regression-threshold", type=float, default=0.25, help="Fractional slowdown of a metric that counts as a regression (default: 0.25)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a metric regressed against the baseline")
+    args = parser.parse_args()
+    if args.skills < 1 or args.tests_per_skill < 1 or args.repeat < 1:
+        parser.error("--skills, --tests-per-skill and --repeat must be positive")
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench-harness-"))
+    skills_dir = scratch / "skills"
+    fake_edge = None
+    try:
+        print(f"Generating {args.skills} synthetic skills with {args.tests_per_skill} tests each...")
+        for index in range(args.skills):
+            write_skill(skills_dir, index, args.tests_per_skill)
+        tests = args.skills * args.tests_per_skill
+        ts, store = load_harness(skills_dir)
+
+        if not args.micro_only:
+            fake_edge, api_url = start_fake_edge()
+        samples = []
+        report: dict[str, Any] | None = None
+        for repeat in range(args.repeat):
+            sample: dict[str, float] = {}
+            if not args.micro_only:
+                e2e, report = end_to_end(skills_dir, api_url, scratch, args.jobs, tests, repeat)
+                sample.update(e2e)
+            if report is None:
+                # Without a real run, report on a plausible shape: every test passed.
+                report = {"skills": [
+                    {"name": skill_dir.name, "category": skill_dir.parent.name, "status": "passed",
+                     "tests": [{"name": f"Case {case}", "status": "passed", "duration_ms": 1.0} for case in range(args.tests_per_skill)]}
+                    for skill_dir in ts.find_skills(None)
+                ]}
+            sample.update(micro_benchmarks(ts, store, report, scratch))
+            samples.append(sample)
+            print(f"  repeat {repeat + 1}/{args.repeat} done")
+    finally:
+        if fake_edge is not None:
+            fake_edge.terminate()
+            fake_edge.wait()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    metrics = summarize(samples)
+    print(f"\nHarness overhead over {args.skills} skills / {tests} tests (median of {args.repeat}):")
+    for key, value in metrics.items():
+        print(f"  {key:<32} {value['median']:>10.4f} ms  [{value['min']:.4f} .. {value['max']:.4f}]")
+
+    baseline_path = Path(args.baseline)
+    baseline: dict[str, Any] = {}
+    if baseline_path.exists():
+        with open(baseline_path) as f:
+            recorded = json.load(f)
+        # Per-test costs shift with suite size and concurrency; only compare like with like.
+        if recorded.get("config") == {"skills": args.skills, "tests_per_skill": args.tests_per_skill, "jobs": args.jobs}:
+            baseline = recorded.get("metrics", {})
+        else:
+            print(f"\nBaseline {baseline_path} was recorded with {recorded.get('config')}; not comparing")
+    comparisons = compare(metrics, baseline, args.regression_threshold)
+    if comparisons:
+        print(f"\nBaseline comparison (regression: median >{args.regression_threshold:.0%} slower, no overlap with baseline range):")
+        for c in comparisons:
+            marker = "REGRESSED" if c["regressed"] else ""
+            print(f"  {c['metric']:<32} {c['baseline_median']:>10.4f} -> {c['median']:>10.4f} {c['change']:>+8.1%}  {marker}")
+
+    result = {
+        "config": {"skills": args.skills, "tests_per_skill": args.tests_per_skill, "jobs": args.jobs},
+        "repeat": args.repeat,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metrics": metrics,
+        "comparison": comparisons,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.output}")
+    if args.update_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({key: result[key] for key in ("config", "recorded_at", "metrics")}, f, indent=2)
+            f.write("\n")
+        print(f"Recorded baseline {baseline_path}")
+
+    if args.fail_on_regression and any(c["regressed"] for c in comparisons):
+        print("Harness overhead regressed against the baseline", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = ["pyyaml"]
+# ///
+"""Serve a fake Expanso Edge job API for exercising scripts/test-skills.py.
+
+Each submitted job gets a trivial echo http_server on the address and path
+from its spec: the request's JSON body comes back as the response. Nothing
+in the pipeline runs, so test outcomes are meaningless; what this measures
+is the harness around the Edge.
+
+Usage:
+  uv run -s scripts/fake-edge.py --listen 127.0.0.1:9010
+  uv run -s scripts/test-skills.py --api-url http://127.0.0.1:9010
+  uv run -s scripts/fake-edge.py --startup-ms 50 --latency-ms 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import yaml
+
+JOBS_PATH = os.environ.get("EXPANSO_EDGE_JOBS_PATH", "/api/v1/jobs")
+
+
+def path_pattern(path: str) -> re.Pattern[str]:
+    """Match an http_server path, treating ``{param}`` segments as wildcards."""
+    parts = re.split(r"(\{[^}/]+\})", path or "/")
+    return re.compile("".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts))
+
+
+class EchoJob:
+    """One deployed job: an http_server that echoes JSON bodies back."""
+
+    def __init__(self, spec: dict[str, Any], startup_ms: float, latency_ms: float) -> None:
+        http_server = spec["config"]["input"]["http_server"]
+        host, _, port = http_server["address"].rpartition(":")
+        self.name = spec["name"]
+        self.address = http_server["address"]
+        self.pattern = path_pattern(http_server.get("path", "/"))
+        self.verbs = {verb.upper() for verb in http_server.get("allowed_verbs", ["POST"])}
+        self.latency_ms = latency_ms
+        self.server: ThreadingHTTPServer | None = None
+        self._closed = threading.Event()
+        threading.Thread(target=self._serve, args=(host or "127.0.0.1", int(port), startup_ms), daemon=True).start()
+
+    def _serve(self, host: str, port: int, startup_ms: float) -> None:
+        # Like a real Edge, the listener only appears once the job has started.
+        if self._closed.wait(startup_ms / 1000):
+            return
+        job = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def handle_any(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not job.pattern.fullmatch(self.path.split("?", 1)[0]):
+                    return reply(self, 404, {"error": "not found"})
+                if self.command not in job.verbs:
+                    return reply(self, 405, {"error": "method not allowed"})
+                if job.latency_ms:
+                    time.sleep(job.latency_ms / 1000)
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    payload = {"content": body.decode(errors="replace")}
+                reply(self, 200, payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_OPTIONS = handle_any
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as exc:
+            print(f"job {job.name}: cannot listen on {host}:{port}: {exc}", file=sys.stderr)
+            return
+        server.daemon_threads = True
+        self.server = server
+        if self._closed.is_set():
+            server.server_close()
+            return
+        server.serve_forever(poll_interval=0.05)
+        server.server_close()
+
+    def stop(self) -> None:
+        self._closed.set()
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+def reply(handler: BaseHTTPRequestHandler, status: int, body: Any) -> None:
+    data = json.dumps(body).encode()
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+def make_api(startup_ms: float, latency_ms: float) -> type[BaseHTTPRequestHandler]:
+    jobs: dict[str, EchoJob] = {}
+    lock = threading.Lock()
+
+    class Api(BaseHTTPRequestHandler):
+        # Keep-alive like a real Edge; without TCP_NODELAY the split header and
+        # body writes stall on delayed ACKs.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != JOBS_PATH:
+                return reply(self, 404, {"error": "not found"})
+            with lock:
+                reply(self, 200, {"jobs": [{"name": job.name, "address": job.address} for job in jobs.values()]})
+
+        def do_POST(self) -> None:
+            if self.path.split("?", 1)[0] != JOBS_PATH:
+                return reply(self, 404, {"error": "not found"})
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                # The harness posts JSON; expanso-cli style YAML specs work too.
+                try:
+                    spec = json.loads(body)
+                except ValueError:
+                    spec = yaml.safe_load(body)
+                job = EchoJob(spec, startup_ms, latency_ms)
+            except (yaml.YAMLError, KeyError, TypeError, ValueError) as exc:
+                return reply(self, 400, {"error": f"invalid job spec: {exc}"})
+            with lock:
+                previous = jobs.pop(job.name, None)
+                jobs[job.name] = job
+            if previous is not None:
+                previous.stop()
+            reply(self, 201, {"name": job.name})
+
+        def do_DELETE(self) -> None:
+            route, _, name = self.path.split("?", 1)[0].rpartition("/")
+            if route != JOBS_PATH:
+                return reply(self, 404, {"error": "not found"})
+            with lock:
+                job = jobs.pop(name, None)
+            if job is None:
+                return reply(self, 404, {"error": f"job {name} not found"})
+            job.stop()
+            reply(self, 200, {"name": name})
+
+    return Api
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fake Expanso Edge job API with echo http_servers")
+    parser.add_argument("--listen", default="127.0.0.1:9010", help="Address of the job API (default: 127.0.0.1:9010)")
+    parser.add_argument("--startup-ms", type=float, default=0.0, help="Delay before a deployed job starts listening (default: 0)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every echoed request (default: 0)")
+    args = parser.parse_args()
+
+    host, _, port = args.listen.rpartition(":")
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), make_api(args.startup_ms, args.latency_ms))
+    server.daemon_threads = True
+    print(f"Fake Edge job API on http://{server.server_address[0]}:{server.server_address[1]}{JOBS_PATH}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Modules behind scripts/test-skills.py."""
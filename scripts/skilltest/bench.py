@@ -0,0 +1,477 @@
+"""--bench and --soak: load-test deployed MCP pipelines and track drift over time."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from .edge import EdgePool, ResourceMonitor, resource_delta, sample_process
+from .runner import (
+    Deployment,
+    PreparedPipeline,
+    RunContext,
+    SCRATCH,
+    SkillLog,
+    TRACER,
+    TRACE_LANE,
+    Worker,
+    delete_job,
+    deploy_pipeline,
+    group_by_pipeline,
+    plan_skill,
+)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (``q`` in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[min(len(sorted_values), int(rank)) - 1]
+
+
+# Two-sided 95% Student t critical values by degrees of freedom.
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+    21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
+}
+
+
+def mean_ci(samples: list[float]) -> list[float]:
+    """Return ``[mean, half_width]`` of the 95% confidence interval of ``samples``."""
+    if not samples:
+        return [0.0, 0.0]
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return [round(mean, 2), 0.0]
+    df = len(samples) - 1
+    # Past the table, df=30's value is slightly wider than the true one: conservative.
+    t = T_CRITICAL_95[min(df, 30)]
+    return [round(mean, 2), round(t * statistics.stdev(samples) / len(samples) ** 0.5, 2)]
+
+
+def drive_load(
+    deployment: Deployment,
+    payloads: list[dict[str, Any]],
+    clients: int,
+    duration: float,
+    max_requests: int | None,
+) -> tuple[list[float], dict[str, int], float]:
+    """Send ``payloads`` round-robin from ``clients`` threads until ``duration`` or ``max_requests`` runs out."""
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    sent = 0
+
+    def next_request() -> int | None:
+        nonlocal sent
+        with lock:
+            if max_requests is not None and sent >= max_requests:
+                return None
+            sent += 1
+            return sent - 1
+
+    def client(deadline: float) -> None:
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                seq = next_request()
+                if seq is None:
+                    return
+                error = None
+                started = time.perf_counter()
+                try:
+                    response = session.request(deployment.method, deployment.url, json=payloads[seq % len(payloads)], timeout=30)
+                    if response.status_code >= 400:
+                        error = f"HTTP {response.status_code}"
+                except requests.RequestException as exc:
+                    error = type(exc).__name__
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed_ms)
+                    if error:
+                        errors[error] = errors.get(error, 0) + 1
+
+    started = time.perf_counter()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(client, deadline) for _ in range(clients)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - started
+
+
+def load_stats(latencies: list[float], errors: dict[str, int], elapsed: float) -> dict[str, Any]:
+    latencies = sorted(latencies)
+    error_count = sum(errors.values())
+    return {
+        "requests": len(latencies),
+        "errors": error_count,
+        "error_rate": round(error_count / len(latencies), 4) if latencies else 0.0,
+        "error_kinds": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+def plan_load_group(skill_dir: Path, run: RunContext) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    """Plan one skill and pick its largest group of tests sharing an effective spec to drive load with."""
+    skill_result, pending = plan_skill(skill_dir, run, SkillLog(buffered=False))
+    if skill_result is None:
+        return None, []
+    entry = {"name": skill_result["name"], "category": skill_result["category"]}
+    pending = [ctx for ctx in pending if isinstance(ctx["prepared"], PreparedPipeline)]
+    if skill_result["status"] != "unknown" or not pending:
+        return dict(entry, status="skipped", reason=skill_result.get("reason") or "no runnable tests"), []
+    return entry, max(group_by_pipeline(pending), key=len)
+
+
+def bench_skill(skill_dir: Path, run: RunContext, worker: Worker) -> dict[str, Any] | None:
+    """Deploy one skill's MCP pipeline once and load it with its test payloads."""
+    args = run.args
+    bench, group = plan_load_group(skill_dir, run)
+    if not group:
+        return bench
+    deployment, failure = deploy_pipeline(bench["name"], group[0]["prepared"], worker)
+    if deployment is None:
+        return dict(bench, status="failed", reason=(failure or {}).get("reason"))
+    all_latencies: list[float] = []
+    all_errors: dict[str, int] = {}
+    total_elapsed = 0.0
+    repeats = []
+    monitor = ResourceMonitor(worker.edge.pid)
+    try:
+        with monitor:
+            for repeat in range(args.bench_repeat):
+                with TRACER.span("bench", cat="bench", skill=bench["name"], clients=args.bench_clients, repeat=repeat):
+                    latencies, errors, elapsed = drive_load(
+                        deployment,
+                        [ctx["payload"] for ctx in group],
+                        clients=args.bench_clients,
+                        duration=args.bench_duration,
+                        max_requests=args.bench_requests,
+                    )
+                stats = load_stats(latencies, errors, elapsed)
+                repeats.append({"p95_ms": stats["latency_ms"]["p95"], "throughput_rps": stats["throughput_rps"]})
+                all_latencies.extend(latencies)
+                for kind, count in errors.items():
+                    all_errors[kind] = all_errors.get(kind, 0) + count
+                total_elapsed += elapsed
+    finally:
+        delete_job(deployment.name, worker)
+
+    bench.update(
+        status="ok",
+        tests=[ctx["test_name"] for ctx in group],
+        clients=args.bench_clients,
+        ready_ms=deployment.ready_ms,
+        **load_stats(all_latencies, all_errors, total_elapsed),
+    )
+    # Each repeat is one sample; comparisons against the baseline use these intervals.
+    bench["repeats"] = repeats
+    bench["p95_ms_ci"] = mean_ci([r["p95_ms"] for r in repeats])
+    bench["throughput_rps_ci"] = mean_ci([r["throughput_rps"] for r in repeats])
+    latency = bench["latency_ms"]
+    print(
+        f"  - {bench['requests']} requests, {bench['throughput_rps']} req/s, "
+        f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, "
+        f"errors {bench['error_rate']:.2%}"
+    )
+    resources = monitor.summary()
+    if resources is not None:
+        bench["resources"] = resources
+        print(
+            f"  - edge cpu {resources['cpu_percent']}%, peak rss {resources['peak_rss_kb'] / 1024:.1f} MiB, "
+            f"peak fds {resources['peak_fds']}, peak threads {resources['peak_threads']}"
+        )
+    return bench
+
+
+def run_bench(skills: list[Path], run: RunContext, edges: EdgePool) -> list[dict[str, Any]]:
+    """Benchmark ``skills`` one at a time so each gets the Edge to itself."""
+    worker = Worker(index=0, edge=edges.assign(0), temp_dir=SCRATCH.mkdtemp("bench-"))
+    TRACE_LANE.set("bench")
+    results = []
+    for skill_dir in skills:
+        worker.edge = edges.route(worker.edge)
+        result = bench_skill(skill_dir, run, worker)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def print_bench_table(results: list[dict[str, Any]]) -> None:
+    rows = [r for r in results if r["status"] == "ok"]
+    if not rows:
+        return
+    print("\nBenchmark (sorted by p95):")
+    print(f"  {'skill':<40} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for r in sorted(rows, key=lambda r: r["latency_ms"]["p95"], reverse=True):
+        latency = r["latency_ms"]
+        print(
+            f"  {r['category'] + '/' + r['name']:<40} {r['throughput_rps']:>9.1f} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} {r['error_rate']:>8.2%}"
+        )
+
+
+def load_report_path_for(report_path: Path, mode: str) -> Path:
+    """Where --bench/--soak write their results, so the test report next to them survives."""
+    return report_path.with_name(f"{report_path.stem}.{mode}.json")
+
+
+def baseline_path_for(report_path: Path) -> Path:
+    return report_path.with_name(f"{report_path.stem}.bench-baseline.json")
+
+
+def load_baseline(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f).get("skills", {})
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def update_baseline(path: Path, baseline: dict[str, Any], results: list[dict[str, Any]]) -> int:
+    updated = 0
+    for result in results:
+        if result["status"] != "ok":
+            continue
+        baseline[f"{result['category']}/{result['name']}"] = {
+            "clients": result["clients"],
+            "repeats": len(result["repeats"]),
+            "p95_ms": result["p95_ms_ci"],
+            "throughput_rps": result["throughput_rps_ci"],
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        updated += 1
+    with open(path, "w") as f:
+        json.dump({"skills": dict(sorted(baseline.items()))}, f, indent=2)
+        f.write("\n")
+    return updated
+
+
+def compare_to_baseline(results: list[dict[str, Any]], baseline: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """Rank benchmarks worst first; a metric regresses past ``threshold`` only if the 95% intervals don't overlap."""
+    comparisons = []
+    for result in results:
+        key = f"{result['category']}/{result['name']}"
+        base = baseline.get(key)
+        if result["status"] != "ok" or not base or base.get("clients") != result["clients"]:
+            continue
+        (p95, p95_ci), (base_p95, base_p95_ci) = result["p95_ms_ci"], base["p95_ms"]
+        (rps, rps_ci), (base_rps, base_rps_ci) = result["throughput_rps_ci"], base["throughput_rps"]
+        p95_change = (p95 - base_p95) / base_p95 if base_p95 else 0.0
+        rps_change = (base_rps - rps) / base_rps if base_rps else 0.0
+        p95_regressed = p95_change > threshold and p95 - p95_ci > base_p95 + base_p95_ci
+        rps_regressed = rps_change > threshold and rps + rps_ci < base_rps - base_rps_ci
+        result["regression"] = p95_regressed or rps_regressed
+        comparisons.append({
+            "skill": key,
+            "p95_ms": p95,
+            "baseline_p95_ms": base_p95,
+            "p95_change": round(p95_change, 4),
+            "throughput_rps": rps,
+            "baseline_throughput_rps": base_rps,
+            "throughput_change": round(-rps_change, 4),
+            "regressed": result["regression"],
+        })
+    return sorted(comparisons, key=lambda c: (not c["regressed"], -max(c["p95_change"], -c["throughput_change"])))
+
+
+def print_regression_table(comparisons: list[dict[str, Any]], threshold: float) -> None:
+    if not comparisons:
+        print("\nNo baseline to compare against for these skills (run with --update-baseline to record one).")
+        return
+    print(f"\nBaseline comparison (regression: >{threshold:.0%} worse with non-overlapping 95% intervals):")
+    print(f"  {'skill':<40} {'p95 ms':>17} {'change':>8} {'req/s':>17} {'change':>8}")
+    for c in comparisons:
+        marker = "REGRESSED" if c["regressed"] else ""
+        print(
+            f"  {c['skill']:<40} {c['baseline_p95_ms']:>7.1f} -> {c['p95_ms']:>6.1f} {c['p95_change']:>+8.1%} "
+            f"{c['baseline_throughput_rps']:>7.1f} -> {c['throughput_rps']:>6.1f} {c['throughput_change']:>+8.1%}  {marker}"
+        )
+
+
+def parse_duration(value: str) -> float:
+    """Parse ``--soak`` durations like ``90``, ``90s``, ``30m`` or ``2h`` into seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", value.strip())
+    if not match or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"expected a duration like 90s, 30m or 2h, got {value!r}")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+# Soak series and the direction in which they get worse.
+SOAK_SKILL_METRICS = {"p95_ms": 1, "throughput_rps": -1}
+SOAK_EDGE_METRICS = {"rss_kb": 1, "fds": 1, "threads": 1}
+# R² a trend needs to count as drift, so noisy series don't trip it by chance.
+DRIFT_MIN_R2 = 0.5
+
+
+def soak_snapshot(
+    elapsed: float,
+    window: float,
+    stats: dict[str, dict[str, Any]],
+    before: dict[str, Any] | None,
+    after: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """One soak interval: per-skill latency and throughput plus the Edge's resources at its end."""
+    snapshot: dict[str, Any] = {"t_s": round(elapsed, 1), "skills": {}}
+    for skill, skill_stats in stats.items():
+        snapshot["skills"][skill] = {
+            "requests": skill_stats["requests"],
+            "throughput_rps": skill_stats["throughput_rps"],
+            "error_rate": skill_stats["error_rate"],
+            "p50_ms": skill_stats["latency_ms"]["p50"],
+            "p95_ms": skill_stats["latency_ms"]["p95"],
+            "p99_ms": skill_stats["latency_ms"]["p99"],
+        }
+    delta = resource_delta(before, after)
+    if after is not None and delta is not None:
+        snapshot["edge"] = {
+            "rss_kb": after["rss_kb"],
+            "fds": after["fds"],
+            "threads": after["threads"],
+            "cpu_percent": round(delta["cpu_ms"] / (window * 1000) * 100, 1),
+        }
+    return snapshot
+
+
+def fit_trend(points: list[tuple[float, float]], worse: int, threshold: float) -> dict[str, Any] | None:
+    """Least-squares line through ``(t_s, value)`` points, flagged ``drifting`` past ``threshold`` with a good fit."""
+    if len(points) < 3:
+        return None
+    times = [t for t, _ in points]
+    values = [v for _, v in points]
+    if len(set(values)) == 1:
+        return {"slope_per_hour": 0.0, "change": 0.0, "r2": 1.0, "drifting": False}
+    slope, intercept = statistics.linear_regression(times, values)
+    r2 = statistics.correlation(times, values) ** 2
+    start = intercept + slope * times[0]
+    end = intercept + slope * times[-1]
+    change = (end - start) / start if start > 0 else None
+    return {
+        "slope_per_hour": round(slope * 3600, 3),
+        "change": round(change, 4) if change is not None else None,
+        "r2": round(r2, 3),
+        "drifting": change is not None and change * worse > threshold and r2 >= DRIFT_MIN_R2,
+    }
+
+
+def soak_trends(snapshots: list[dict[str, Any]], threshold: float) -> list[dict[str, Any]]:
+    series: dict[tuple[str, str, int], list[tuple[float, float]]] = {}
+    for snapshot in snapshots:
+        for skill, stats in snapshot["skills"].items():
+            if not stats["requests"]:
+                continue
+            for metric, worse in SOAK_SKILL_METRICS.items():
+                series.setdefault((skill, metric, worse), []).append((snapshot["t_s"], stats[metric]))
+        for metric, worse in SOAK_EDGE_METRICS.items():
+            if "edge" in snapshot:
+                series.setdefault(("edge", metric, worse), []).append((snapshot["t_s"], snapshot["edge"][metric]))
+    trends = []
+    for (subject, metric, worse), points in series.items():
+        trend = fit_trend(points, worse, threshold)
+        if trend is not None:
+            trends.append({"subject": subject, "metric": metric, "first": points[0][1], "last": points[-1][1], **trend})
+    return trends
+
+
+def run_soak(skills: list[Path], run: RunContext, edges: EdgePool) -> dict[str, Any]:
+    """Keep each skill's MCP pipeline deployed under steady traffic for --soak seconds, snapshotting every interval."""
+    args = run.args
+    worker = Worker(index=0, edge=edges.assign(0), temp_dir=SCRATCH.mkdtemp("soak-"))
+    TRACE_LANE.set("soak")
+    targets: list[tuple[str, list[dict[str, Any]], Deployment]] = []
+    entries = []
+    for skill_dir in skills:
+        entry, group = plan_load_group(skill_dir, run)
+        if not group:
+            if entry is not None:
+                entries.append(entry)
+            continue
+        deployment, failure = deploy_pipeline(entry["name"], group[0]["prepared"], worker)  # type: ignore[index]
+        if deployment is None:
+            entries.append(dict(entry, status="failed", reason=(failure or {}).get("reason")))
+            continue
+        entries.append(dict(entry, status="ok", tests=[ctx["test_name"] for ctx in group], ready_ms=deployment.ready_ms))
+        targets.append((f"{entry['category']}/{entry['name']}", group, deployment))  # type: ignore[index]
+
+    snapshots: list[dict[str, Any]] = []
+    started = time.perf_counter()
+    print(f"Soaking {len(targets)} pipelines for {args.soak:g}s with {args.soak_clients} clients each, snapshot every {args.soak_interval:g}s")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+            while targets and (elapsed := time.perf_counter() - started) < args.soak:
+                window = min(args.soak_interval, args.soak - elapsed)
+                before = sample_process(worker.edge.pid)
+                window_started = time.perf_counter()
+                with TRACER.span("soak", cat="bench", window=len(snapshots)):
+                    futures = {
+                        name: pool.submit(drive_load, deployment, [ctx["payload"] for ctx in group], args.soak_clients, window, None)
+                        for name, group, deployment in targets
+                    }
+                    stats = {name: load_stats(*future.result()) for name, future in futures.items()}
+                snapshot = soak_snapshot(
+                    time.perf_counter() - started,
+                    time.perf_counter() - window_started,
+                    stats,
+                    before,
+                    sample_process(worker.edge.pid),
+                )
+                snapshots.append(snapshot)
+                worst = max(snapshot["skills"].values(), key=lambda s: s["p95_ms"])
+                edge_info = snapshot.get("edge")
+                print(
+                    f"  [{snapshot['t_s']:>8.0f}s] {sum(s['requests'] for s in snapshot['skills'].values())} requests, "
+                    f"worst p95 {worst['p95_ms']} ms"
+                    + (f", edge rss {edge_info['rss_kb'] / 1024:.1f} MiB, fds {edge_info['fds']}, threads {edge_info['threads']}" if edge_info else "")
+                )
+    except KeyboardInterrupt:
+        print(f"Soak interrupted after {time.perf_counter() - started:.0f}s; reporting {len(snapshots)} snapshots")
+    finally:
+        for _, _, deployment in targets:
+            delete_job(deployment.name, worker)
+
+    return {
+        "duration_s": round(time.perf_counter() - started, 1),
+        "interval_s": args.soak_interval,
+        "clients": args.soak_clients,
+        "skills": entries,
+        "snapshots": snapshots,
+        "trends": soak_trends(snapshots, args.drift_threshold),
+    }
+
+
+def print_soak_trends(trends: list[dict[str, Any]], threshold: float) -> None:
+    if not trends:
+        print("\nToo few soak snapshots to fit trends (need 3).")
+        return
+    drifting = [t for t in trends if t["drifting"]]
+    if not drifting:
+        print(f"\nNo drift beyond {threshold:.0%} across {len(trends)} soak series.")
+        return
+    print(f"\nDrift (>{threshold:.0%} worse over the soak, R² >= {DRIFT_MIN_R2}):")
+    print(f"  {'series':<52} {'first':>10} {'last':>10} {'change':>8} {'per hour':>12} {'R²':>6}")
+    for t in drifting:
+        print(
+            f"  {t['subject'] + ' ' + t['metric']:<52} {t['first']:>10g} {t['last']:>10g} "
+            f"{t['change']:>+8.1%} {t['slope_per_hour']:>+12g} {t['r2']:>6.2f}"
+        )
+
@@ -0,0 +1,403 @@
+"""Result cache, output blobs, the resume journal and report writing."""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+def cache_key(category: str, skill_name: str, test_name: str | None) -> str:
+    return f"{category}/{skill_name}:{test_name or ''}"
+
+
+def load_previous_report(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def build_cache_index(report: dict[str, Any] | None) -> dict[str, dict[str, Any]]:
+    if not report:
+        return {}
+    index: dict[str, dict[str, Any]] = {}
+    for skill in report.get("skills", []) if isinstance(report, dict) else []:
+        category = skill.get("category") or ""
+        name = skill.get("name") or ""
+        for test in skill.get("tests", []) or []:
+            key = cache_key(category, name, test.get("name"))
+            index[key] = test
+    return index
+
+
+class ResultCache:
+    """Passing test results keyed by test fingerprint, in ``<cache_dir>/results.sqlite``."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            fingerprint TEXT PRIMARY KEY,
+            test_key TEXT NOT NULL,
+            entry TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+        CREATE TABLE IF NOT EXISTS history (
+            test_key TEXT NOT NULL,
+            recorded_at REAL NOT NULL,
+            status TEXT NOT NULL,
+            duration_ms REAL
+        );
+        CREATE INDEX IF NOT EXISTS history_test_key ON history (test_key, recorded_at);
+    """
+    # Executed attempts kept per test for scheduling.
+    HISTORY_KEEP = 10
+
+    def __init__(self, cache_dir: Path, max_bytes: int | None = None, max_age_days: float | None = None) -> None:
+        self.cache_dir = cache_dir
+        self.path = cache_dir / "results.sqlite"
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, fingerprint: str) -> dict[str, Any] | None:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT entry FROM results WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE results SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+        return json.loads(row[0])
+
+    def put(self, test_key: str, entry: dict[str, Any]) -> None:
+        fingerprint = entry.get("fingerprint")
+        if not fingerprint or entry.get("status") != "passed":
+            return
+        payload = json.dumps(entry, sort_keys=True, default=str)
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO results (fingerprint, test_key, entry, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, test_key, payload, len(payload), now, now),
+            )
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM results LIMIT 1").fetchone() is None
+
+    def merge_from(self, other: Path) -> int:
+        """Copy results and history from another cache database; returns results added."""
+        with self._lock:
+            db = self._db()
+            before = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            db.execute("ATTACH DATABASE ? AS other", (str(other),))
+            try:
+                db.execute("BEGIN")
+                db.execute(
+                    """
+                    INSERT INTO results SELECT * FROM other.results WHERE true
+                    ON CONFLICT (fingerprint) DO UPDATE SET last_used = max(last_used, excluded.last_used)
+                    """
+                )
+                db.execute(
+                    """
+                    INSERT INTO history SELECT * FROM other.history AS h WHERE NOT EXISTS (
+                        SELECT 1 FROM history WHERE test_key = h.test_key AND recorded_at = h.recorded_at
+                    )
+                    """
+                )
+                self._trim_history(db)
+                db.execute("COMMIT")
+            except BaseException:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                raise
+            finally:
+                db.execute("DETACH DATABASE other")
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - before
+
+    def record_history(self, test_key: str, status: str, duration_ms: float | None) -> None:
+        """Log one executed attempt, passed or not, for scheduling."""
+        with self._lock:
+            self._db().execute(
+                "INSERT INTO history (test_key, recorded_at, status, duration_ms) VALUES (?, ?, ?, ?)",
+                (test_key, time.time(), status, duration_ms),
+            )
+
+    def load_history(self) -> dict[str, list[tuple[str, float | None]]]:
+        history: dict[str, list[tuple[str, float | None]]] = {}
+        with self._lock:
+            rows = self._db().execute("SELECT test_key, status, duration_ms FROM history ORDER BY recorded_at").fetchall()
+        for test_key, status, duration_ms in rows:
+            history.setdefault(test_key, []).append((status, duration_ms))
+        return history
+
+    def import_report(self, report: dict[str, Any] | None) -> int:
+        """Seed the store from a JSON report written before the store existed."""
+        imported = 0
+        for key, entry in build_cache_index(report).items():
+            if entry.get("status") == "passed" and entry.get("fingerprint"):
+                self.put(key, entry)
+                imported += 1
+        return imported
+
+    def evict(self) -> int:
+        """Drop entries unused for ``max_age_days``, then least-recently-used ones above ``max_bytes``."""
+        removed = 0
+        with self._lock:
+            if self._conn is None:
+                return 0
+            db = self._conn
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += db.execute("DELETE FROM results WHERE last_used < ?", (cutoff,)).rowcount
+            if self.max_bytes:
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+                if total > self.max_bytes:
+                    doomed = []
+                    for fingerprint, size in db.execute("SELECT fingerprint, size FROM results ORDER BY last_used"):
+                        if total <= self.max_bytes:
+                            break
+                        doomed.append((fingerprint,))
+                        total -= size
+                    db.executemany("DELETE FROM results WHERE fingerprint = ?", doomed)
+                    removed += len(doomed)
+            self._trim_history(db)
+        return removed
+
+    def _trim_history(self, db: sqlite3.Connection) -> None:
+        db.execute(
+            """
+            DELETE FROM history WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, ROW_NUMBER() OVER (PARTITION BY test_key ORDER BY recorded_at DESC) AS age
+                    FROM history
+                ) WHERE age > ?
+            )
+            """,
+            (self.HISTORY_KEEP,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class BlobStore:
+    """Content-addressed, gzip-compressed test outputs under ``<cache_dir>/blobs/``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json.gz"
+
+    def put(self, value: Any) -> str:
+        data = json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            path.touch()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_path, path)
+        return f"sha256:{digest}"
+
+    def touch(self, ref: str) -> None:
+        """Mark a blob as used so eviction keeps it as long as its cache entry."""
+        with contextlib.suppress(OSError):
+            os.utime(self._path(ref.removeprefix("sha256:")))
+
+    def get(self, ref: str) -> Any:
+        path = self._path(ref.removeprefix("sha256:"))
+        try:
+            return json.loads(gzip.decompress(path.read_bytes()))
+        except (OSError, ValueError):
+            return None
+
+    def merge_from(self, other: BlobStore) -> int:
+        copied = 0
+        for path in other.root.glob("*/*.json.gz") if other.root.exists() else []:
+            target = self.root / path.parent.name / path.name
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, target)
+                copied += 1
+        return copied
+
+    def evict(self, max_age_days: float | None, max_bytes: int | None = None) -> int:
+        """Delete blobs unused for ``max_age_days``, then least-recently-used ones above ``max_bytes``."""
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+        removed = 0
+        kept = []
+        for path in self.root.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if cutoff is not None and stat.st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in kept)
+        if max_bytes:
+            for _, size, path in sorted(kept):
+                if total <= max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+
+def externalize_output(entry: dict[str, Any], blobs: BlobStore, inline_limit: int) -> None:
+    """Move ``entry["output"]`` into ``blobs``, keeping a reference and a truncated copy."""
+    if "output" not in entry:
+        return
+    output = entry["output"]
+    if "output_ref" not in entry:
+        entry["output_ref"] = blobs.put(output)
+    text = json.dumps(output)
+    if len(text) > inline_limit:
+        entry["output"] = {"truncated": True, "bytes": len(text), "preview": text[:inline_limit]}
+
+
+def full_output(entry: dict[str, Any], blobs: BlobStore | None) -> Any:
+    """The untruncated output of ``entry``, from the blob store when it was externalized."""
+    if blobs is not None and entry.get("output_ref"):
+        stored = blobs.get(entry["output_ref"])
+        if stored is not None:
+            return stored
+    return entry.get("output", {})
+
+
+class Journal:
+    """Append-only JSONL log of test entries; entries drop their output once journaled."""
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = path
+        self.index: dict[tuple[str, str], int] = self._scan() if resume else {}
+        self._file = open(path, "ab" if resume else "wb")
+        self._reader: Any = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> dict[tuple[str, str], int]:
+        index: dict[tuple[str, str], int] = {}
+        if not self.path.exists():
+            return index
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                index[(record["key"], record["entry"].get("fingerprint"))] = offset
+                offset += len(line)
+        # Drop a record torn by the crash so appends start on a clean line.
+        os.truncate(self.path, offset)
+        return index
+
+    def _read(self, offset: int) -> dict[str, Any]:
+        with self._lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            return json.loads(self._reader.readline())["entry"]
+
+    def record(self, test_key: str, entry: dict[str, Any]) -> None:
+        stored = {k: v for k, v in entry.items() if k != "journal_offset"}
+        line = (json.dumps({"key": test_key, "entry": stored}) + "\n").encode()
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+        entry.pop("output", None)
+        entry["journal_offset"] = offset
+
+    def lookup(self, test_key: str, fingerprint: str) -> dict[str, Any] | None:
+        """Return the entry an earlier run recorded for this exact test, output stripped."""
+        offset = self.index.get((test_key, fingerprint))
+        if offset is None:
+            return None
+        entry = self._read(offset)
+        entry.pop("output", None)
+        entry["journal_offset"] = offset
+        return entry
+
+    def hydrate(self, entry: dict[str, Any]) -> dict[str, Any]:
+        if "journal_offset" not in entry:
+            return entry
+        current = {k: v for k, v in entry.items() if k != "journal_offset"}
+        return {**self._read(entry["journal_offset"]), **current}
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+            if self._reader is not None:
+                self._reader.close()
+
+
+def journal_path_for(report_path: Path) -> Path:
+    return report_path.with_name(f"{report_path.stem}.journal.jsonl")
+
+
+def write_report(path: Path, report: dict[str, Any], journal: Journal | None) -> None:
+    """Write ``report`` as indented JSON via a temp file, hydrating one skill at a time from ``journal``."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    items = list(report.items())
+    with open(tmp_path, "w") as f:
+        f.write("{\n")
+        for i, (key, value) in enumerate(items):
+            f.write(f"  {json.dumps(key)}: ")
+            if key == "skills" and value:
+                f.write("[\n")
+                for j, skill in enumerate(value):
+                    if journal is not None:
+                        skill = dict(skill, tests=[journal.hydrate(test) for test in skill.get("tests", [])])
+                    text = json.dumps(skill, indent=2).replace("\n", "\n    ")
+                    f.write(f"    {text}{',' if j < len(value) - 1 else ''}\n")
+                f.write("  ]")
+            else:
+                f.write(json.dumps(value, indent=2).replace("\n", "\n  "))
+            f.write(",\n" if i < len(items) - 1 else "\n")
+        f.write("}")
+    os.replace(tmp_path, path)
+
+
+def hash_bytes(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
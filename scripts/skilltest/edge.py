@@ -0,0 +1,626 @@
+"""Local Edge runtimes: processes, the job API client, health supervision and resource sampling."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+
+
+# GET lists jobs, POST submits one, DELETE <route>/<name> removes one.
+EDGE_JOBS_PATH = os.environ.get("EXPANSO_EDGE_JOBS_PATH", "/api/v1/jobs")
+
+PRINT_LOCK = threading.Lock()
+
+
+PORT_LOCK = threading.Lock()
+RESERVED_PORTS: set[int] = set()
+
+
+@dataclass
+class EdgeProcess:
+    api_url: str
+    data_dir: Path
+    log_file: Path
+    env: dict[str, str] | None = None
+    edge_bin: str | None = None
+    process: subprocess.Popen | None = None
+
+    def start(self) -> None:
+        expanso_edge = self.edge_bin or find_expanso_edge()
+        if not expanso_edge:
+            raise RuntimeError("expanso-edge not found in PATH")
+
+        env = os.environ.copy()
+        if self.env:
+            env.update(self.env)
+
+        cmd = [
+            expanso_edge,
+            "run",
+            "--local",
+            "--no-watch",
+            "--api-listen",
+            self.api_url.replace("http://", ""),
+            "--data-dir",
+            str(self.data_dir),
+            "--log-level",
+            "warn",
+        ]
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        log_handle = open(self.log_file, "w")
+        self.process = subprocess.Popen(cmd, stdout=log_handle, stderr=log_handle, env=env)
+
+    def stop(self) -> None:
+        if not self.process:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+
+def write_job_file(spec: dict[str, Any], temp_dir: Path) -> Path:
+    """Write ``spec`` for ``expanso-cli job deploy``; job names are unique per run, so is the file."""
+    temp_job = temp_dir / f"{spec['name']}.yaml"
+    temp_job.write_text(yaml.safe_dump(spec, sort_keys=False))
+    return temp_job
+
+
+def find_expanso_edge() -> str | None:
+    return os.environ.get("EXPANSO_EDGE_BIN") or shutil.which("expanso-edge")
+
+
+def find_expanso_cli() -> str | None:
+    return os.environ.get("EXPANSO_CLI_BIN") or shutil.which("expanso-cli")
+
+
+# Sampled from /proc: Linux only, and only for Edges this script started.
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+RESOURCE_KEYS = ("rss_kb", "cpu_ms", "fds", "threads")
+# Growth after a skill's jobs are deleted that counts as a possible leak.
+LEAK_THRESHOLDS = {"fds": 2, "threads": 2, "rss_kb": 32 * 1024}
+# How long to wait after a delete for FDs and threads to drop back.
+RESOURCE_SETTLE_TIMEOUT = 0.5
+
+
+def sample_process(pid: int | None) -> dict[str, Any] | None:
+    """RSS, CPU time, open FDs and threads of ``pid``, or ``None`` if it can't be read."""
+    if pid is None:
+        return None
+    proc = Path(f"/proc/{pid}")
+    try:
+        status = (proc / "status").read_text()
+        stat = (proc / "stat").read_text()
+        fds = len(os.listdir(proc / "fd"))
+    except OSError:
+        return None
+    # Fields after the parenthesised command name; utime and stime are the 14th and 15th.
+    fields = stat.rsplit(")", 1)[1].split()
+    sample = {"pid": pid, "rss_kb": 0, "cpu_ms": round((int(fields[11]) + int(fields[12])) * 1000 / CLOCK_TICKS, 1), "fds": fds, "threads": 0}
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            sample["rss_kb"] = int(line.split()[1])
+        elif line.startswith("Threads:"):
+            sample["threads"] = int(line.split()[1])
+    return sample
+
+
+def settled_sample(pid: int | None, before: dict[str, Any] | None, timeout: float = RESOURCE_SETTLE_TIMEOUT) -> dict[str, Any] | None:
+    """Sample ``pid`` once FDs and threads are back to ``before`` or ``timeout`` passes."""
+    deadline = time.monotonic() + timeout
+    while True:
+        sample = sample_process(pid)
+        if sample is None or before is None or time.monotonic() >= deadline:
+            return sample
+        if sample["fds"] <= before["fds"] and sample["threads"] <= before["threads"]:
+            return sample
+        time.sleep(0.05)
+
+
+def resource_delta(before: dict[str, Any] | None, after: dict[str, Any] | None) -> dict[str, Any] | None:
+    """``after - before`` per resource; ``None`` if either is missing or the Edge was replaced in between."""
+    if before is None or after is None or before["pid"] != after["pid"]:
+        return None
+    return {key: round(after[key] - before[key], 1) for key in RESOURCE_KEYS}
+
+
+class ResourceMonitor:
+    """Samples a process on a background thread, e.g. while a benchmark loads it."""
+
+    def __init__(self, pid: int | None, interval: float = 0.25) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[dict[str, Any]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def __enter__(self) -> ResourceMonitor:
+        self._started = time.perf_counter()
+        first = sample_process(self.pid)
+        if first is not None:
+            self.samples.append(first)
+            self._thread = threading.Thread(target=self._loop, name="resource-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        last = sample_process(self.pid)
+        if last is not None:
+            self.samples.append(last)
+        self._elapsed = time.perf_counter() - self._started
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            sample = sample_process(self.pid)
+            if sample is not None:
+                self.samples.append(sample)
+
+    def summary(self) -> dict[str, Any] | None:
+        samples = [s for s in self.samples if s["pid"] == self.pid]
+        if len(samples) < 2 or self._elapsed <= 0:
+            return None
+        cpu_ms = samples[-1]["cpu_ms"] - samples[0]["cpu_ms"]
+        return {
+            "cpu_percent": round(cpu_ms / (self._elapsed * 1000) * 100, 1),
+            "peak_rss_kb": max(s["rss_kb"] for s in samples),
+            "peak_fds": max(s["fds"] for s in samples),
+            "peak_threads": max(s["threads"] for s in samples),
+            "delta": resource_delta(samples[0], samples[-1]),
+            "samples": len(samples),
+        }
+
+
+CLI_MISSING = "Edge job API unavailable and expanso-cli not found in PATH"
+# Transport errors and 5xx from the job API; they count toward the circuit breaker.
+API_UNAVAILABLE = "Edge API unavailable"
+
+
+def api_outcome(status_code: int, text: str) -> tuple[bool, str]:
+    if 200 <= status_code < 300:
+        return True, ""
+    if status_code >= 500:
+        return False, f"{API_UNAVAILABLE} (HTTP {status_code}): {text.strip()}"
+    return False, text.strip() or f"HTTP {status_code}"
+
+
+class EdgeClient:
+    """Job API client for one Edge; uses ``expanso-cli`` when the job route answers 404/405."""
+
+    def __init__(self, api_url: str, pool_size: int = 10) -> None:
+        self.api_url = api_url.rstrip("/")
+        self.jobs_url = self.api_url + EDGE_JOBS_PATH
+        # None until the first answer tells us whether the native route works.
+        self.native: bool | None = None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def cli_command(self, *cli_args: str) -> list[str] | None:
+        expanso_cli = find_expanso_cli()
+        return [expanso_cli, *cli_args, "--endpoint", self.api_url] if expanso_cli else None
+
+    def _run_cli(self, *cli_args: str) -> tuple[bool, str]:
+        command = self.cli_command(*cli_args)
+        if command is None:
+            return False, CLI_MISSING
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        except OSError as exc:
+            return False, f"expanso-cli failed: {exc}"
+        return result.returncode == 0, result.stderr.strip()
+
+    def list_ok(self) -> bool:
+        if self.native is None:
+            try:
+                response = self.session.get(self.jobs_url, timeout=2)
+            except requests.RequestException:
+                return False
+            if response.ok:
+                self.native = True
+                return True
+            if response.status_code not in {404, 405}:
+                # Up but not ready (e.g. 503 while starting); ask again later.
+                return False
+            # The API answers but doesn't serve the job route.
+            self.native = False
+        return self.probe()
+
+    def probe(self) -> bool:
+        """Health check over the transport already chosen; never switches it."""
+        if self.native is False:
+            return self._run_cli("job", "list")[0]
+        try:
+            return self.session.get(self.jobs_url, timeout=2).ok
+        except requests.RequestException:
+            return False
+
+    def wait_ready(self, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.list_ok():
+                return True
+            time.sleep(0.05 if self.native is not False else 0.3)
+        return False
+
+    def deploy(self, spec: dict[str, Any], temp_dir: Path) -> tuple[bool, str]:
+        if self.native is not False:
+            try:
+                response = self.session.post(
+                    self.jobs_url,
+                    data=json.dumps(spec, default=str),
+                    headers={"Content-Type": "application/json"},
+                    timeout=30,
+                )
+            except requests.RequestException as exc:
+                return False, f"{API_UNAVAILABLE}: {exc}"
+            return api_outcome(response.status_code, response.text)
+
+        temp_job = write_job_file(spec, temp_dir)
+        try:
+            return self._run_cli("job", "deploy", str(temp_job))
+        finally:
+            temp_job.unlink(missing_ok=True)
+
+    def delete(self, name: str) -> tuple[bool, str]:
+        if self.native is not False:
+            try:
+                response = self.session.delete(f"{self.jobs_url}/{name}", params={"force": "true"}, timeout=30)
+            except requests.RequestException as exc:
+                return False, f"{API_UNAVAILABLE}: {exc}"
+            return api_outcome(response.status_code, response.text)
+        return self._run_cli("job", "delete", name, "--yes", "--force")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class EdgeHandle:
+    """One Edge runtime in the pool, with a circuit breaker the pool's supervisor closes again."""
+
+    # Consecutive transient failures after which the circuit opens.
+    UNHEALTHY_AFTER = 5
+    # Failed supervisor health probes in a row that count as a wedged API.
+    WEDGED_AFTER = 3
+
+    def __init__(
+        self,
+        index: int,
+        api_url: str,
+        process: EdgeProcess | None = None,
+        pool_size: int = 10,
+        max_restarts: int = 3,
+    ) -> None:
+        self.index = index
+        self.api_url = api_url
+        self.process = process
+        # Every data dir this Edge ran in, restarts included; removed by EdgePool.stop.
+        self.data_dirs = [process.data_dir] if process else []
+        self.client = EdgeClient(api_url, pool_size=pool_size)
+        self.healthy = True
+        self.tests_run = 0
+        self.failures = 0
+        self.consecutive_transient = 0
+        self.unhealthy_reason: str | None = None
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.replays = 0
+        # Bumped whenever the circuit closes again; older failures are replayed.
+        self.generation = 0
+        self.retired = False
+        self.failed_probes = 0
+        self.failed_deletes = 0
+        # Cycles running and started on this Edge, to tell whether one ran alone.
+        self.in_flight = 0
+        self.cycles_started = 0
+        self._lock = threading.Lock()
+        self._recovered = threading.Condition(self._lock)
+
+    def alive(self) -> bool:
+        if self.process is None:
+            return True
+        return self.process.process is not None and self.process.process.poll() is None
+
+    @property
+    def pid(self) -> int | None:
+        if self.process is None or self.process.process is None:
+            return None
+        return self.process.process.pid
+
+    @contextlib.contextmanager
+    def cycle(self, settle: bool = True) -> Any:
+        """Yield a dict filled on exit with this cycle's resource delta and whether it had the Edge to itself."""
+        usage: dict[str, Any] = {}
+        with self._lock:
+            self.in_flight += 1
+            self.cycles_started += 1
+            started = self.cycles_started
+            alone = self.in_flight == 1
+        before = sample_process(self.pid)
+        try:
+            yield usage
+        finally:
+            with self._lock:
+                alone = alone and self.cycles_started == started
+            after = settled_sample(self.pid, before) if settle and alone else sample_process(self.pid)
+            with self._lock:
+                self.in_flight -= 1
+                alone = alone and self.cycles_started == started
+            delta = resource_delta(before, after)
+            if delta is not None:
+                usage.update(delta, exclusive=alone)
+
+    def record_delete(self, name: str, ok: bool, error: str) -> None:
+        """Count and report a job delete that failed; the job may still be running."""
+        if ok:
+            return
+        with self._lock:
+            self.failed_deletes += 1
+        with PRINT_LOCK:
+            print(f"Warning: could not delete job {name} on Edge #{self.index}: {error or 'unknown error'}", file=sys.stderr)
+
+    def mark_unhealthy(self, reason: str) -> None:
+        """Open the circuit; the supervisor decides whether it can close again."""
+        with self._lock:
+            if self.healthy:
+                self.healthy = False
+                self.unhealthy_reason = reason
+
+    def retire(self, reason: str) -> None:
+        with self._lock:
+            self.healthy = False
+            self.retired = True
+            self.unhealthy_reason = reason
+            self._recovered.notify_all()
+
+    def record(self, result: dict[str, Any]) -> None:
+        with self._lock:
+            self.tests_run += 1
+            if result.get("status") != "failed":
+                self.consecutive_transient = 0
+                return
+            self.failures += 1
+            if is_transient_failure(result):
+                self.consecutive_transient += 1
+            else:
+                self.consecutive_transient = 0
+            streak = self.consecutive_transient
+        if not self.alive():
+            self.mark_unhealthy("edge process exited")
+        elif streak >= self.UNHEALTHY_AFTER:
+            self.mark_unhealthy(f"{streak} consecutive transient failures")
+
+    def supervise(self) -> None:
+        """One supervisor pass: open the circuit on a dead or wedged Edge, then try to close it."""
+        if self.retired:
+            return
+        if self.healthy:
+            if not self.alive():
+                self.mark_unhealthy("edge process exited")
+            elif self.client.probe():
+                self.failed_probes = 0
+            else:
+                self.failed_probes += 1
+                if self.failed_probes >= self.WEDGED_AFTER:
+                    self.mark_unhealthy(f"API did not answer {self.failed_probes} health probes")
+        if self.healthy:
+            return
+        if self.process is None:
+            # External Edge: half-open probe, close the circuit once it answers.
+            if self.client.probe():
+                self.close_circuit()
+        else:
+            self.restart()
+
+    def restart(self) -> None:
+        assert self.process is not None
+        if self.restarts >= self.max_restarts:
+            self.retire(f"{self.unhealthy_reason}; gave up after {self.restarts} restarts")
+            return
+        reason = self.unhealthy_reason
+        self.restarts += 1
+        with PRINT_LOCK:
+            print(f"Restarting expanso-edge #{self.index} ({reason}), attempt {self.restarts}/{self.max_restarts}", file=sys.stderr)
+        self.process.stop()
+        data_dir = Path(tempfile.mkdtemp(prefix=f"expanso-edge-data-{self.index}-r{self.restarts}-"))
+        self.process = EdgeProcess(api_url=self.api_url, data_dir=data_dir, log_file=data_dir / "edge.log")
+        self.data_dirs.append(data_dir)
+        try:
+            self.process.start()
+        except (OSError, RuntimeError) as exc:
+            self.retire(f"restart failed: {exc}")
+            return
+        if self.client.wait_ready(timeout=30):
+            self.close_circuit()
+        # Otherwise the circuit stays open and the next pass tries again.
+
+    def close_circuit(self) -> None:
+        with self._lock:
+            self.healthy = True
+            self.unhealthy_reason = None
+            self.consecutive_transient = 0
+            self.failed_probes = 0
+            self.generation += 1
+            self._recovered.notify_all()
+
+    def recovered_since(self, generation: int, timeout: float = 90.0) -> bool:
+        """Whether the Edge was restarted or came back since ``generation``, so failed work is worth replaying."""
+        if self.healthy and self.generation == generation:
+            if self.alive() and self.client.probe():
+                return False
+            self.mark_unhealthy("edge process exited" if not self.alive() else "API stopped answering")
+        deadline = time.time() + timeout
+        with self._lock:
+            while self.generation == generation and not self.retired:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._recovered.wait(remaining)
+            if self.generation != generation:
+                self.replays += 1
+                return True
+            return False
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "index": self.index,
+                "api_url": self.api_url,
+                "managed": self.process is not None,
+                "healthy": self.healthy,
+                "reason": self.unhealthy_reason,
+                "tests_run": self.tests_run,
+                "failures": self.failures,
+                "restarts": self.restarts,
+                "replayed_groups": self.replays,
+                "failed_deletes": self.failed_deletes,
+                "transport": "api" if self.client.native else "cli",
+            }
+
+
+class EdgePool:
+    """Edge runtimes that skills are spread across, watched by a supervisor thread."""
+
+    # Seconds between supervisor passes.
+    SUPERVISE_INTERVAL = 2.0
+
+    def __init__(self, count: int = 1, api_urls: list[str] | None = None, pool_size: int = 10, max_restarts: int = 3) -> None:
+        self.count = len(api_urls) if api_urls else count
+        self.api_urls = api_urls or []
+        self.pool_size = pool_size
+        self.max_restarts = max_restarts
+        self.edges: list[EdgeHandle] = []
+        self._stopping = threading.Event()
+        self._supervisor: threading.Thread | None = None
+
+    def start(self) -> bool:
+        if self.api_urls:
+            self.edges = [EdgeHandle(index, url, pool_size=self.pool_size) for index, url in enumerate(self.api_urls)]
+            # Probe once so deploys know whether the native job route is served.
+            for edge in self.edges:
+                if not edge.client.wait_ready(timeout=5.0):
+                    print(f"Warning: Edge API at {edge.api_url} is not answering yet", file=sys.stderr)
+            self.supervise()
+            return True
+
+        for index in range(self.count):
+            api_url = f"http://127.0.0.1:{allocate_port()}"
+            data_dir = Path(tempfile.mkdtemp(prefix=f"expanso-edge-data-{index}-"))
+            process = EdgeProcess(api_url=api_url, data_dir=data_dir, log_file=data_dir / "edge.log")
+            process.start()
+            self.edges.append(EdgeHandle(index, api_url, process, pool_size=self.pool_size, max_restarts=self.max_restarts))
+
+        for edge in self.edges:
+            if not edge.client.wait_ready():
+                edge.retire(f"local API did not come up (log: {edge.process.log_file})")  # type: ignore[union-attr]
+                print(f"Failed to start expanso-edge #{edge.index} at {edge.api_url}", file=sys.stderr)
+        started = any(edge.healthy for edge in self.edges)
+        if started:
+            self.supervise()
+        return started
+
+    def supervise(self) -> None:
+        def loop() -> None:
+            while not self._stopping.wait(self.SUPERVISE_INTERVAL):
+                for edge in self.edges:
+                    if self._stopping.is_set():
+                        return
+                    try:
+                        edge.supervise()
+                    except Exception as exc:  # keep supervising the other Edges and later passes
+                        with PRINT_LOCK:
+                            print(f"Warning: supervisor pass for Edge #{edge.index} failed: {exc!r}", file=sys.stderr)
+
+        self._supervisor = threading.Thread(target=loop, name="edge-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def assign(self, index: int) -> EdgeHandle:
+        return self.route(self.edges[index % len(self.edges)])
+
+    def route(self, edge: EdgeHandle, timeout: float = 90.0) -> EdgeHandle:
+        """Return ``edge`` if its circuit is closed, else the least-loaded healthy one (waiting up to ``timeout``)."""
+        if edge.healthy and edge.alive():
+            return edge
+        if edge.healthy:
+            edge.mark_unhealthy("edge process exited")
+        deadline = time.time() + timeout
+        while True:
+            healthy = [e for e in self.edges if e.healthy]
+            if healthy:
+                return min(healthy, key=lambda e: e.tests_run)
+            if all(e.retired for e in self.edges) or time.time() >= deadline:
+                return edge
+            time.sleep(0.1)
+
+    def stop_supervising(self) -> None:
+        self._stopping.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=self.SUPERVISE_INTERVAL + 35)
+
+    def stop(self) -> None:
+        self.stop_supervising()
+        for edge in self.edges:
+            edge.client.close()
+            if edge.process:
+                edge.process.stop()
+                # A retired Edge keeps its data dirs: their edge.log says why it failed.
+                if not edge.retired:
+                    for data_dir in edge.data_dirs:
+                        shutil.rmtree(data_dir, ignore_errors=True)
+
+    def summary(self) -> list[dict[str, Any]]:
+        return [edge.summary() for edge in self.edges]
+
+
+def find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def allocate_port() -> int:
+    """Return a free port that no other worker in this run has been handed."""
+    with PORT_LOCK:
+        while True:
+            port = find_free_port()
+            if port not in RESERVED_PORTS:
+                RESERVED_PORTS.add(port)
+                return port
+
+
+def is_transient_failure(entry: dict[str, Any]) -> bool:
+    reason = (entry.get("reason") or "").lower()
+    if API_UNAVAILABLE.lower() in reason:
+        return True
+    if "http server did not start" in reason:
+        return True
+    if "request error" in reason:
+        return True
+    if "timeout" in reason:
+        return True
+    if "connection" in reason:
+        return True
+    return False
+
@@ -0,0 +1,232 @@
+"""--multiplex: serve every skill's MCP processors from one generated Edge job."""
+
+from __future__ import annotations
+
+import copy
+import json
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+from .cache import hash_bytes
+from .edge import EdgeHandle, EdgePool
+from .runner import (
+    PreparedPipeline,
+    RunContext,
+    SCRATCH,
+    SkillLog,
+    TRACER,
+    Worker,
+    dedupe_cases,
+    delete_job,
+    deploy_pipeline,
+    execute_pending_group,
+    fan_out,
+    finish_skill,
+    group_by_pipeline,
+    merge_group_timings,
+    needs_replay,
+    plan_skill,
+    probe_method,
+    record_group,
+    rerun_group,
+    rerun_rounds,
+    run_on_worker,
+    send_request,
+    test_duration_ms,
+)
+
+
+# Metadata key the http_server input puts the /mux/<route> path parameter in.
+MUX_ROUTE_META = "harness_route"
+MUX_PATH_PREFIX = "/mux"
+MUX_TIMEOUT = "60s"
+
+
+def multiplex_misfit(prepared: PreparedPipeline) -> str | None:
+    """Why ``prepared`` can't become a route of the multiplexed job, or ``None`` if it can."""
+    spec = prepared.spec
+    extra = sorted(set(spec) - {"type", "config", "selector"})
+    if extra:
+        return f"uses {', '.join(extra)}"
+    config = spec["config"]
+    extra = sorted(set(config) - {"input", "pipeline", "output"})
+    if extra:
+        return f"uses config {', '.join(extra)}"
+    extra = sorted(set(config["input"]["http_server"]) - {"path", "allowed_verbs", "timeout"})
+    if len(config["input"]) != 1 or extra:
+        return "custom http_server input"
+    pipeline = config.get("pipeline") or {}
+    if set(pipeline) - {"processors"} or not isinstance(pipeline.get("processors", []), list):
+        return "pipeline settings beyond processors"
+    if config.get("output") != {"sync_response": {}}:
+        return "custom output"
+    return None
+
+
+def multiplex_pipeline(routes: dict[str, PreparedPipeline]) -> PreparedPipeline:
+    """One pipeline job whose switch sends ``/mux/<route>`` requests through that route's processors."""
+    verbs: list[str] = []
+    cases = []
+    for route, prepared in routes.items():
+        http_server = prepared.spec["config"]["input"]["http_server"]
+        allowed = http_server.get("allowed_verbs", ["POST"])
+        verbs.extend(verb for verb in allowed if verb not in verbs)
+        cases.append({
+            "check": f'meta("{MUX_ROUTE_META}") == "{route}"',
+            "processors": copy.deepcopy((prepared.spec["config"].get("pipeline") or {}).get("processors", [])),
+        })
+    spec = {
+        "type": "pipeline",
+        "config": {
+            "input": {"http_server": {"path": f"{MUX_PATH_PREFIX}/{{{MUX_ROUTE_META}}}", "allowed_verbs": verbs, "timeout": MUX_TIMEOUT}},
+            "pipeline": {"processors": [{"switch": cases}]},
+            "output": {"sync_response": {}},
+        },
+    }
+    first = next(iter(routes))
+    return PreparedPipeline(
+        spec=spec,
+        path=f"{MUX_PATH_PREFIX}/{first}",
+        method=routes[first].method,
+        probe_method=probe_method(verbs),
+        key=hash_bytes(json.dumps(spec, sort_keys=True, default=str).encode()),
+    )
+
+
+def execute_multiplexed(
+    routes: dict[str, list[dict[str, Any]]],
+    worker: Worker,
+    jobs: int,
+) -> tuple[dict[str, list[dict[str, Any]]] | None, dict[str, Any]]:
+    """Deploy one job serving every group in ``routes``; results are ``None`` if it broke, so they run alone."""
+    total = sum(len(group) for group in routes.values())
+    timings: dict[str, Any] = {"group_size": total}
+    prepared = multiplex_pipeline({route: group[0]["prepared"] for route, group in routes.items()})
+    edge = worker.edge
+    generation = edge.generation
+    deployment, failure = deploy_pipeline("multiplex", prepared, worker, timings)
+    if deployment is None:
+        return None, {"routes": len(routes), "tests": total, "error": (failure or {}).get("reason")}
+
+    cases = {route: [(ctx["payload"], ctx["expected"]) for ctx in group] for route, group in routes.items()}
+    deduped = {route: dedupe_cases(route_cases, worker.dedupe) for route, route_cases in cases.items()}
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                route: [
+                    pool.submit(
+                        send_request,
+                        replace(deployment, path=f"{MUX_PATH_PREFIX}/{route}", method=routes[route][0]["prepared"].method),
+                        payload,
+                        expected,
+                    )
+                    for payload, expected in unique
+                ]
+                for route, (unique, _) in deduped.items()
+            }
+            results = {
+                route: fan_out(cases[route], deduped[route][1], [future.result() for future in route_futures])
+                for route, route_futures in futures.items()
+            }
+    finally:
+        with TRACER.span("delete", timings, skill="multiplex", job=deployment.name):
+            delete_job(deployment.name, worker)
+
+    details = {"routes": len(routes), "tests": total, "ready_ms": deployment.ready_ms, "timings": timings}
+    if needs_replay([r for route_results in results.values() for r in route_results], edge, generation):
+        return None, dict(details, error="edge restarted during the multiplexed run")
+    for route_results in results.values():
+        for result in route_results:
+            # The job's cold start is shared by every skill; it is reported once in "multiplex".
+            result.pop("ready_ms", None)
+        merge_group_timings(route_results, timings)
+    return results, details
+
+
+def run_suite_multiplexed(
+    skills: list[Path],
+    run: RunContext,
+    edges: EdgePool,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Run every fitting MCP test group of ``skills`` as a route of one Edge job, the rest in their own jobs."""
+    args = run.args
+    workers: queue.Queue[Worker] = queue.Queue()
+    for index in range(args.jobs):
+        workers.put(Worker(
+            index=index,
+            edge=edges.assign(index),
+            temp_dir=SCRATCH.mkdtemp(f"worker-{index}-"),
+            dedupe=args.dedupe,
+        ))
+
+    planned: list[tuple[dict[str, Any], SkillLog, list[list[dict[str, Any]]]]] = []
+    for skill_dir in skills:
+        log = SkillLog(buffered=True)
+        with TRACER.span("plan", skill=skill_dir.name):
+            skill_result, pending = plan_skill(skill_dir, run, log)
+        if skill_result is None:
+            log.flush()
+            continue
+        groups = group_by_pipeline(pending) if skill_result["status"] == "unknown" else []
+        planned.append((skill_result, log, groups))
+
+    routes: dict[str, list[dict[str, Any]]] = {}
+    separate: dict[str, list[str]] = {}
+    for skill_result, _, groups in planned:
+        for group in groups:
+            prepared = group[0]["prepared"]
+            if not isinstance(prepared, PreparedPipeline):
+                continue
+            reason = multiplex_misfit(prepared)
+            if reason:
+                reasons = separate.setdefault(f"{skill_result['category']}/{skill_result['name']}", [])
+                if reason not in reasons:
+                    reasons.append(reason)
+            else:
+                routes[f"{skill_result['name']}-{prepared.key[:12]}"] = group
+
+    outcomes: dict[int, tuple[list[dict[str, Any]], EdgeHandle | None]] = {}
+    details: dict[str, Any] = {"routes": 0, "tests": 0}
+    if routes:
+        worker = workers.get()
+        worker.edge = edges.route(worker.edge)
+        with TRACER.span("group", skill="multiplex", tests=sum(len(group) for group in routes.values())):
+            route_results, details = execute_multiplexed(routes, worker, args.jobs)
+        workers.put(worker)
+        if route_results is None:
+            print(f"Multiplexed job failed ({details['error']}); running its groups in their own jobs", file=sys.stderr)
+        else:
+            for route, group in routes.items():
+                outcomes[id(group)] = (route_results[route], worker.edge)
+    details["separate"] = separate
+
+    skill_results: list[dict[str, Any]] = []
+    rerun_candidates: list[dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        remaining = [group for _, _, groups in planned for group in groups if id(group) not in outcomes]
+        futures = {id(group): pool.submit(run_on_worker, workers, edges, execute_pending_group, group) for group in remaining}
+        for group_id, future in futures.items():
+            outcomes[group_id] = future.result()
+
+        for skill_result, log, groups in planned:
+            for group in groups:
+                results, edge = outcomes[id(group)]
+                record_group(group, results, skill_result, edge, run, log, rerun_candidates)
+            if groups:
+                finish_skill(skill_result, log)
+                # Skills share the job and run interleaved; their own tests' time is what history needs.
+                durations = [test_duration_ms(ctx["test_entry"].get("timings")) for group in groups for ctx in group]
+                skill_result["duration_ms"] = round(sum(d for d in durations if d is not None), 1)
+            log.flush()
+            skill_results.append(skill_result)
+
+        for groups in rerun_rounds(rerun_candidates, run):
+            for future in [pool.submit(run_on_worker, workers, edges, rerun_group, group, run) for group in groups]:
+                future.result()
+
+    return skill_results, details
+
@@ -0,0 +1,2315 @@
+"""Planning and running skill tests against Edge: payloads, checks, fingerprints and the suite runners."""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import asyncio
+import atexit
+import contextlib
+import contextvars
+import copy
+import functools
+import hashlib
+import json
+import os
+import queue
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import requests
+import yaml
+
+try:
+    import httpx
+except ImportError:  # --async falls back to the threaded runner
+    httpx = None  # type: ignore[assignment]
+
+from .cache import BlobStore, Journal, ResultCache, cache_key, externalize_output, full_output, hash_bytes
+from .edge import (
+    API_UNAVAILABLE,
+    CLI_MISSING,
+    EdgeHandle,
+    EdgePool,
+    LEAK_THRESHOLDS,
+    PRINT_LOCK,
+    RESOURCE_KEYS,
+    allocate_port,
+    api_outcome,
+    find_expanso_edge,
+    is_transient_failure,
+    write_job_file,
+)
+from .mocks import OpenAIStandIn, apply_openai_mocks
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# Overridable so scripts/bench-harness.py can point the harness at a synthetic tree.
+SKILLS_DIR = Path(os.environ.get("EXPANSO_SKILLS_DIR") or REPO_ROOT / "skills")
+
+
+# Names the trace lane (worker or async task) that spans are drawn on.
+TRACE_LANE: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_lane", default=None)
+
+
+class DupKeyLoader(yaml.SafeLoader):
+    """YAML loader that merges duplicate keys into lists for known fields."""
+
+    def construct_mapping(self, node, deep=False):  # type: ignore[override]
+        mapping = {}
+        for key_node, value_node in node.value:
+            key = self.construct_object(key_node, deep=deep)
+            value = self.construct_object(value_node, deep=deep)
+            if key in mapping:
+                if key in {"has_field", "metadata_has", "extracted_contains", "analysis_has", "command_contains"}:
+                    if not isinstance(mapping[key], list):
+                        mapping[key] = [mapping[key]]
+                    mapping[key].append(value)
+                else:
+                    # Preserve duplicates as list for visibility
+                    if not isinstance(mapping[key], list):
+                        mapping[key] = [mapping[key]]
+                    mapping[key].append(value)
+            else:
+                mapping[key] = value
+        return mapping
+
+
+@dataclass
+class Worker:
+    """Execution slot for one concurrent skill run, with its own temp dir, job-name prefix and Edge."""
+
+    index: int
+    edge: EdgeHandle
+    temp_dir: Path
+    # From --no-dedupe: send every test's request even when payloads repeat.
+    dedupe: bool = True
+
+    @property
+    def api_url(self) -> str:
+        return self.edge.api_url
+
+    def job_name(self, skill_name: str, port: int) -> str:
+        return f"{skill_name}-mcp-test-w{self.index}-{port}"
+
+
+class TestBudget:
+    def __init__(self, limit: int | None) -> None:
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return bool(self.limit) and self.used >= self.limit  # type: ignore[operator]
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.limit and self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+class Tracer:
+    """Times harness phases into per-test ``timings`` and, when enabled, a Chrome trace."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self.lanes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _tid(self) -> int:
+        lane = TRACE_LANE.get() or threading.current_thread().name
+        with self._lock:
+            if lane not in self.lanes:
+                self.lanes[lane] = len(self.lanes) + 1
+                self.events.append({
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": self.lanes[lane],
+                    "args": {"name": lane},
+                })
+            return self.lanes[lane]
+
+    @contextlib.contextmanager
+    def span(self, name: str, timings: dict[str, Any] | None = None, cat: str = "harness", **trace_args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if timings is not None:
+                key = f"{name}_ms"
+                timings[key] = round(timings.get(key, 0.0) + elapsed * 1000, 1)
+            if self.enabled:
+                event = {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": round((start - self.origin) * 1e6, 1),
+                    "dur": round(elapsed * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": self._tid(),
+                    "args": trace_args,
+                }
+                with self._lock:
+                    self.events.append(event)
+
+    def write(self, path: Path) -> None:
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+TRACER = Tracer()
+
+
+class SkillLog:
+    """Progress output for one skill, buffered when workers run in parallel."""
+
+    def __init__(self, buffered: bool) -> None:
+        self.buffered = buffered
+        self.lines: list[str] = []
+
+    def print(self, *parts: Any) -> None:
+        line = " ".join(str(p) for p in parts)
+        if self.buffered:
+            self.lines.append(line)
+        else:
+            with PRINT_LOCK:
+                print(line)
+
+    def flush(self) -> None:
+        if not self.lines:
+            return
+        with PRINT_LOCK:
+            print("\n".join(self.lines))
+        self.lines = []
+
+
+@dataclass
+class RunContext:
+    args: argparse.Namespace
+    cache: ResultCache
+    budget: TestBudget
+    # From --since: skill dir -> test names to run (None runs all of them).
+    selection: dict[Path, set[str] | None] | None = None
+    journal: Journal | None = None
+    blobs: BlobStore | None = None
+    # From the cache's history table: test key -> [(status, duration_ms)], oldest first.
+    history: dict[str, list[tuple[str, float | None]]] | None = None
+    # invocation_key -> (output_ref, status_code) of passing responses this run.
+    invocations: dict[str, tuple[str, int | None]] = field(default_factory=dict)
+    # From --openai-stand-in: OpenAI processors are pointed here instead of mocked.
+    stand_in: OpenAIStandIn | None = None
+
+    def schedule(self, skills: list[Path]) -> list[Path]:
+        return schedule_skills(skills, self.history) if self.history else skills
+
+    def settle(self, category: str, skill_name: str, test_name: str, entry: dict[str, Any]) -> None:
+        """Journal a test entry that just got a result and cache it if it passed."""
+        test_key = cache_key(category, skill_name, test_name)
+        if self.blobs is not None:
+            entry.pop("output_ref", None)
+            externalize_output(entry, self.blobs, self.args.inline_output_bytes)
+        self.cache.put(test_key, entry)
+        self.cache.record_history(test_key, entry.get("status") or "unknown", test_duration_ms(entry.get("timings")))
+        if self.journal is not None:
+            self.journal.record(test_key, entry)
+
+    def remember_invocation(self, ctx: dict[str, Any]) -> None:
+        entry = ctx["test_entry"]
+        if not self.args.dedupe or entry.get("status") != "passed" or not entry.get("output_ref"):
+            return
+        if isinstance(ctx["prepared"], PreparedPipeline):
+            self.invocations.setdefault(invocation_key(ctx["prepared"], ctx["payload"]), (entry["output_ref"], entry.get("status_code")))
+
+    def passed_invocation(self, ctx: dict[str, Any]) -> dict[str, Any] | None:
+        if not isinstance(ctx["prepared"], PreparedPipeline) or self.blobs is None:
+            return None
+        remembered = self.invocations.get(invocation_key(ctx["prepared"], ctx["payload"]))
+        if remembered is None:
+            return None
+        output = self.blobs.get(remembered[0])
+        return None if output is None else {"status_code": remembered[1], "output": output}
+
+
+def load_yaml(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=DupKeyLoader)  # type: ignore[arg-type]
+
+
+class SpecCache:
+    """Per-run memo of parsed pipeline files (keyed by content hash) and the pipelines prepared from them."""
+
+    def __init__(self) -> None:
+        self._parsed: dict[str, Any] = {}
+        self._prepared: dict[tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: Path) -> tuple[str | None, Any]:
+        """Return ``(content hash, parsed copy)`` of ``path``; the copy is ``None`` if it can't be read or parsed."""
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None, None
+        digest = hash_bytes(data)
+        with self._lock:
+            parsed = self._parsed.get(digest, self)
+        if parsed is self:
+            try:
+                parsed = yaml.load(data, Loader=DupKeyLoader)  # type: ignore[arg-type]
+            except yaml.YAMLError:
+                parsed = None
+            with self._lock:
+                self._parsed[digest] = parsed
+        return digest, copy.deepcopy(parsed)
+
+    def digest(self, path: Path) -> str | None:
+        try:
+            return hash_bytes(path.read_bytes())
+        except OSError:
+            return None
+
+    def prepared(self, key: tuple[Any, ...]) -> Any:
+        with self._lock:
+            return self._prepared.get(key)
+
+    def remember(self, key: tuple[Any, ...], prepared: Any) -> None:
+        with self._lock:
+            self._prepared[key] = prepared
+
+
+SPEC_CACHE = SpecCache()
+
+
+class ScratchSpace:
+    """The one temp directory a run writes job files and worker scratch into; removed at exit."""
+
+    def __init__(self) -> None:
+        self.root: Path | None = None
+        self._lock = threading.Lock()
+
+    def mkdtemp(self, prefix: str) -> Path:
+        with self._lock:
+            if self.root is None:
+                self.root = Path(tempfile.mkdtemp(prefix="expanso-test-skills-"))
+                atexit.register(self.cleanup)
+        return Path(tempfile.mkdtemp(prefix=prefix, dir=self.root))
+
+    def cleanup(self) -> None:
+        if self.root is not None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root = None
+
+
+SCRATCH = ScratchSpace()
+
+
+def find_skills(names: list[str] | None) -> list[Path]:
+    skill_dirs = []
+    for category in sorted(SKILLS_DIR.iterdir()):
+        if not category.is_dir():
+            continue
+        for skill in sorted(category.iterdir()):
+            if not skill.is_dir():
+                continue
+            if not (skill / "skill.yaml").exists():
+                continue
+            if names and skill.name not in names:
+                continue
+            skill_dirs.append(skill)
+    return skill_dirs
+
+
+# Bump to invalidate every cached result on purpose.
+HARNESS_FINGERPRINT_VERSION = "1"
+
+# Entry points that turn a test into an outcome. The fingerprint covers
+# everything they reach (harness_closure) across HARNESS_FILES.
+HARNESS_CORE_ROOTS = (
+    "load_yaml",
+    "resolve_input_value",
+    "parse_env_overrides",
+    "build_payload",
+    "prepare_pipeline",
+    "execute_group",
+    "async_execute_group",
+    "execute_multiplexed",
+    "check_expectations",
+)
+# The same for pipeline-cli variants (--cli), run through stdin and stdout.
+HARNESS_CLI_ROOTS = (
+    "load_yaml",
+    "resolve_input_value",
+    "cli_env",
+    "prepare_cli_pipeline",
+    "execute_cli_group",
+    "check_expectations",
+)
+# Mock rewriting, only relevant when a skill's pipeline uses the processor.
+HARNESS_MOCK_ROOTS = {
+    "openai_chat_completion": ("apply_openai_mocks", "mock_content_for_test"),
+    "openai_embeddings": ("apply_openai_mocks",),
+    "openai_speech": ("apply_openai_mocks",),
+    "openai_image_generation": ("apply_openai_mocks",),
+}
+# Hashed as a mapping; the checks behind it count only for tests that use them.
+HARNESS_LEAVES = frozenset({"EXPECTATION_CHECKS"})
+
+# Where components are looked up by name: the entry script and every harness module.
+HARNESS_DIR = Path("scripts/skilltest")
+HARNESS_FILES = ("scripts/test-skills.py", *sorted(f"{HARNESS_DIR.as_posix()}/{path.name}" for path in Path(__file__).parent.glob("*.py")))
+# Attribute names too generic to resolve to a harness class's method.
+COMMON_ATTRIBUTES = frozenset(name for kind in (object, dict, list, set, str, bytes, Path) for name in dir(kind))
+
+
+@functools.lru_cache(maxsize=None)
+def component_hash(name: str) -> str:
+    return hash_bytes(own_sources()[name].encode())
+
+
+@functools.lru_cache(maxsize=1)
+def own_sources() -> dict[str, str]:
+    return harness_sources((REPO_ROOT / path).read_text() for path in HARNESS_FILES)
+
+
+def harness_sources(texts: Iterable[str | None]) -> dict[str, str]:
+    sources: dict[str, str] = {}
+    for text in texts:
+        if text is not None:
+            sources.update(top_level_sources(text))
+    return sources
+
+
+@functools.lru_cache(maxsize=1)
+def harness_references() -> dict[str, frozenset[str]]:
+    definitions: dict[str, ast.AST] = {}
+    for path in HARNESS_FILES:
+        definitions.update(top_level_definitions((REPO_ROOT / path).read_text()))
+    return definition_references(definitions)
+
+
+def definition_references(definitions: dict[str, ast.AST]) -> dict[str, frozenset[str]]:
+    """Top-level names each definition uses, by name or by calling a method only one harness class has."""
+    methods: dict[str, set[str]] = {}
+    for name, node in definitions.items():
+        if isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name not in COMMON_ATTRIBUTES:
+                    methods.setdefault(item.name, set()).add(name)
+    references = {}
+    for name, node in definitions.items():
+        used: set[str] = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ast.Name) and current.id in definitions:
+                used.add(current.id)
+            elif isinstance(current, ast.Attribute) and len(methods.get(current.attr, ())) == 1:
+                # Only a method name one class defines says which class is called.
+                used.update(methods[current.attr])
+            # Annotations don't run.
+            stack.extend(
+                child
+                for field_name, value in ast.iter_fields(current)
+                if field_name not in {"annotation", "returns"}
+                for child in (value if isinstance(value, list) else [value])
+                if isinstance(child, ast.AST)
+            )
+        references[name] = frozenset(used - {name})
+    return references
+
+
+def conditional_components() -> frozenset[str]:
+    """Components that only count for tests whose pipeline or expectations use them."""
+    names = {"OpenAIStandIn", "check_error_or_empty"}
+    names.update(check.__name__ for check in EXPECTATION_CHECKS.values())
+    for roots in HARNESS_MOCK_ROOTS.values():
+        names.update(roots)
+    return frozenset(names)
+
+
+@functools.lru_cache(maxsize=None)
+def harness_closure(roots: tuple[str, ...]) -> frozenset[str]:
+    """``roots`` plus every definition they reach, not entering conditional components."""
+    references = harness_references()
+    skip = conditional_components()
+    seen: set[str] = set()
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name in seen or name not in references:
+            continue
+        seen.add(name)
+        if name not in HARNESS_LEAVES:
+            stack.extend(ref for ref in references[name] if ref not in skip)
+    return frozenset(seen)
+
+
+def harness_components(pipeline_text: str, expected: dict[str, Any], mock_openai: bool, mode: str = "mcp", stand_in: str | None = None) -> list[str]:
+    """Names of the harness definitions whose behaviour can change this test's outcome."""
+    roots = set(HARNESS_CLI_ROOTS if mode == "cli" else HARNESS_CORE_ROOTS)
+    if mock_openai:
+        for processor, components in HARNESS_MOCK_ROOTS.items():
+            if processor in pipeline_text:
+                roots.update(components)
+                if stand_in:
+                    roots.add("OpenAIStandIn")
+    if expected.get("error_or_empty"):
+        roots.add("check_error_or_empty")
+    else:
+        roots.update(check.__name__ for key, check in EXPECTATION_CHECKS.items() if key in expected)
+    return sorted(harness_closure(tuple(sorted(roots))))
+
+
+def harness_fingerprint(pipeline_text: str, expected: dict[str, Any], mock_openai: bool, mode: str = "mcp", stand_in: str | None = None) -> str:
+    """Hash only the harness code (and stand-in settings) this test depends on, so unrelated edits keep the cache."""
+    h = hashlib.sha256(f"harness-v{HARNESS_FINGERPRINT_VERSION}".encode())
+    components = harness_components(pipeline_text, expected, mock_openai, mode, stand_in)
+    for name in components:
+        h.update(f"{name}={component_hash(name)}".encode())
+    if "OpenAIStandIn" in components:
+        h.update(f"stand_in={stand_in}".encode())
+    return h.hexdigest()
+
+
+def compute_test_fingerprint(
+    skill_dir: Path,
+    test: dict[str, Any],
+    input_value: str,
+    env_overrides: dict[str, Any],
+    mock_openai: bool,
+    harness_hash: str,
+    pipeline_name: str = "pipeline-mcp.yaml",
+) -> str:
+    h = hashlib.sha256()
+    for path in (
+        skill_dir / pipeline_name,
+        skill_dir / "skill.yaml",
+        skill_dir / "test" / "test.yaml",
+    ):
+        if path.exists():
+            h.update(path.read_bytes())
+    h.update(json.dumps(test, sort_keys=True, default=str).encode())
+    h.update(str(input_value).encode())
+    h.update(json.dumps(env_overrides, sort_keys=True, default=str).encode())
+    h.update(b"mock_openai=1" if mock_openai else b"mock_openai=0")
+    h.update(harness_hash.encode())
+    return h.hexdigest()
+
+
+def git(*git_args: str) -> str:
+    result = subprocess.run(
+        ["git", *git_args],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(git_args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def git_changed_paths(ref: str) -> list[str]:
+    """Paths changed between ``ref`` (via its merge base) and the working tree, untracked files included."""
+    try:
+        base = git("merge-base", ref, "HEAD").strip()
+    except RuntimeError:
+        base = ref
+    changed = git("diff", "--name-only", base).splitlines()
+    changed += git("ls-files", "--others", "--exclude-standard").splitlines()
+    return sorted({path for path in changed if path})
+
+
+def git_show(ref: str, path: str) -> str | None:
+    try:
+        return git("show", f"{ref}:{path}")
+    except RuntimeError:
+        return None
+
+
+def harness_files_at(ref: str) -> list[str]:
+    """HARNESS_FILES as of ``ref``; modules may have been added or removed since."""
+    try:
+        listed = git("ls-tree", "--name-only", ref, f"{HARNESS_DIR.as_posix()}/").splitlines()
+    except RuntimeError:
+        listed = []
+    return ["scripts/test-skills.py", *(path for path in listed if path.endswith(".py"))]
+
+
+def top_level_definitions(source: str) -> dict[str, ast.AST]:
+    """Map top-level function, class and constant names to their AST nodes."""
+    tree = ast.parse(source)
+    definitions: dict[str, ast.AST] = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions[node.name] = node
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if len(targets) == 1 and isinstance(targets[0], ast.Name):
+                definitions[targets[0].id] = node
+    return definitions
+
+
+def top_level_sources(source: str) -> dict[str, str]:
+    """Map top-level function, class and constant names to their normalized source."""
+    return {name: normalized_source(node) for name, node in top_level_definitions(source).items()}
+
+
+def normalized_source(node: ast.AST) -> str:
+    """``ast.dump`` of ``node`` without docstrings, so comments, whitespace and docs don't count."""
+    for child in ast.walk(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and ast.get_docstring(child) is not None:
+            child.body = child.body[1:] or [ast.Pass()]
+    return ast.dump(node)
+
+
+def fingerprinted_components() -> set[str]:
+    roots = set(HARNESS_CORE_ROOTS) | set(HARNESS_CLI_ROOTS) | conditional_components()
+    names = set(harness_closure(tuple(sorted(roots))))
+    names.update({
+        "HARNESS_FINGERPRINT_VERSION",
+        "HARNESS_CORE_ROOTS",
+        "HARNESS_CLI_ROOTS",
+        "HARNESS_MOCK_ROOTS",
+        "HARNESS_LEAVES",
+    })
+    return names
+
+
+def changed_tests(old_text: str | None, new_text: str) -> set[str] | None:
+    """Names of tests added or edited between two test.yaml versions (None means all)."""
+    try:
+        old = yaml.load(old_text, Loader=DupKeyLoader) if old_text else None  # type: ignore[arg-type]
+        new = yaml.load(new_text, Loader=DupKeyLoader)  # type: ignore[arg-type]
+    except yaml.YAMLError:
+        return None
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None
+    if {k: v for k, v in old.items() if k != "tests"} != {k: v for k, v in new.items() if k != "tests"}:
+        return None
+    old_tests = {str(t.get("name")): t for t in old.get("tests", []) or [] if isinstance(t, dict)}
+    return {
+        str(t.get("name"))
+        for t in new.get("tests", []) or []
+        if isinstance(t, dict) and old_tests.get(str(t.get("name"))) != t
+    }
+
+
+def tests_using_fixture(skill_dir: Path, fixture: Path) -> set[str] | None:
+    test_yaml_path = skill_dir / "test" / "test.yaml"
+    test_yaml = load_yaml(test_yaml_path) or {}
+    fixtures_dir = test_yaml.get("fixtures_dir")
+    names = set()
+    for test in test_yaml.get("tests", []) or []:
+        if not isinstance(test, dict) or "input_file" not in test:
+            continue
+        try:
+            resolved = resolve_input_path(test, test_yaml_path, fixtures_dir)
+        except Exception:
+            return None
+        if resolved == fixture.resolve():
+            names.add(str(test.get("name")))
+    return names
+
+
+@dataclass
+class ChangeSelection:
+    full_run: bool = False
+    reason: str | None = None
+    # Skill dir -> names of affected tests, or None for every test of the skill.
+    skills: dict[Path, set[str] | None] | None = None
+
+
+def select_changed(ref: str) -> ChangeSelection:
+    selected: dict[Path, set[str] | None] = {}
+
+    def add(skill_dir: Path, tests: set[str] | None) -> None:
+        if skill_dir in selected and selected[skill_dir] is None:
+            return
+        if tests is None:
+            selected[skill_dir] = None
+        else:
+            selected[skill_dir] = (selected.get(skill_dir) or set()) | tests
+
+    harness_checked = False
+    for path in git_changed_paths(ref):
+        parts = Path(path).parts
+        if parts[0] == "_template":
+            return ChangeSelection(full_run=True, reason=f"{path} changed (shared skill template)")
+        if path in HARNESS_FILES or (Path(path).parent == HARNESS_DIR and path.endswith(".py")):
+            if harness_checked:
+                continue
+            harness_checked = True
+            old_sources = [git_show(ref, harness_path) for harness_path in harness_files_at(ref)]
+            if all(source is None for source in old_sources):
+                return ChangeSelection(full_run=True, reason=f"{path} is new since {ref}")
+            old_parts = harness_sources(old_sources)
+            new_parts = own_sources()
+            changed = sorted(n for n in fingerprinted_components() if old_parts.get(n) != new_parts.get(n))
+            if changed:
+                return ChangeSelection(full_run=True, reason=f"harness logic changed: {', '.join(changed)}")
+            continue
+        if parts[0] != "skills" or len(parts) < 4:
+            continue
+
+        skill_dir = REPO_ROOT / Path(*parts[:3])
+        inner = Path(*parts[3:])
+        if not (skill_dir / "skill.yaml").exists():
+            continue
+        if inner.as_posix() in {"pipeline-mcp.yaml", "pipeline-cli.yaml", "skill.yaml"}:
+            add(skill_dir, None)
+        elif inner.as_posix() == "test/test.yaml":
+            test_yaml_path = skill_dir / "test" / "test.yaml"
+            if test_yaml_path.exists():
+                add(skill_dir, changed_tests(git_show(ref, path), test_yaml_path.read_text()))
+        elif inner.parts[0] == "test":
+            add(skill_dir, tests_using_fixture(skill_dir, REPO_ROOT / path))
+
+    return ChangeSelection(skills={k: v for k, v in selected.items() if v is None or v})
+
+
+# Readiness probes back off exponentially, in seconds.
+READY_BACKOFF_START = 0.005
+READY_BACKOFF_FACTOR = 1.5
+READY_BACKOFF_MAX = 0.25
+# A route that keeps answering 404 this long is treated as up; some servers
+# only register the handler for the allowed verbs.
+READY_NOT_FOUND_GRACE = 2.0
+
+
+def probe_method(allowed_verbs: Any) -> str:
+    """Pick an HTTP verb the route will reject without running the pipeline."""
+    allowed = {str(v).upper() for v in allowed_verbs} if isinstance(allowed_verbs, list) else {"POST"}
+    for method in ("OPTIONS", "HEAD", "PATCH", "DELETE", "PUT", "GET"):
+        if method not in allowed:
+            return method
+    return "OPTIONS"
+
+
+def wait_for_ready(url: str, method: str, timeout: float = 65.0) -> float | None:
+    """Probe ``url`` until the http_server route answers; returns the seconds waited, or None on timeout."""
+    start = time.perf_counter()
+    deadline = start + timeout
+    delay = READY_BACKOFF_START
+    first_not_found: float | None = None
+    while True:
+        now = time.perf_counter()
+        try:
+            response = requests.request(method, url, timeout=max(0.05, min(1.0, deadline - now)))
+            if response.status_code != 404:
+                return time.perf_counter() - start
+            first_not_found = first_not_found or now
+            if now - first_not_found >= READY_NOT_FOUND_GRACE:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        if time.perf_counter() + delay > deadline:
+            return None
+        time.sleep(delay)
+        delay = min(delay * READY_BACKOFF_FACTOR, READY_BACKOFF_MAX)
+
+
+def missing_credentials(skill_yaml: dict[str, Any], ignore: set[str] | None = None) -> list[str]:
+    credentials = []
+    for cred in skill_yaml.get("credentials", []) if isinstance(skill_yaml, dict) else []:
+        if isinstance(cred, dict):
+            if cred.get("required", True):
+                name = cred.get("name")
+                if name:
+                    credentials.append(name)
+    for backend in skill_yaml.get("backends", []) if isinstance(skill_yaml, dict) else []:
+        if isinstance(backend, dict):
+            for req in backend.get("requires", []) or []:
+                credentials.append(req)
+
+    credentials = sorted({c for c in credentials if c})
+    if not credentials:
+        return []
+
+    ignore = ignore or set()
+    missing = [c for c in credentials if c not in ignore and not os.environ.get(c)]
+
+    # If there is a local backend, allow tests to proceed (it may still fail).
+    has_local = any(
+        isinstance(b, dict) and b.get("type") == "local" for b in skill_yaml.get("backends", []) if isinstance(skill_yaml, dict)
+    )
+    if missing and not has_local:
+        return missing
+    return []
+
+
+def normalize_input_value(value: str, input_type: str | None) -> Any:
+    if input_type in {"object", "array"}:
+        try:
+            return json.loads(value)
+        except Exception:
+            return value
+    if input_type in {"integer", "number"}:
+        try:
+            return int(value) if input_type == "integer" else float(value)
+        except Exception:
+            return value
+    if input_type == "boolean":
+        lowered = value.strip().lower()
+        if lowered in {"true", "false"}:
+            return lowered == "true"
+        return value
+    return value
+
+
+def build_payload(
+    input_value: str,
+    skill_inputs: list[dict[str, Any]],
+    env_overrides: dict[str, Any] | None,
+) -> dict[str, Any]:
+    env_overrides = env_overrides or {}
+
+    parsed_value = None
+    parsed_is_object = False
+    if input_value.strip():
+        try:
+            parsed_value = json.loads(input_value)
+            parsed_is_object = isinstance(parsed_value, dict)
+        except Exception:
+            parsed_value = None
+
+    input_names = [i.get("name") for i in skill_inputs if isinstance(i, dict) and i.get("name")]
+    input_types = {i.get("name"): i.get("type") for i in skill_inputs if isinstance(i, dict)}
+
+    payload: dict[str, Any] = {}
+
+    if parsed_is_object:
+        payload = parsed_value  # type: ignore[assignment]
+    elif input_names:
+        primary = input_names[0]
+        payload[primary] = normalize_input_value(input_value, input_types.get(primary))
+    else:
+        payload["text"] = input_value
+
+    # Apply env overrides if they map to inputs
+    for key, value in env_overrides.items():
+        lower = key.lower()
+        match = None
+        for name in input_names:
+            if name and name.lower() == lower:
+                match = name
+                break
+        if match:
+            payload[match] = value
+
+    return payload
+
+
+def parse_env_overrides(env: dict[str, Any] | None, skill_inputs: list[dict[str, Any]]) -> dict[str, Any]:
+    if not env:
+        return {}
+    overrides = {}
+    input_names = [i.get("name") for i in skill_inputs if isinstance(i, dict) and i.get("name")]
+    for key, value in env.items():
+        if key.lower() in {"openai_api_key", "stripe_api_key", "slack_webhook", "github_token"}:
+            continue
+        if any(name and name.lower() == key.lower() for name in input_names):
+            overrides[key] = value
+        else:
+            # Map common env names to input names
+            if key.lower() == "algorithm" and "algorithm" in input_names:
+                overrides["algorithm"] = value
+            if key.lower() == "extract_fields" and "fields" in input_names:
+                overrides["fields"] = value
+            if key.lower() == "analyses" and "analyses" in input_names:
+                overrides["analyses"] = value
+            if key.lower() == "shell_type" and "shell" in input_names:
+                overrides["shell"] = value
+            if key.lower() == "language" and "language" in input_names:
+                overrides["language"] = value
+            if key.lower() == "detail_level" and "detail_level" in input_names:
+                overrides["detail_level"] = value
+            if key.lower() == "target" and "target" in input_names:
+                overrides["target"] = value
+            if key.lower() == "pii_types" and "types" in input_names:
+                overrides["types"] = value
+            if key.lower() == "secret_types" and "types" in input_names:
+                overrides["types"] = value
+    return overrides
+
+
+def check_error_or_empty(output: dict[str, Any], status_code: int) -> tuple[bool, list[str]]:
+    if status_code >= 400 or not output or ("error" in output or "message" in output):
+        return True, []
+    if isinstance(output, dict):
+        metadata = output.get("metadata")
+        if not metadata:
+            return True, []
+        if isinstance(metadata, dict) and not metadata.get("trace_id"):
+            return True, []
+    return False, ["Expected error_or_empty but got output"]
+
+
+def check_has_field(has_field: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    if has_field:
+        fields = has_field if isinstance(has_field, list) else [has_field]
+        for field in fields:
+            if field not in output:
+                errors.append(f"Missing field: {field}")
+    return errors
+
+
+def check_metadata_has(metadata_has: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    if metadata_has:
+        metadata = output.get("metadata") if isinstance(output, dict) else None
+        for key in metadata_has:
+            if not isinstance(metadata, dict) or key not in metadata:
+                errors.append(f"Missing metadata key: {key}")
+    return errors
+
+
+def check_extracted_contains(extracted_contains: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    if extracted_contains:
+        extracted = output.get("extracted", {})
+        if isinstance(extracted, str):
+            try:
+                extracted = json.loads(extracted)
+            except Exception:
+                pass
+        for key in extracted_contains:
+            if isinstance(extracted, dict):
+                if key not in extracted:
+                    errors.append(f"Missing extracted key: {key}")
+            else:
+                if key not in str(extracted):
+                    errors.append(f"Missing extracted token: {key}")
+    return errors
+
+
+def check_analysis_has(analysis_has: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    if analysis_has:
+        analysis = output.get("analysis", {})
+        for key in analysis_has:
+            if not isinstance(analysis, dict) or key not in analysis:
+                errors.append(f"Missing analysis key: {key}")
+    return errors
+
+
+def check_command_contains(command_contains: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    if command_contains:
+        command = output.get("command", "")
+        for token in command_contains:
+            if token not in str(command):
+                errors.append(f"Command missing token: {token}")
+    return errors
+
+
+def check_hash_length(hash_length: Any, output: dict[str, Any]) -> list[str]:
+    hash_value = output.get("hash", "")
+    if len(str(hash_value)) != int(hash_length):
+        return ["Hash length mismatch"]
+    return []
+
+
+def check_hash(expected_hash: Any, output: dict[str, Any]) -> list[str]:
+    return ["Hash mismatch"] if output.get("hash") != expected_hash else []
+
+
+def check_algorithm(algorithm: Any, output: dict[str, Any]) -> list[str]:
+    return ["Algorithm mismatch"] if output.get("algorithm") != algorithm else []
+
+
+def check_has_pii(has_pii: Any, output: dict[str, Any]) -> list[str]:
+    return ["has_pii mismatch"] if output.get("has_pii") != has_pii else []
+
+
+def check_has_secrets(has_secrets: Any, output: dict[str, Any]) -> list[str]:
+    return ["has_secrets mismatch"] if output.get("has_secrets") != has_secrets else []
+
+
+def check_findings_length(findings_length: Any, output: dict[str, Any]) -> list[str]:
+    findings = output.get("findings", [])
+    if not isinstance(findings, list) or len(findings) != findings_length:
+        return ["findings_length mismatch"]
+    return []
+
+
+def check_summary_contains_bullets(_: Any, output: dict[str, Any]) -> list[str]:
+    summary = output.get("summary", "")
+    if not any(bullet in summary for bullet in ["\n-", "\n*", "\n•", "\n1."]):
+        return ["summary does not contain bullets"]
+    return []
+
+
+def check_min_length(min_length: Any, output: dict[str, Any]) -> list[str]:
+    target = output.get("summary") or output.get("explanation") or ""
+    return ["min_length not satisfied"] if len(str(target)) < int(min_length) else []
+
+
+def check_max_length(max_length: Any, output: dict[str, Any]) -> list[str]:
+    target = output.get("summary") or output.get("explanation") or ""
+    return ["max_length exceeded"] if len(str(target)) > int(max_length) else []
+
+
+def check_explanation_contains(tokens: Any, output: dict[str, Any]) -> list[str]:
+    errors = []
+    explanation = output.get("explanation", "")
+    for token in tokens:
+        if token not in str(explanation):
+            errors.append(f"explanation missing token: {token}")
+    return errors
+
+
+# Checks run in this order; each one only looks at its own `expected` key.
+EXPECTATION_CHECKS = {
+    "has_field": check_has_field,
+    "metadata_has": check_metadata_has,
+    "extracted_contains": check_extracted_contains,
+    "analysis_has": check_analysis_has,
+    "command_contains": check_command_contains,
+    "hash_length": check_hash_length,
+    "hash": check_hash,
+    "algorithm": check_algorithm,
+    "has_pii": check_has_pii,
+    "has_secrets": check_has_secrets,
+    "findings_length": check_findings_length,
+    "summary_contains_bullets": check_summary_contains_bullets,
+    "min_length": check_min_length,
+    "max_length": check_max_length,
+    "explanation_contains": check_explanation_contains,
+}
+
+
+def check_expectations(expected: dict[str, Any], output: dict[str, Any], status_code: int) -> tuple[bool, list[str]]:
+    if expected.get("error_or_empty"):
+        return check_error_or_empty(output, status_code)
+
+    errors: list[str] = []
+    for key, check in EXPECTATION_CHECKS.items():
+        if key in expected:
+            errors.extend(check(expected[key], output))
+    return len(errors) == 0, errors
+
+
+def failure_signature(entry: dict[str, Any]) -> str:
+    payload = {
+        "reason": entry.get("reason"),
+        "errors": entry.get("errors") or [],
+        "status_code": entry.get("status_code"),
+    }
+    return json.dumps(payload, sort_keys=True, default=str)
+
+
+def is_permanent_failure(entry: dict[str, Any]) -> bool:
+    history = entry.get("history") or []
+    if len(history) < 2:
+        return False
+    last_sig = failure_signature(history[-1])
+    prev_sig = failure_signature(history[-2])
+    return last_sig == prev_sig
+
+
+def is_settled(entry: dict[str, Any], args: argparse.Namespace) -> bool:
+    """Whether a recorded entry is final, i.e. no rerun would follow it."""
+    if entry.get("status") != "failed":
+        return entry.get("status") == "passed"
+    return (
+        not args.rerun_failed
+        or bool(entry.get("permanent_failure"))
+        or entry.get("attempts", 1) >= args.max_reruns
+    )
+
+
+def record_attempt(entry: dict[str, Any], result: dict[str, Any]) -> None:
+    history = entry.setdefault("history", [])
+    history.append({
+        "status": result.get("status"),
+        "reason": result.get("reason"),
+        "errors": result.get("errors"),
+        "status_code": result.get("status_code"),
+    })
+    # Only set when this attempt shared another test's response.
+    entry.pop("deduplicated", None)
+    entry.update(result)
+    entry["attempts"] = len(history)
+    if entry.get("status") == "failed" and is_permanent_failure(entry):
+        entry["permanent_failure"] = True
+
+
+def failed_result(reason: str) -> dict[str, Any]:
+    return {
+        "status": "failed",
+        "reason": reason,
+        "errors": [],
+        "status_code": 0,
+        "output": {},
+    }
+
+
+@dataclass
+class PreparedPipeline:
+    """A pipeline-mcp spec after mocking, before it gets a port and job name."""
+
+    spec: dict[str, Any]
+    path: str
+    method: str
+    probe_method: str
+    key: str
+
+
+@dataclass
+class Deployment:
+    name: str
+    port: int
+    path: str
+    method: str
+    ready_ms: float = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}{self.path}"
+
+
+def prepare_pipeline(
+    skill_name: str,
+    pipeline_mcp_path: Path,
+    input_value: str,
+    expected: dict[str, Any],
+    mock_openai: bool,
+    timings: dict[str, Any] | None = None,
+    stand_in: OpenAIStandIn | None = None,
+) -> tuple[PreparedPipeline | None, dict[str, Any] | None]:
+    """Load and mock the MCP pipeline for one test, or return a failure result if it can never run here."""
+    digest = SPEC_CACHE.digest(pipeline_mcp_path)
+    # Mocked responses depend on the test, so mocked specs are memoized per mock input.
+    memo_key = (digest, mock_openai, stand_in is not None) + ((skill_name, str(input_value), json.dumps(expected, sort_keys=True, default=str)) if mock_openai else ())
+    cached = SPEC_CACHE.prepared(memo_key)
+    if cached is not None:
+        return cached, None
+
+    with TRACER.span("parse", timings, skill=skill_name):
+        _, pipeline_spec = SPEC_CACHE.load(pipeline_mcp_path)
+    if not pipeline_spec:
+        return None, failed_result("failed to parse pipeline-mcp.yaml")
+
+    config = pipeline_spec.setdefault("config", {})
+    input_cfg = config.get("input", {})
+    http_server = input_cfg.get("http_server") if isinstance(input_cfg, dict) else None
+    if not isinstance(http_server, dict):
+        return None, failed_result("pipeline-mcp has no http_server input")
+
+    http_server.pop("address", None)
+    config.pop("http", None)
+    path = http_server.get("path", "/")
+    allowed = http_server.get("allowed_verbs", ["POST"])
+    method = allowed[0] if isinstance(allowed, list) and allowed else "POST"
+
+    if mock_openai:
+        processors = config.get("pipeline", {}).get("processors", [])
+        if isinstance(processors, list):
+            with TRACER.span("mock", timings, skill=skill_name):
+                apply_openai_mocks(processors, skill_name, expected, str(input_value), stand_in)
+
+    pipeline_spec.pop("name", None)
+    key = hash_bytes(json.dumps(pipeline_spec, sort_keys=True, default=str).encode())
+    prepared = PreparedPipeline(
+        spec=pipeline_spec,
+        path=path,
+        method=method,
+        probe_method=probe_method(allowed),
+        key=key,
+    )
+    SPEC_CACHE.remember(memo_key, prepared)
+    return prepared, None
+
+
+def delete_job(name: str, worker: Worker) -> None:
+    worker.edge.record_delete(name, *worker.edge.client.delete(name))
+
+
+def materialize_pipeline(
+    skill_name: str,
+    prepared: PreparedPipeline,
+    worker: Worker,
+) -> tuple[Deployment, dict[str, Any]]:
+    """Give a prepared spec its own port and job name, copying only the dicts on the way there."""
+    port = allocate_port()
+    name = worker.job_name(skill_name, port)
+    config = prepared.spec["config"]
+    http_server = {**config["input"]["http_server"], "address": f"127.0.0.1:{port}"}
+    pipeline_spec = {**prepared.spec, "name": name, "config": {**config, "input": {**config["input"], "http_server": http_server}}}
+    return Deployment(name=name, port=port, path=prepared.path, method=prepared.method), pipeline_spec
+
+
+def deploy_pipeline(
+    skill_name: str,
+    prepared: PreparedPipeline,
+    worker: Worker,
+    timings: dict[str, Any] | None = None,
+) -> tuple[Deployment | None, dict[str, Any] | None]:
+    deployment, pipeline_spec = materialize_pipeline(skill_name, prepared, worker)
+    name = deployment.name
+    started = time.perf_counter()
+    with TRACER.span("deploy", timings, skill=skill_name, job=name):
+        ok, error = worker.edge.client.deploy(pipeline_spec, worker.temp_dir)
+    if not ok:
+        return None, failed_result(f"job deploy failed: {error}")
+
+    with TRACER.span("wait", timings, skill=skill_name, job=name):
+        ready = wait_for_ready(deployment.url, prepared.probe_method)
+    if ready is None:
+        with TRACER.span("delete", timings, skill=skill_name, job=name):
+            delete_job(name, worker)
+        return None, failed_result("http server did not start")
+
+    deployment.ready_ms = round((time.perf_counter() - started) * 1000, 1)
+    return deployment, None
+
+
+def send_request(deployment: Deployment, payload: dict[str, Any], expected: dict[str, Any]) -> dict[str, Any]:
+    status_code = 0
+    output: dict[str, Any] = {}
+    timings: dict[str, Any] = {}
+    try:
+        with TRACER.span("request", timings, job=deployment.name):
+            response = requests.request(deployment.method, deployment.url, json=payload, timeout=30)
+            status_code = response.status_code
+            if response.text:
+                output = response.json()
+    except Exception as exc:
+        # The job did come up, so its cold start still counts.
+        return dict(failed_result(f"request error: {exc}"), timings=timings, ready_ms=deployment.ready_ms)
+
+    return dict(evaluate_response(deployment, expected, output, status_code), timings=timings)
+
+
+def evaluate_response(
+    deployment: Deployment,
+    expected: dict[str, Any],
+    output: dict[str, Any],
+    status_code: int,
+) -> dict[str, Any]:
+    ok, errors = check_expectations(expected, output, status_code)
+    return {
+        "status": "passed" if ok else "failed",
+        "errors": errors,
+        "status_code": status_code,
+        "output": output,
+        "ready_ms": deployment.ready_ms,
+    }
+
+
+def invocation_key(prepared: PreparedPipeline, payload: Any) -> str:
+    """Identity of one request: the effective spec (mocks included) plus the payload sent."""
+    return hash_bytes(prepared.key.encode(), json.dumps(payload, sort_keys=True, default=str).encode())
+
+
+def dedupe_cases(cases: list[tuple[dict[str, Any], dict[str, Any]]], enabled: bool = True) -> tuple[list[tuple[dict[str, Any], dict[str, Any]]], list[int]]:
+    """Collapse cases that send the same payload; returns the cases to send and each case's sent index."""
+    if not enabled:
+        return cases, list(range(len(cases)))
+    first: dict[str, int] = {}
+    unique: list[tuple[dict[str, Any], dict[str, Any]]] = []
+    slots = []
+    for payload, expected in cases:
+        key = json.dumps(payload, sort_keys=True, default=str)
+        if key not in first:
+            first[key] = len(unique)
+            unique.append((payload, expected))
+        slots.append(first[key])
+    return unique, slots
+
+
+def reevaluate(result: dict[str, Any], expected: dict[str, Any]) -> dict[str, Any]:
+    """Judge the response behind ``result`` against another test's ``expected``."""
+    if result.get("reason"):
+        # No usable response (transport error, failed deploy): share the failure as is.
+        return {key: value for key, value in result.items() if key != "timings"}
+    ok, errors = check_expectations(expected, result["output"], result["status_code"])
+    shared = {
+        "status": "passed" if ok else "failed",
+        "errors": errors,
+        "status_code": result["status_code"],
+        "output": result["output"],
+        "deduplicated": True,
+    }
+    if "ready_ms" in result:
+        shared["ready_ms"] = result["ready_ms"]
+    return shared
+
+
+def fan_out(cases: list[tuple[dict[str, Any], dict[str, Any]]], slots: list[int], sent: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    results = []
+    claimed: set[int] = set()
+    for (_, expected), slot in zip(cases, slots):
+        if slot in claimed:
+            results.append(reevaluate(sent[slot], expected))
+        else:
+            claimed.add(slot)
+            results.append(sent[slot])
+    return results
+
+
+def execute_group(
+    skill_name: str,
+    prepared: PreparedPipeline,
+    cases: list[tuple[dict[str, Any], dict[str, Any]]],
+    worker: Worker,
+) -> list[dict[str, Any]]:
+    """Deploy ``prepared`` once and send every ``(payload, expected)`` case to it."""
+    timings: dict[str, Any] = {"group_size": len(cases)}
+    deployment, failure = deploy_pipeline(skill_name, prepared, worker, timings)
+    if deployment is None:
+        return [dict(failure or {}, timings=dict(timings)) for _ in cases]
+
+    unique, slots = dedupe_cases(cases, worker.dedupe)
+    try:
+        results = fan_out(cases, slots, [send_request(deployment, payload, expected) for payload, expected in unique])
+    finally:
+        with TRACER.span("delete", timings, skill=skill_name, job=deployment.name):
+            delete_job(deployment.name, worker)
+    return merge_group_timings(results, timings)
+
+
+def merge_group_timings(results: list[dict[str, Any]], timings: dict[str, Any]) -> list[dict[str, Any]]:
+    for result in results:
+        result["timings"] = {**timings, **result.get("timings", {})}
+    return results
+
+
+def merge_group_resources(results: list[dict[str, Any]], usage: dict[str, Any]) -> None:
+    if usage:
+        for result in results:
+            result["resources"] = dict(usage)
+
+
+async def async_run_cli(command: list[str] | None) -> tuple[bool, str]:
+    if command is None:
+        return False, CLI_MISSING
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as exc:
+        return False, f"expanso-cli failed: {exc}"
+    _, stderr = await process.communicate()
+    return process.returncode == 0, stderr.decode(errors="replace").strip()
+
+
+async def async_deploy_job(http: Any, edge: EdgeHandle, spec: dict[str, Any], temp_dir: Path) -> tuple[bool, str]:
+    """Async counterpart of ``EdgeClient.deploy``; reuses its native/CLI decision."""
+    client = edge.client
+    if client.native is not False:
+        try:
+            response = await http.post(
+                client.jobs_url,
+                content=json.dumps(spec, default=str),
+                headers={"Content-Type": "application/json"},
+                timeout=30,
+            )
+        except httpx.HTTPError as exc:
+            return False, f"{API_UNAVAILABLE}: {exc}"
+        return api_outcome(response.status_code, response.text)
+
+    temp_job = write_job_file(spec, temp_dir)
+    try:
+        return await async_run_cli(client.cli_command("job", "deploy", str(temp_job)))
+    finally:
+        temp_job.unlink(missing_ok=True)
+
+
+async def async_delete_job(http: Any, edge: EdgeHandle, name: str) -> None:
+    client = edge.client
+    if client.native is not False:
+        try:
+            response = await http.delete(f"{client.jobs_url}/{name}", params={"force": "true"}, timeout=30)
+            outcome = api_outcome(response.status_code, response.text)
+        except httpx.HTTPError as exc:
+            outcome = False, f"{API_UNAVAILABLE}: {exc}"
+    else:
+        outcome = await async_run_cli(client.cli_command("job", "delete", name, "--yes", "--force"))
+    edge.record_delete(name, *outcome)
+
+
+async def async_wait_for_ready(http: Any, url: str, method: str, timeout: float = 65.0) -> float | None:
+    start = time.perf_counter()
+    deadline = start + timeout
+    delay = READY_BACKOFF_START
+    first_not_found: float | None = None
+    while True:
+        now = time.perf_counter()
+        try:
+            response = await http.request(method, url, timeout=max(0.05, min(1.0, deadline - now)))
+            if response.status_code != 404:
+                return time.perf_counter() - start
+            first_not_found = first_not_found or now
+            if now - first_not_found >= READY_NOT_FOUND_GRACE:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() + delay > deadline:
+            return None
+        await asyncio.sleep(delay)
+        delay = min(delay * READY_BACKOFF_FACTOR, READY_BACKOFF_MAX)
+
+
+async def async_send_request(
+    http: Any,
+    deployment: Deployment,
+    payload: dict[str, Any],
+    expected: dict[str, Any],
+) -> dict[str, Any]:
+    status_code = 0
+    output: dict[str, Any] = {}
+    timings: dict[str, Any] = {}
+    try:
+        with TRACER.span("request", timings, job=deployment.name):
+            response = await http.request(deployment.method, deployment.url, json=payload, timeout=30)
+            status_code = response.status_code
+            if response.text:
+                output = response.json()
+    except Exception as exc:
+        # The job did come up, so its cold start still counts.
+        return dict(failed_result(f"request error: {exc}"), timings=timings, ready_ms=deployment.ready_ms)
+    return dict(evaluate_response(deployment, expected, output, status_code), timings=timings)
+
+
+async def async_execute_group(
+    http: Any,
+    skill_name: str,
+    prepared: PreparedPipeline,
+    cases: list[tuple[dict[str, Any], dict[str, Any]]],
+    worker: Worker,
+) -> list[dict[str, Any]]:
+    timings: dict[str, Any] = {"group_size": len(cases)}
+    deployment, pipeline_spec = materialize_pipeline(skill_name, prepared, worker)
+    started = time.perf_counter()
+    with TRACER.span("deploy", timings, skill=skill_name, job=deployment.name):
+        ok, error = await async_deploy_job(http, worker.edge, pipeline_spec, worker.temp_dir)
+    if not ok:
+        return [dict(failed_result(f"job deploy failed: {error}"), timings=dict(timings)) for _ in cases]
+
+    results: list[dict[str, Any]] = []
+    try:
+        with TRACER.span("wait", timings, skill=skill_name, job=deployment.name):
+            ready = await async_wait_for_ready(http, deployment.url, prepared.probe_method)
+        if ready is None:
+            results = [failed_result("http server did not start") for _ in cases]
+        else:
+            deployment.ready_ms = round((time.perf_counter() - started) * 1000, 1)
+            unique, slots = dedupe_cases(cases, worker.dedupe)
+            results = fan_out(cases, slots, [await async_send_request(http, deployment, payload, expected) for payload, expected in unique])
+    finally:
+        with TRACER.span("delete", timings, skill=skill_name, job=deployment.name):
+            await async_delete_job(http, worker.edge, deployment.name)
+    return merge_group_timings(results, timings)
+
+
+@dataclass
+class PreparedCliPipeline:
+    """A pipeline-cli spec with its env; mocks are kept apart so tests differing only in mocks share a process."""
+
+    spec: dict[str, Any]
+    env: dict[str, str]
+    mocks: dict[int, str]
+    key: str
+
+
+# Seconds a CLI pipeline run may take, plus CLI_RUN_TIMEOUT_PER_INPUT per batched input.
+CLI_RUN_TIMEOUT = 60.0
+CLI_RUN_TIMEOUT_PER_INPUT = 2.0
+
+
+def cli_env(env: dict[str, Any] | None) -> dict[str, str]:
+    return {
+        str(key): value if isinstance(value, str) else json.dumps(value)
+        for key, value in (env or {}).items()
+    }
+
+
+def prepare_cli_pipeline(
+    skill_name: str,
+    pipeline_cli_path: Path,
+    input_value: str,
+    expected: dict[str, Any],
+    env: dict[str, str],
+    mock_openai: bool,
+    timings: dict[str, Any] | None = None,
+) -> tuple[PreparedCliPipeline | None, dict[str, Any] | None]:
+    """Load and mock the CLI pipeline for one test; ``None`` with a reason if it can't run here."""
+    if not find_expanso_edge():
+        return None, failed_result("expanso-edge not found in PATH")
+    with TRACER.span("parse", timings, skill=skill_name):
+        _, pipeline_spec = SPEC_CACHE.load(pipeline_cli_path)
+    if not pipeline_spec:
+        return None, failed_result("failed to parse pipeline-cli.yaml")
+
+    config = pipeline_spec.setdefault("config", {})
+    input_cfg = config.get("input", {})
+    if not isinstance(input_cfg, dict) or not isinstance(input_cfg.get("stdin"), dict):
+        return None, failed_result("pipeline-cli has no stdin input")
+    output_cfg = config.get("output", {})
+    if not isinstance(output_cfg, dict) or (output_cfg.get("stdout") or {}).get("codec") != "json_object":
+        return None, failed_result("pipeline-cli does not write json_object records to stdout")
+
+    mocks: dict[int, str] = {}
+    processors = config.get("pipeline", {}).get("processors", [])
+    if mock_openai and isinstance(processors, list):
+        with TRACER.span("mock", timings, skill=skill_name):
+            mocked = copy.deepcopy(processors)
+            apply_openai_mocks(mocked, skill_name, expected, str(input_value))
+        mocks = {idx: proc["mapping"] for idx, proc in enumerate(mocked) if proc != processors[idx]}
+
+    pipeline_spec.pop("name", None)
+    key = hash_bytes(json.dumps([pipeline_spec, env, sorted(mocks)], sort_keys=True, default=str).encode())
+    return PreparedCliPipeline(spec=pipeline_spec, env=env, mocks=mocks, key=key), None
+
+
+CLI_CASE_META = "harness_case"
+
+
+def cli_spec(skill_name: str, cases: list[tuple[str, PreparedCliPipeline]]) -> dict[str, Any]:
+    """The runnable spec for cases sharing one prepared key, selecting mocks per message by input hash."""
+    base = cases[0][1]
+    spec = copy.deepcopy(base.spec)
+    spec["name"] = f"{skill_name}-cli-test"
+    processors = spec["config"].get("pipeline", {}).get("processors", [])
+    if len(cases) == 1:
+        for idx, mapping in base.mocks.items():
+            processors[idx] = {"mapping": mapping}
+        return spec
+
+    for idx in base.mocks:
+        arms = "".join(
+            f'  "{hashlib.sha256(text.encode()).hexdigest()}" => {prepared.mocks[idx].removeprefix("root = ")}\n'
+            for text, prepared in cases
+        )
+        processors[idx] = {"mapping": f'root = match meta("{CLI_CASE_META}") {{\n{arms}}}'}
+    if base.mocks:
+        processors.insert(0, {"mutation": f'meta {CLI_CASE_META} = content().hash("sha256").encode("hex")'})
+    return spec
+
+
+def run_cli_pipeline(
+    skill_name: str,
+    cases: list[tuple[str, PreparedCliPipeline]],
+    worker: Worker,
+    timings: dict[str, Any] | None = None,
+) -> tuple[list[dict[str, Any]] | None, str | None]:
+    """Run ``expanso-edge run`` once, feeding the cases' inputs through stdin, one line each if several."""
+    expanso_edge = find_expanso_edge()
+    if not expanso_edge:
+        return None, "expanso-edge not found in PATH"
+
+    inputs = [text for text, _ in cases]
+    spec = cli_spec(skill_name, cases)
+    if len(inputs) > 1:
+        spec["config"]["input"]["stdin"]["codec"] = "lines"
+        stdin_text = "".join(f"{text}\n" for text in inputs)
+    else:
+        stdin_text = inputs[0]
+    spec_path = worker.temp_dir / f"{skill_name}-cli-w{worker.index}-{threading.get_ident()}.yaml"
+    spec_path.write_text(yaml.safe_dump(spec, sort_keys=False))
+
+    try:
+        with TRACER.span("cli_run", timings, skill=skill_name, inputs=len(inputs)):
+            result = subprocess.run(
+                [expanso_edge, "run", str(spec_path)],
+                input=stdin_text,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env={**os.environ, **cases[0][1].env},
+                timeout=CLI_RUN_TIMEOUT + CLI_RUN_TIMEOUT_PER_INPUT * len(inputs),
+            )
+    except subprocess.TimeoutExpired:
+        return None, "cli run timeout"
+    finally:
+        spec_path.unlink(missing_ok=True)
+    if result.returncode != 0:
+        detail = (result.stderr.strip().splitlines() or [""])[-1]
+        return None, f"cli run exited {result.returncode}: {detail}"
+
+    records = []
+    for line in result.stdout.splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+    return records, None
+
+
+def correlate_cli_outputs(inputs: list[str], records: list[dict[str, Any]]) -> list[dict[str, Any]] | None:
+    """Match stdout records to their inputs by ``metadata.input_hash``, else by order; ``None`` if neither works."""
+    by_hash = {}
+    for record in records:
+        metadata = record.get("metadata")
+        if isinstance(metadata, dict) and isinstance(metadata.get("input_hash"), str):
+            by_hash.setdefault(metadata["input_hash"], record)
+    hashes = [hashlib.sha256(text.encode()).hexdigest() for text in inputs]
+    if by_hash and all(h in by_hash for h in hashes):
+        return [by_hash[h] for h in hashes]
+    if len(records) == len(inputs):
+        return records
+    return None
+
+
+def evaluate_cli_output(expected: dict[str, Any], record: dict[str, Any] | None) -> dict[str, Any]:
+    # No status code on stdout: a record counts as 200, a dropped message as 0.
+    output = record or {}
+    status_code = 200 if record is not None else 0
+    ok, errors = check_expectations(expected, output, status_code)
+    return {
+        "status": "passed" if ok else "failed",
+        "errors": errors,
+        "status_code": status_code,
+        "output": output,
+    }
+
+
+def execute_cli_group(
+    skill_name: str,
+    cases: list[tuple[str, dict[str, Any], PreparedCliPipeline]],
+    worker: Worker,
+) -> list[dict[str, Any]]:
+    """Run every ``(input, expected, prepared)`` case through as few ``expanso-edge run`` processes as possible."""
+    timings: dict[str, Any] = {"group_size": len(cases)}
+    records: dict[int, dict[str, Any] | None] = {}
+    batch: list[int] = []
+    mocks_by_input: dict[str, dict[int, str]] = {}
+    for i, (text, _, prepared) in enumerate(cases):
+        if not text or "\n" in text or "\r" in text:
+            continue
+        if mocks_by_input.setdefault(text, prepared.mocks) == prepared.mocks:
+            batch.append(i)
+    if len(batch) > 1:
+        batch_cases = [(cases[i][0], cases[i][2]) for i in batch]
+        outputs, _ = run_cli_pipeline(skill_name, batch_cases, worker, timings)
+        matched = correlate_cli_outputs([text for text, _ in batch_cases], outputs) if outputs is not None else None
+        if matched is not None:
+            records.update(zip(batch, matched))
+
+    results = []
+    for i, (text, expected, prepared) in enumerate(cases):
+        if i not in records:
+            outputs, error = run_cli_pipeline(skill_name, [(text, prepared)], worker, timings)
+            if outputs is None:
+                results.append(failed_result(error or "cli run failed"))
+                continue
+            records[i] = outputs[0] if outputs else None
+        results.append(evaluate_cli_output(expected, records[i]))
+    return merge_group_timings(results, timings)
+
+
+def execute_pending_group(group: list[dict[str, Any]], worker: Worker) -> tuple[list[dict[str, Any]], EdgeHandle | None]:
+    """Run one group on ``worker``; returns its results and the Edge they ran on (``None`` for CLI groups)."""
+    prepared = group[0]["prepared"]
+    if isinstance(prepared, PreparedCliPipeline):
+        cli_cases = [(ctx["payload"], ctx["expected"], ctx["prepared"]) for ctx in group]
+        return execute_cli_group(group[0]["skill_name"], cli_cases, worker), None
+    cases = [(ctx["payload"], ctx["expected"]) for ctx in group]
+    for _ in range(MAX_GROUP_REPLAYS + 1):
+        edge = worker.edge
+        generation = edge.generation
+        with edge.cycle() as usage:
+            results = execute_group(group[0]["skill_name"], prepared, cases, worker)
+        merge_group_resources(results, usage)
+        if not needs_replay(results, edge, generation):
+            break
+    return results, edge
+
+
+# Replays after an Edge restart; they don't count against --max-reruns.
+MAX_GROUP_REPLAYS = 2
+
+
+def needs_replay(results: list[dict[str, Any]], edge: EdgeHandle, generation: int) -> bool:
+    """Whether transient failures in ``results`` came from a broken Edge that has since recovered."""
+    if not any(is_transient_failure(result) for result in results):
+        return False
+    return edge.recovered_since(generation)
+
+
+def execute_test(
+    skill_name: str,
+    pipeline_mcp_path: Path,
+    input_value: str,
+    payload: dict[str, Any],
+    expected: dict[str, Any],
+    worker: Worker,
+    mock_openai: bool,
+) -> tuple[dict[str, Any], bool]:
+    prepared, fatal = prepare_pipeline(skill_name, pipeline_mcp_path, input_value, expected, mock_openai)
+    if prepared is None:
+        return fatal or failed_result("failed to prepare pipeline"), True
+    return execute_group(skill_name, prepared, [(payload, expected)], worker)[0], False
+
+
+def group_by_pipeline(items: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    """Group test contexts that share an effective pipeline spec, keeping first-seen order."""
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for ctx in items:
+        groups.setdefault((ctx["skill_name"], ctx["prepared"].key), []).append(ctx)
+    return list(groups.values())
+
+
+def resolve_input_path(test: dict[str, Any], test_yaml_path: Path, fixtures_dir: str | None) -> Path:
+    raw_path = str(test["input_file"])
+    if Path(raw_path).is_absolute():
+        file_path = raw_path
+    else:
+        fixtures_prefix = fixtures_dir.lstrip("./") if fixtures_dir else ""
+        raw_parts = Path(raw_path).parts
+        if fixtures_prefix and raw_parts and raw_parts[0] == fixtures_prefix:
+            file_path = str((test_yaml_path.parent / raw_path).resolve())
+        elif fixtures_dir:
+            file_path = str((test_yaml_path.parent / fixtures_dir / raw_path).resolve())
+        else:
+            file_path = str((test_yaml_path.parent / raw_path).resolve())
+    return Path(file_path)
+
+
+def resolve_input_value(test: dict[str, Any], test_yaml_path: Path, fixtures_dir: str | None) -> str:
+    input_value = test.get("input", "")
+    if "input_file" not in test:
+        return str(input_value)
+    return resolve_input_path(test, test_yaml_path, fixtures_dir).read_text()
+
+
+def plan_skill(
+    skill_dir: Path,
+    run: RunContext,
+    log: SkillLog,
+) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    """Resolve one skill's tests without touching Edge; returns its report entry and the contexts still to execute."""
+    args, budget = run.args, run.budget
+    if budget.exhausted():
+        return None, []
+
+    skill_name = skill_dir.name
+    category = skill_dir.parent.name
+    skill_result = {
+        "name": skill_name,
+        "category": category,
+        "path": str(skill_dir),
+        "status": "unknown",
+        "reason": None,
+        "tests": [],
+    }
+
+    test_yaml_path = skill_dir / "test" / "test.yaml"
+    pipeline_mcp_path = skill_dir / "pipeline-mcp.yaml"
+    skill_yaml = load_yaml(skill_dir / "skill.yaml") or {}
+
+    log.print(f"==> {category}/{skill_name}")
+
+    if not test_yaml_path.exists():
+        skill_result["status"] = "skipped"
+        skill_result["reason"] = "no tests defined"
+        log.print("  - skipped (no tests)")
+        return skill_result, []
+
+    if not pipeline_mcp_path.exists():
+        skill_result["status"] = "manual"
+        skill_result["reason"] = "missing pipeline-mcp.yaml"
+        log.print("  - manual (missing pipeline-mcp.yaml)")
+        return skill_result, []
+
+    test_yaml = load_yaml(test_yaml_path) or {}
+    tests = test_yaml.get("tests", [])
+    fixtures_dir = test_yaml.get("fixtures_dir")
+
+    if not tests:
+        skill_result["status"] = "skipped"
+        skill_result["reason"] = "tests empty"
+        log.print("  - skipped (tests empty)")
+        return skill_result, []
+
+    if args.respect_skip and all(t.get("skip") for t in tests):
+        skill_result["status"] = "skipped"
+        skill_result["reason"] = "tests skipped"
+        log.print("  - skipped (tests marked skip)")
+        return skill_result, []
+
+    ignore_creds = {"OPENAI_API_KEY"} if args.mock_openai else set()
+    missing = missing_credentials(skill_yaml, ignore=ignore_creds)
+    if missing and not args.allow_external:
+        skill_result["status"] = "skipped"
+        skill_result["reason"] = f"missing credentials: {', '.join(missing)}"
+        log.print(f"  - skipped (missing credentials: {', '.join(missing)})")
+        return skill_result, []
+
+    skill_inputs = skill_yaml.get("inputs", []) if isinstance(skill_yaml, dict) else []
+    pipeline_text = pipeline_mcp_path.read_text()
+    selected_tests = run.selection.get(skill_dir) if run.selection else None
+    pending: list[dict[str, Any]] = []
+    # Tests that got past the filters, for the pipeline-cli pass (--cli).
+    runnable: list[tuple[dict[str, Any], str, dict[str, Any]]] = []
+
+    for test in tests:
+        if budget.exhausted():
+            break
+        if args.test_name and args.test_name.lower() not in str(test.get("name", "")).lower():
+            continue
+        if selected_tests is not None and str(test.get("name")) not in selected_tests:
+            continue
+        if test.get("skip") and args.respect_skip:
+            skill_result["tests"].append({"name": test.get("name"), "status": "skipped", "reason": "test marked skip"})
+            log.print(f"    - {test.get('name')}: skipped")
+            continue
+        if not budget.take():
+            break
+
+        try:
+            input_value = resolve_input_value(test, test_yaml_path, fixtures_dir)
+        except Exception as exc:
+            skill_result["tests"].append({
+                "name": test.get("name"),
+                "status": "failed",
+                "reason": f"failed to read input_file: {exc}",
+            })
+            log.print(f"    - {test.get('name')}: failed (input_file read)")
+            continue
+
+        env_overrides = parse_env_overrides(test.get("env"), skill_inputs)
+        payload = build_payload(input_value, skill_inputs, env_overrides)
+        expected = test.get("expected", {}) or {}
+        runnable.append((test, input_value, expected))
+
+        fingerprint = compute_test_fingerprint(
+            skill_dir,
+            test,
+            input_value,
+            env_overrides,
+            args.mock_openai,
+            harness_fingerprint(pipeline_text, expected, args.mock_openai, stand_in=run.stand_in.settings() if run.stand_in else None),
+        )
+
+        test_entry = {
+            "name": test.get("name"),
+            "fingerprint": fingerprint,
+        }
+        if test.get("skip") and not args.respect_skip:
+            test_entry["forced_run"] = True
+
+        if reuse_settled(test_entry, cache_key(category, skill_name, test.get("name")), skill_result, run, log):
+            continue
+
+        prep_timings: dict[str, Any] = {}
+        prepared, fatal = prepare_pipeline(skill_name, pipeline_mcp_path, input_value, expected, args.mock_openai, prep_timings, run.stand_in)
+        if prepared is None:
+            reason = (fatal or {}).get("reason")
+            skill_result["status"] = "manual"
+            skill_result["reason"] = reason
+            log.print(f"  - manual ({reason})")
+            return skill_result, []
+
+        skill_result["tests"].append(test_entry)
+        pending.append({
+            "category": category,
+            "skill_name": skill_name,
+            "test_name": test.get("name"),
+            "pipeline_mcp_path": pipeline_mcp_path,
+            "input_value": input_value,
+            "payload": payload,
+            "expected": expected,
+            "prepared": prepared,
+            "timings": prep_timings,
+            "test_entry": test_entry,
+        })
+
+    pipeline_cli_path = skill_dir / "pipeline-cli.yaml"
+    if args.cli and runnable and pipeline_cli_path.exists():
+        pending.extend(plan_cli_tests(skill_dir, runnable, skill_result, run, log))
+    return skill_result, pending
+
+
+def reuse_settled(
+    test_entry: dict[str, Any],
+    test_key: str,
+    skill_result: dict[str, Any],
+    run: RunContext,
+    log: SkillLog,
+) -> bool:
+    """Settle ``test_entry`` from the journal (--resume) or the result cache; True if it needs no execution."""
+    args = run.args
+    name = test_entry["name"]
+    resumed = run.journal.lookup(test_key, test_entry["fingerprint"]) if args.resume and run.journal else None
+    if resumed and is_settled(resumed, args):
+        resumed["resumed"] = True
+        skill_result["tests"].append(resumed)
+        log.print(f"    - {name}: {resumed.get('status')} (resumed)")
+        if args.show_io and resumed.get("output_ref"):
+            log.print("      response:", json.dumps(full_output(resumed, run.blobs), indent=2))
+        return True
+
+    cache_entry = run.cache.get(test_entry["fingerprint"]) if args.use_cache else None
+    if not (cache_entry and cache_entry.get("status") == "passed"):
+        return False
+    test_entry.update({
+        "status": "passed",
+        "errors": cache_entry.get("errors", []),
+        "status_code": cache_entry.get("status_code", 0),
+        "output": cache_entry.get("output", {}),
+        "cached": True,
+        "attempts": cache_entry.get("attempts", 0),
+    })
+    if cache_entry.get("output_ref"):
+        test_entry["output_ref"] = cache_entry["output_ref"]
+        if run.blobs is not None:
+            run.blobs.touch(test_entry["output_ref"])
+    if run.blobs is not None:
+        externalize_output(test_entry, run.blobs, args.inline_output_bytes)
+    log.print(f"    - {name}: passed (cached)")
+    if args.show_io:
+        log.print("      response:", json.dumps(full_output(test_entry, run.blobs), indent=2))
+    if run.journal is not None:
+        run.journal.record(test_key, test_entry)
+    skill_result["tests"].append(test_entry)
+    return True
+
+
+def plan_cli_tests(
+    skill_dir: Path,
+    runnable: list[tuple[dict[str, Any], str, dict[str, Any]]],
+    skill_result: dict[str, Any],
+    run: RunContext,
+    log: SkillLog,
+) -> list[dict[str, Any]]:
+    """Plan the pipeline-cli variant of each runnable test (reported as ``<name> [cli]``)."""
+    args = run.args
+    skill_name = skill_dir.name
+    category = skill_dir.parent.name
+    pipeline_cli_path = skill_dir / "pipeline-cli.yaml"
+    pipeline_text = pipeline_cli_path.read_text()
+    pending: list[dict[str, Any]] = []
+
+    for test, input_value, expected in runnable:
+        test_name = f"{test.get('name')} [cli]"
+        env = cli_env(test.get("env"))
+        fingerprint = compute_test_fingerprint(
+            skill_dir,
+            test,
+            input_value,
+            env,
+            args.mock_openai,
+            harness_fingerprint(pipeline_text, expected, args.mock_openai, mode="cli"),
+            pipeline_name="pipeline-cli.yaml",
+        )
+        test_entry = {"name": test_name, "mode": "cli", "fingerprint": fingerprint}
+        if reuse_settled(test_entry, cache_key(category, skill_name, test_name), skill_result, run, log):
+            continue
+
+        prep_timings: dict[str, Any] = {}
+        prepared, unfit = prepare_cli_pipeline(skill_name, pipeline_cli_path, input_value, expected, env, args.mock_openai, prep_timings)
+        if prepared is None:
+            reason = (unfit or {}).get("reason")
+            skill_result["tests"].append(dict(test_entry, status="skipped", reason=reason))
+            log.print(f"    - {test_name}: skipped ({reason})")
+            continue
+
+        skill_result["tests"].append(test_entry)
+        pending.append({
+            "category": category,
+            "skill_name": skill_name,
+            "test_name": test_name,
+            "input_value": input_value,
+            "payload": input_value,
+            "expected": expected,
+            "prepared": prepared,
+            "timings": prep_timings,
+            "test_entry": test_entry,
+        })
+    return pending
+
+
+def record_group(
+    group: list[dict[str, Any]],
+    results: list[dict[str, Any]],
+    skill_result: dict[str, Any],
+    edge: EdgeHandle | None,
+    run: RunContext,
+    log: SkillLog,
+    rerun_candidates: list[dict[str, Any]],
+) -> None:
+    args = run.args
+    # One cold start per group; the first result may be a failure without one.
+    ready_ms = next((result["ready_ms"] for result in results if "ready_ms" in result), None)
+    if ready_ms is not None:
+        skill_result.setdefault("ready_ms", []).append(ready_ms)
+    if "resources" in results[0]:
+        add_resources(skill_result, results[0]["resources"])
+    for ctx, result in zip(group, results):
+        result["timings"] = {**ctx["timings"], **result.get("timings", {})}
+        if edge is not None:
+            edge.record(result)
+        record_attempt(ctx["test_entry"], result)
+        run.settle(ctx["category"], ctx["skill_name"], ctx["test_name"], ctx["test_entry"])
+        run.remember_invocation(ctx)
+        log.print(f"    - {ctx['test_name']}: {result['status']}")
+        if args.show_io:
+            log.print("      request:", json.dumps(ctx["payload"], indent=2))
+            log.print("      response:", json.dumps(result.get("output", {}), indent=2))
+        if result["status"] == "failed" and args.rerun_failed:
+            rerun_candidates.append(ctx)
+
+
+def add_resources(skill_result: dict[str, Any], usage: dict[str, Any]) -> None:
+    total = skill_result.setdefault("resources", {**{key: 0 for key in RESOURCE_KEYS}, "cycles": 0, "exclusive": True})
+    for key in RESOURCE_KEYS:
+        total[key] = round(total[key] + usage[key], 1)
+    total["cycles"] += 1
+    total["exclusive"] = total["exclusive"] and usage["exclusive"]
+
+
+def resource_leaks(usage: dict[str, Any] | None) -> dict[str, Any]:
+    """Resources a skill left above LEAK_THRESHOLDS, judged only when every cycle had the Edge to itself."""
+    if not usage or not usage["exclusive"]:
+        return {}
+    return {key: usage[key] for key, limit in LEAK_THRESHOLDS.items() if usage[key] > limit}
+
+
+def finish_skill(skill_result: dict[str, Any], log: SkillLog) -> None:
+    failed_tests = [t for t in skill_result["tests"] if t.get("status") == "failed"]
+    if failed_tests:
+        skill_result["status"] = "failed"
+        log.print("  - status: failed")
+    else:
+        skill_result["status"] = "passed"
+        log.print("  - status: passed")
+    leaks = resource_leaks(skill_result.get("resources"))
+    if leaks:
+        skill_result["resource_leaks"] = leaks
+        log.print("  - possible resource leak after delete:", ", ".join(f"{key} +{value:g}" for key, value in leaks.items()))
+
+
+def run_skill(
+    skill_dir: Path,
+    run: RunContext,
+    worker: Worker,
+    log: SkillLog,
+) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    """Run every test of one skill on ``worker``; returns its report entry and the failed contexts to rerun."""
+    timings: dict[str, Any] = {}
+    with TRACER.span("skill", timings, cat="skill", skill=skill_dir.name):
+        with TRACER.span("plan", skill=skill_dir.name):
+            skill_result, pending = plan_skill(skill_dir, run, log)
+        if skill_result is None or skill_result["status"] != "unknown":
+            return skill_result, []
+
+        rerun_candidates: list[dict[str, Any]] = []
+        # Tests that share an effective pipeline spec are served by a single deploy.
+        for group in order_groups(group_by_pipeline(pending), run.history):
+            with TRACER.span("group", skill=skill_dir.name, tests=len(group)):
+                results, edge = execute_pending_group(group, worker)
+            record_group(group, results, skill_result, edge, run, log, rerun_candidates)
+
+        finish_skill(skill_result, log)
+    skill_result["duration_ms"] = timings["skill_ms"]
+    return skill_result, rerun_candidates
+
+
+def record_rerun(group: list[dict[str, Any]], results: list[dict[str, Any]], edge: EdgeHandle | None, run: RunContext) -> None:
+    for ctx, result in zip(group, results):
+        result["timings"] = {**ctx["timings"], **result.get("timings", {})}
+        if edge is not None:
+            edge.record(result)
+        record_attempt(ctx["test_entry"], result)
+        run.settle(ctx["category"], ctx["skill_name"], ctx["test_name"], ctx["test_entry"])
+        run.remember_invocation(ctx)
+        with PRINT_LOCK:
+            print(f"    - {ctx['category']}/{ctx['skill_name']} :: {ctx['test_name']}: {result['status']}")
+
+
+def reuse_invocations(candidates: list[dict[str, Any]], run: RunContext) -> list[dict[str, Any]]:
+    """Settle rerun candidates from passing identical invocations; returns the ones still to run."""
+    remaining = []
+    for ctx in candidates:
+        passed = run.passed_invocation(ctx)
+        result = reevaluate(passed, ctx["expected"]) if passed is not None else None
+        if result is not None and result["status"] == "passed":
+            record_rerun([ctx], [result], None, run)
+        else:
+            remaining.append(ctx)
+    return remaining
+
+
+def rerun_group(group: list[dict[str, Any]], run: RunContext, worker: Worker) -> None:
+    with TRACER.span("group", cat="rerun", skill=group[0]["skill_name"], tests=len(group)):
+        results, edge = execute_pending_group(group, worker)
+    record_rerun(group, results, edge, run)
+
+
+def rerun_rounds(rerun_candidates: list[dict[str, Any]], run: RunContext) -> Any:
+    """Yield the groups to rerun for each attempt after the first."""
+    args = run.args
+    if not (args.rerun_failed and rerun_candidates and args.max_reruns > 1):
+        return
+    attempts = 1
+    remaining = rerun_candidates
+    while attempts < args.max_reruns and remaining:
+        attempts += 1
+        print(f"\n==> Rerun failed tests (attempt {attempts}/{args.max_reruns})")
+        remaining = [ctx for ctx in remaining if not ctx["test_entry"].get("permanent_failure")]
+        yield group_by_pipeline(reuse_invocations(remaining, run))
+        remaining = [
+            ctx for ctx in remaining
+            if ctx["test_entry"].get("status") == "failed" and not ctx["test_entry"].get("permanent_failure")
+        ]
+
+
+# Phases one deploy or CLI process spends on a whole group of tests.
+GROUP_TIMING_KEYS = {"deploy_ms", "wait_ms", "delete_ms", "cli_run_ms"}
+# Recent attempts in which a pass/fail flip marks a test as flaky.
+FLAKY_WINDOW = 5
+
+
+def test_duration_ms(timings: dict[str, Any] | None) -> float | None:
+    """One test's share of harness time, splitting group phases across the group."""
+    if not timings:
+        return None
+    share = timings.get("group_size") or 1
+    total = 0.0
+    for key, value in timings.items():
+        if key.endswith("_ms"):
+            total += value / share if key in GROUP_TIMING_KEYS else value
+    return round(total, 1)
+
+
+def test_outlook(runs: list[tuple[str, float | None]]) -> tuple[float | None, bool]:
+    """Median recorded duration and whether the test failed last time or flipped recently."""
+    durations = [duration for _, duration in runs if duration is not None]
+    statuses = [status for status, _ in runs[-FLAKY_WINDOW:]]
+    failing = bool(statuses) and (statuses[-1] == "failed" or len(set(statuses)) > 1)
+    return (statistics.median(durations) if durations else None), failing
+
+
+def skill_key_for(skill_dir: Path) -> str:
+    return f"{skill_dir.parent.name}/{skill_dir.name}"
+
+
+def expected_skill_durations(history: dict[str, list[tuple[str, float | None]]]) -> dict[str, float]:
+    expected: dict[str, float] = {}
+    for test_key, runs in history.items():
+        skill_key = test_key.split(":", 1)[0]
+        expected[skill_key] = expected.get(skill_key, 0.0) + (test_outlook(runs)[0] or 0.0)
+    return expected
+
+
+def schedule_skills(skills: list[Path], history: dict[str, list[tuple[str, float | None]]]) -> list[Path]:
+    """Order skills failing or flaky first, then longest expected duration first."""
+    expected = expected_skill_durations(history)
+    failing = {test_key.split(":", 1)[0] for test_key, runs in history.items() if test_outlook(runs)[1]}
+    default = statistics.median(expected.values()) if expected else 0.0
+
+    def priority(skill_dir: Path) -> tuple[int, float]:
+        skill_key = skill_key_for(skill_dir)
+        return (0 if skill_key in failing else 1, -expected.get(skill_key, default))
+
+    return sorted(skills, key=priority)
+
+
+def order_groups(groups: list[list[dict[str, Any]]], history: dict[str, list[tuple[str, float | None]]] | None) -> list[list[dict[str, Any]]]:
+    """Within a skill, run groups holding failing or flaky tests first, then the slowest."""
+    if not history:
+        return groups
+
+    def priority(group: list[dict[str, Any]]) -> tuple[int, float]:
+        outlooks = [test_outlook(history.get(cache_key(ctx["category"], ctx["skill_name"], ctx["test_name"]), [])) for ctx in group]
+        return (0 if any(failing for _, failing in outlooks) else 1, -sum(duration or 0.0 for duration, _ in outlooks))
+
+    return sorted(groups, key=priority)
+
+
+def summarize_timings(skills: list[dict[str, Any]], run_timings: dict[str, Any]) -> dict[str, Any]:
+    """Run-level timings plus per-phase totals, counting group phases once per group."""
+    phases: dict[str, float] = {}
+    executed = 0
+    for skill in skills:
+        for test in skill.get("tests", []):
+            timings = test.get("timings")
+            if not timings:
+                continue
+            executed += 1
+            share = timings.get("group_size") or 1
+            for key, value in timings.items():
+                if not key.endswith("_ms"):
+                    continue
+                if key in GROUP_TIMING_KEYS:
+                    value = value / share
+                phases[key] = phases.get(key, 0.0) + value
+    return {
+        **run_timings,
+        "executed_tests": executed,
+        "phases": {key: round(value, 1) for key, value in sorted(phases.items())},
+    }
+
+
+def run_on_worker(workers: queue.Queue[Worker], edges: EdgePool, fn: Any, *fn_args: Any) -> Any:
+    """Check a worker out of the pool (moving it off an unhealthy Edge), run ``fn(*fn_args, worker)`` and return it."""
+    worker = workers.get()
+    worker.edge = edges.route(worker.edge)
+    lane = TRACE_LANE.set(f"worker-{worker.index}")
+    try:
+        return fn(*fn_args, worker)
+    finally:
+        TRACE_LANE.reset(lane)
+        workers.put(worker)
+
+
+def run_suite_threaded(
+    skills: list[Path],
+    run: RunContext,
+    edges: EdgePool,
+) -> list[dict[str, Any]]:
+    """Run ``skills`` on a pool of ``--jobs`` worker threads, then rerun failures."""
+    args = run.args
+    workers: queue.Queue[Worker] = queue.Queue()
+    for index in range(args.jobs):
+        workers.put(Worker(
+            index=index,
+            edge=edges.assign(index),
+            temp_dir=SCRATCH.mkdtemp(f"worker-{index}-"),
+            dedupe=args.dedupe,
+        ))
+
+    skill_results: list[dict[str, Any]] = []
+    rerun_candidates: list[dict[str, Any]] = []
+
+    def run_skill_task(skill_dir: Path, worker: Worker) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+        log = SkillLog(buffered=args.jobs > 1)
+        try:
+            return run_skill(skill_dir, run, worker, log)
+        finally:
+            log.flush()
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {skill_dir: pool.submit(run_on_worker, workers, edges, run_skill_task, skill_dir) for skill_dir in run.schedule(skills)}
+        try:
+            # Collect in find_skills order so the report layout doesn't depend on --jobs or scheduling.
+            for skill_dir in skills:
+                skill_result, candidates = futures[skill_dir].result()
+                if skill_result is None:
+                    continue
+                skill_results.append(skill_result)
+                rerun_candidates.extend(candidates)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        for groups in rerun_rounds(rerun_candidates, run):
+            for future in [pool.submit(run_on_worker, workers, edges, rerun_group, group, run) for group in groups]:
+                future.result()
+
+    return skill_results
+
+
+async def run_suite_async(
+    skills: list[Path],
+    run: RunContext,
+    edges: EdgePool,
+) -> list[dict[str, Any]]:
+    """Run ``skills`` on one event loop with at most ``--jobs`` deploys in flight."""
+    args = run.args
+    semaphore = asyncio.Semaphore(args.jobs)
+    temp_root = SCRATCH.mkdtemp("async-")
+    workers = [Worker(index=edge.index, edge=edge, temp_dir=temp_root, dedupe=args.dedupe) for edge in edges.edges]
+    # Each in-flight group gets a free trace lane so its spans don't overlap another's.
+    lanes = [f"slot-{slot}" for slot in reversed(range(args.jobs))]
+    turn = 0
+
+    async def next_worker() -> Worker:
+        nonlocal turn
+        worker = workers[turn % len(workers)]
+        turn += 1
+        if not (worker.edge.healthy and worker.edge.alive()):
+            # route() may wait for the supervisor to bring an Edge back.
+            worker.edge = await asyncio.to_thread(edges.route, worker.edge)
+        return worker
+
+    limits = httpx.Limits(max_connections=args.jobs * 2, max_keepalive_connections=args.jobs * 2)
+    async with httpx.AsyncClient(limits=limits) as http:
+
+        async def run_group(group: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], EdgeHandle | None]:
+            async with semaphore:
+                worker = await next_worker()
+                lane = lanes.pop()
+                TRACE_LANE.set(lane)
+                try:
+                    with TRACER.span("group", skill=group[0]["skill_name"], tests=len(group)):
+                        if isinstance(group[0]["prepared"], PreparedCliPipeline):
+                            # CLI runs are subprocesses; keep them off the event loop.
+                            return await asyncio.to_thread(execute_pending_group, group, worker)
+                        for _ in range(MAX_GROUP_REPLAYS + 1):
+                            edge = worker.edge
+                            generation = edge.generation
+                            # No settling here: waiting for FDs to drop would stall the event loop.
+                            with edge.cycle(settle=False) as usage:
+                                results = await async_execute_group(
+                                    http,
+                                    group[0]["skill_name"],
+                                    group[0]["prepared"],
+                                    [(ctx["payload"], ctx["expected"]) for ctx in group],
+                                    worker,
+                                )
+                            merge_group_resources(results, usage)
+                            if not await asyncio.to_thread(needs_replay, results, edge, generation):
+                                break
+                finally:
+                    lanes.append(lane)
+                return results, edge
+
+        async def run_one(skill_dir: Path) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+            log = SkillLog(buffered=True)
+            started = time.perf_counter()
+            try:
+                with TRACER.span("plan", skill=skill_dir.name):
+                    # YAML, cache and journal IO; keep it off the event loop.
+                    skill_result, pending = await asyncio.to_thread(plan_skill, skill_dir, run, log)
+                if skill_result is None or skill_result["status"] != "unknown":
+                    return skill_result, []
+                candidates: list[dict[str, Any]] = []
+                groups = order_groups(group_by_pipeline(pending), run.history)
+                for group, (results, edge) in zip(groups, await asyncio.gather(*(run_group(g) for g in groups))):
+                    await asyncio.to_thread(record_group, group, results, skill_result, edge, run, log, candidates)
+                finish_skill(skill_result, log)
+                # Skills overlap on the event loop, so this is wall time rather than a traced span.
+                skill_result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                return skill_result, candidates
+            finally:
+                log.flush()
+
+        order = run.schedule(skills)
+        outcomes_by_skill = dict(zip(order, await asyncio.gather(*(run_one(skill_dir) for skill_dir in order))))
+        outcomes = [outcomes_by_skill[skill_dir] for skill_dir in skills]
+        skill_results = [skill_result for skill_result, _ in outcomes if skill_result is not None]
+        rerun_candidates = [ctx for _, candidates in outcomes for ctx in candidates]
+
+        for groups in rerun_rounds(rerun_candidates, run):
+            for group, (results, edge) in zip(groups, await asyncio.gather(*(run_group(g) for g in groups))):
+                await asyncio.to_thread(record_rerun, group, results, edge, run)
+
+    return skill_results
+
@@ -0,0 +1,21 @@
+"""Make ``skilltest`` and ``test-skills.py`` importable as they are when the harness runs."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture(scope="session")
+def test_skills():
+    """The ``scripts/test-skills.py`` module (its name isn't importable)."""
+    spec = importlib.util.spec_from_file_location("test_skills_cli", SCRIPTS_DIR / "test-skills.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+
+from skilltest.bench import compare_to_baseline, fit_trend, mean_ci
+
+
+def bench_result(p95, rps, name="skill", clients=4, status="ok"):
+    return {"category": "cat", "name": name, "clients": clients, "status": status, "p95_ms_ci": p95, "throughput_rps_ci": rps}
+
+
+def test_mean_ci_edge_cases():
+    assert mean_ci([]) == [0.0, 0.0]
+    assert mean_ci([5.0]) == [5.0, 0.0]
+    assert mean_ci([3.0, 3.0, 3.0]) == [3.0, 0.0]
+
+
+def test_mean_ci_uses_student_t():
+    # mean 2, stdev 1, n 3: half width = 4.303 * 1 / sqrt(3)
+    assert mean_ci([1.0, 2.0, 3.0]) == [2.0, pytest.approx(2.48, abs=0.01)]
+
+
+def test_mean_ci_caps_degrees_of_freedom():
+    samples = [float(i % 2) for i in range(100)]
+    mean, half = mean_ci(samples)
+    assert mean == 0.5
+    assert half == pytest.approx(2.042 * 0.5025 / 10, abs=0.01)
+
+
+def test_compare_flags_regression_only_without_overlap():
+    baseline = {"cat/slow": {"clients": 4, "p95_ms": [100.0, 5.0], "throughput_rps": [50.0, 1.0]},
+                "cat/noisy": {"clients": 4, "p95_ms": [100.0, 30.0], "throughput_rps": [50.0, 1.0]}}
+    results = [bench_result([150.0, 5.0], [50.0, 1.0], name="slow"), bench_result([150.0, 30.0], [50.0, 1.0], name="noisy")]
+    comparisons = compare_to_baseline(results, baseline, threshold=0.1)
+    assert [(c["skill"], c["regressed"]) for c in comparisons] == [("cat/slow", True), ("cat/noisy", False)]
+    assert comparisons[0]["p95_change"] == 0.5
+    assert results[0]["regression"] and not results[1]["regression"]
+
+
+def test_compare_flags_throughput_drop():
+    baseline = {"cat/skill": {"clients": 4, "p95_ms": [100.0, 1.0], "throughput_rps": [100.0, 2.0]}}
+    (comparison,) = compare_to_baseline([bench_result([100.0, 1.0], [70.0, 2.0])], baseline, threshold=0.1)
+    assert comparison["regressed"]
+    assert comparison["throughput_change"] == -0.3
+
+
+def test_compare_ignores_change_within_threshold():
+    baseline = {"cat/skill": {"clients": 4, "p95_ms": [100.0, 1.0], "throughput_rps": [50.0, 1.0]}}
+    (comparison,) = compare_to_baseline([bench_result([105.0, 1.0], [50.0, 1.0])], baseline, threshold=0.1)
+    assert not comparison["regressed"]
+
+
+def test_compare_skips_unmatched_results():
+    baseline = {"cat/skill": {"clients": 4, "p95_ms": [100.0, 1.0], "throughput_rps": [50.0, 1.0]}}
+    results = [
+        bench_result([500.0, 1.0], [50.0, 1.0], clients=8),
+        bench_result([500.0, 1.0], [50.0, 1.0], status="error"),
+        bench_result([500.0, 1.0], [50.0, 1.0], name="new"),
+    ]
+    assert compare_to_baseline(results, baseline, threshold=0.1) == []
+
+
+def test_fit_trend_needs_three_points():
+    assert fit_trend([(0, 1.0), (60, 2.0)], worse=1, threshold=0.1) is None
+
+
+def test_fit_trend_flat_series():
+    assert fit_trend([(0, 5.0), (60, 5.0), (120, 5.0)], worse=1, threshold=0.1) == {
+        "slope_per_hour": 0.0, "change": 0.0, "r2": 1.0, "drifting": False,
+    }
+
+
+def test_fit_trend_flags_growth_in_the_worse_direction():
+    points = [(t * 600.0, 100.0 + t * 10) for t in range(7)]
+    trend = fit_trend(points, worse=1, threshold=0.2)
+    assert trend == {"slope_per_hour": 60.0, "change": 0.6, "r2": 1.0, "drifting": True}
+    # Latency growing is bad; throughput growing is not.
+    assert not fit_trend(points, worse=-1, threshold=0.2)["drifting"]
+
+
+def test_fit_trend_flags_throughput_drop():
+    points = [(t * 600.0, 100.0 - t * 10) for t in range(5)]
+    trend = fit_trend(points, worse=-1, threshold=0.2)
+    assert trend["change"] == -0.4 and trend["drifting"]
+
+
+def test_fit_trend_ignores_noisy_fit():
+    points = [(0, 100.0), (60, 300.0), (120, 100.0), (180, 300.0), (240, 100.0), (300, 400.0)]
+    trend = fit_trend(points, worse=1, threshold=0.1)
+    assert trend["r2"] < 0.5 and trend["change"] > 0.1
+    assert not trend["drifting"]
+
+
+def test_fit_trend_without_positive_start():
+    trend = fit_trend([(0, 0.0), (60, 1.0), (120, 2.0)], worse=1, threshold=0.1)
+    assert trend["change"] is None and not trend["drifting"]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+from skilltest.cache import BlobStore, Journal, ResultCache
+
+
+def passed(fingerprint):
+    return {"fingerprint": fingerprint, "status": "passed", "output": "ok"}
+
+
+def test_merge_from_adds_results_and_keeps_latest_use(tmp_path):
+    ours, theirs = ResultCache(tmp_path / "a"), ResultCache(tmp_path / "b")
+    ours.put("cat/skill:t1", passed("f1"))
+    theirs.put("cat/skill:t1", passed("f1"))
+    theirs.put("cat/skill:t2", passed("f2"))
+    theirs.get("f1")
+    theirs.close()
+    assert ours.merge_from(theirs.path) == 1
+    assert ours.get("f2") == passed("f2")
+    with sqlite3.connect(theirs.path) as db:
+        their_use = db.execute("SELECT last_used FROM results WHERE fingerprint = 'f1'").fetchone()[0]
+    assert ours._db().execute("SELECT last_used FROM results WHERE fingerprint = 'f1'").fetchone()[0] >= their_use
+
+
+def test_merge_from_dedupes_and_trims_history(tmp_path):
+    ours, theirs = ResultCache(tmp_path / "a"), ResultCache(tmp_path / "b")
+    for _ in range(ResultCache.HISTORY_KEEP):
+        theirs.record_history("cat/skill:t1", "passed", 5.0)
+    theirs.close()
+    ours.record_history("cat/skill:t1", "failed", 9.0)
+    ours.merge_from(theirs.path)
+    ours.merge_from(theirs.path)
+    runs = ours.load_history()["cat/skill:t1"]
+    assert len(runs) == ResultCache.HISTORY_KEEP
+    assert ("failed", 9.0) in runs
+
+
+def test_merge_from_rolls_back_on_error(tmp_path):
+    ours, theirs = ResultCache(tmp_path / "a"), ResultCache(tmp_path / "b")
+    theirs.put("cat/skill:t1", passed("f1"))
+    theirs._db().execute("DROP TABLE history")
+    theirs.close()
+    with pytest.raises(sqlite3.OperationalError):
+        ours.merge_from(theirs.path)
+    assert ours.is_empty()
+    # The other database was detached, so a later merge still works.
+    fixed = ResultCache(tmp_path / "c")
+    fixed.put("cat/skill:t2", passed("f2"))
+    fixed.close()
+    assert ours.merge_from(fixed.path) == 1
+
+
+def test_journal_resume_drops_torn_line(tmp_path):
+    path = tmp_path / "report.journal.jsonl"
+    journal = Journal(path)
+    journal.record("cat/skill:t1", passed("f1"))
+    journal.record("cat/skill:t2", passed("f2"))
+    journal.close()
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'{"key": "cat/skill:t3", "entry": {"fingerp')
+
+    resumed = Journal(path, resume=True)
+    assert path.stat().st_size == intact
+    assert set(resumed.index) == {("cat/skill:t1", "f1"), ("cat/skill:t2", "f2")}
+    assert resumed.lookup("cat/skill:t1", "f1") == {"fingerprint": "f1", "status": "passed", "journal_offset": 0}
+    assert resumed.lookup("cat/skill:t3", "f3") is None
+
+    # New records start on a clean line and are found by the next resume.
+    resumed.record("cat/skill:t3", passed("f3"))
+    resumed.close()
+    again = Journal(path, resume=True)
+    assert again.hydrate(again.lookup("cat/skill:t3", "f3")) == passed("f3")
+    again.close()
+
+
+def test_journal_without_resume_starts_empty(tmp_path):
+    path = tmp_path / "report.journal.jsonl"
+    path.write_text('{"key": "cat/skill:t1", "entry": {"fingerprint": "f1"}}\n')
+    journal = Journal(path)
+    assert journal.index == {}
+    journal.close()
+    assert path.read_text() == ""
+
+
+def set_last_used(cache, fingerprint, when):
+    cache._db().execute("UPDATE results SET last_used = ? WHERE fingerprint = ?", (when, fingerprint))
+
+
+def test_evict_drops_stale_entries(tmp_path):
+    cache = ResultCache(tmp_path, max_age_days=1)
+    cache.put("cat/skill:t1", passed("old"))
+    cache.put("cat/skill:t2", passed("new"))
+    set_last_used(cache, "old", time.time() - 2 * 86400)
+    assert cache.evict() == 1
+    assert cache.get("old") is None and cache.get("new") is not None
+
+
+def test_evict_drops_least_recently_used_above_max_bytes(tmp_path):
+    cache = ResultCache(tmp_path)
+    for i in range(4):
+        cache.put(f"cat/skill:t{i}", passed(f"f{i}"))
+        set_last_used(cache, f"f{i}", 1000.0 + i)
+    size = cache._db().execute("SELECT size FROM results WHERE fingerprint = 'f0'").fetchone()[0]
+    cache.max_bytes = 2 * size
+    cache.get("f0")
+    assert cache.evict() == 2
+    assert [f for f in ("f0", "f1", "f2", "f3") if cache.get(f)] == ["f0", "f3"]
+
+
+def test_evict_trims_history(tmp_path):
+    cache = ResultCache(tmp_path)
+    for i in range(ResultCache.HISTORY_KEEP + 3):
+        cache.record_history("cat/skill:t1", "passed", float(i))
+    cache.evict()
+    assert len(cache.load_history()["cat/skill:t1"]) == ResultCache.HISTORY_KEEP
+
+
+def test_evict_without_open_database_is_a_no_op(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=1, max_age_days=1)
+    assert cache.evict() == 0
+    assert not cache.path.exists()
+
+
+def test_blob_evict_applies_its_own_byte_cap(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs")
+    refs = [blobs.put({"output": str(i) * 100}) for i in range(3)]
+    paths = [blobs._path(ref.removeprefix("sha256:")) for ref in refs]
+    for age, path in enumerate(reversed(paths)):
+        os.utime(path, (time.time() - age * 60,) * 2)
+    assert blobs.evict(None, max_bytes=sum(p.stat().st_size for p in paths[1:])) == 1
+    assert [p.exists() for p in paths] == [False, True, True]
+    os.utime(paths[1], (time.time() - 2 * 86400,) * 2)
+    assert blobs.evict(1) == 1
+    assert [p.exists() for p in paths] == [False, False, True]
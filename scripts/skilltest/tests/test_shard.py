@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+SKILLS = [Path(f"skills/cat/s{i}") for i in range(7)]
+
+
+def test_shards_partition_the_skills(test_skills):
+    durations = {f"cat/s{i}": float(10 * (i + 1)) for i in range(7)}
+    shards = [test_skills.shard_skills(SKILLS, (index, 3), durations) for index in (1, 2, 3)]
+    picked = [skill for skills, _ in shards for skill in skills]
+    assert sorted(picked) == sorted(SKILLS)
+    assert sum(load for _, load in shards) == sum(durations.values())
+
+
+def test_shards_balance_longest_first(test_skills):
+    durations = {"cat/s0": 90.0, "cat/s1": 50.0, "cat/s2": 40.0, "cat/s3": 30.0, "cat/s4": 20.0, "cat/s5": 10.0, "cat/s6": 10.0}
+    loads = [test_skills.shard_skills(SKILLS, (index, 2), durations)[1] for index in (1, 2)]
+    assert loads == [130.0, 120.0]
+
+
+def test_shards_keep_input_order(test_skills):
+    skills, _ = test_skills.shard_skills(SKILLS, (1, 2), {})
+    assert skills == sorted(skills, key=SKILLS.index)
+
+
+def test_unknown_skills_get_the_median_duration(test_skills):
+    durations = {"cat/s0": 10.0, "cat/s1": 20.0, "cat/s2": 30.0}
+    _, load = test_skills.shard_skills(SKILLS, (1, 1), durations)
+    assert load == 60.0 + 4 * 20.0
+
+
+def test_shards_do_not_depend_on_input_order(test_skills):
+    durations = {f"cat/s{i}": 5.0 for i in range(7)}
+    forward = test_skills.shard_skills(SKILLS, (2, 3), durations)[0]
+    backward = test_skills.shard_skills(SKILLS[::-1], (2, 3), durations)[0]
+    assert sorted(forward) == sorted(backward)
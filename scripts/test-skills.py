@@ -1,6 +1,6 @@
 # /// script
 # requires-python = ">=3.11"
-# dependencies = ["pyyaml", "requests"]
+# dependencies = ["pyyaml", "requests", "httpx"]
 # ///
 """Run Expanso skill tests in local Edge mode.
 
@@ -8,852 +8,164 @@ Usage:
   uv run -s scripts/test-skills.py [skill_name ...]
   uv run -s scripts/test-skills.py --limit-skills 10
   uv run -s scripts/test-skills.py --limit-tests 10
+  uv run -s scripts/test-skills.py --jobs 8
+  uv run -s scripts/test-skills.py --async --jobs 200
 """
 
 from __future__ import annotations
 
 import argparse
-import hashlib
+import asyncio
 import json
-import os
 import re
-import shutil
-import socket
-import subprocess
+import statistics
 import sys
-import tempfile
 import time
-from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import requests
-import yaml
-
-
-REPO_ROOT = Path(__file__).resolve().parents[1]
-SKILLS_DIR = REPO_ROOT / "skills"
-
-
-class DupKeyLoader(yaml.SafeLoader):
-    """YAML loader that merges duplicate keys into lists for known fields."""
-
-    def construct_mapping(self, node, deep=False):  # type: ignore[override]
-        mapping = {}
-        for key_node, value_node in node.value:
-            key = self.construct_object(key_node, deep=deep)
-            value = self.construct_object(value_node, deep=deep)
-            if key in mapping:
-                if key in {"has_field", "metadata_has", "extracted_contains", "analysis_has", "command_contains"}:
-                    if not isinstance(mapping[key], list):
-                        mapping[key] = [mapping[key]]
-                    mapping[key].append(value)
-                else:
-                    # Preserve duplicates as list for visibility
-                    if not isinstance(mapping[key], list):
-                        mapping[key] = [mapping[key]]
-                    mapping[key].append(value)
-            else:
-                mapping[key] = value
-        return mapping
-
-
-@dataclass
-class EdgeProcess:
-    api_url: str
-    data_dir: Path
-    log_file: Path
-    env: dict[str, str] | None = None
-    edge_bin: str | None = None
-    process: subprocess.Popen | None = None
-
-    def start(self) -> None:
-        expanso_edge = self.edge_bin or os.environ.get("EXPANSO_EDGE_BIN") or shutil.which("expanso-edge")
-        if not expanso_edge:
-            raise RuntimeError("expanso-edge not found in PATH")
-
-        env = os.environ.copy()
-        if self.env:
-            env.update(self.env)
-
-        cmd = [
-            expanso_edge,
-            "run",
-            "--local",
-            "--no-watch",
-            "--api-listen",
-            self.api_url.replace("http://", ""),
-            "--data-dir",
-            str(self.data_dir),
-            "--log-level",
-            "warn",
-        ]
-        self.log_file.parent.mkdir(parents=True, exist_ok=True)
-        log_handle = open(self.log_file, "w")
-        self.process = subprocess.Popen(cmd, stdout=log_handle, stderr=log_handle, env=env)
-
-    def stop(self) -> None:
-        if not self.process:
-            return
-        self.process.terminate()
-        try:
-            self.process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            self.process.kill()
-        self.process = None
-
-
-def load_yaml(path: Path) -> dict[str, Any] | None:
-    if not path.exists():
-        return None
-    with open(path, "r") as f:
-        return yaml.load(f, Loader=DupKeyLoader)  # type: ignore[arg-type]
-
-
-def find_skills(names: list[str] | None) -> list[Path]:
-    skill_dirs = []
-    for category in sorted(SKILLS_DIR.iterdir()):
-        if not category.is_dir():
+try:
+    import httpx
+except ImportError:  # --async falls back to the threaded runner
+    httpx = None  # type: ignore[assignment]
+
+from skilltest.bench import (
+    baseline_path_for,
+    compare_to_baseline,
+    load_baseline,
+    load_report_path_for,
+    parse_duration,
+    print_bench_table,
+    print_regression_table,
+    print_soak_trends,
+    run_bench,
+    run_soak,
+    update_baseline,
+)
+from skilltest.cache import BlobStore, Journal, ResultCache, journal_path_for, load_previous_report, write_report
+from skilltest.edge import EdgePool
+from skilltest.mocks import OpenAIStandIn, parse_latency
+from skilltest.multiplex import run_suite_multiplexed
+from skilltest.runner import (
+    REPO_ROOT,
+    RunContext,
+    TRACER,
+    TRACE_LANE,
+    TestBudget,
+    expected_skill_durations,
+    find_skills,
+    run_suite_async,
+    run_suite_threaded,
+    select_changed,
+    skill_key_for,
+    summarize_timings,
+)
+
+
+DEFAULT_CACHE_DIR = REPO_ROOT / ".cache" / "test-skills"
+
+
+def finalize_report(report_data: dict[str, Any]) -> None:
+    summary = {"total_skills": 0, "passed": 0, "failed": 0, "skipped": 0, "manual": 0}
+    for skill in report_data.get("skills", []):
+        summary["total_skills"] += 1
+        status = skill.get("status")
+        if status in {"skipped", "manual"}:
+            summary[status] += 1
             continue
-        for skill in sorted(category.iterdir()):
-            if not skill.is_dir():
-                continue
-            if not (skill / "skill.yaml").exists():
-                continue
-            if names and skill.name not in names:
-                continue
-            skill_dirs.append(skill)
-    return skill_dirs
-
-
-def cache_key(category: str, skill_name: str, test_name: str | None) -> str:
-    return f"{category}/{skill_name}:{test_name or ''}"
-
-
-def load_previous_report(path: Path) -> dict[str, Any] | None:
-    if not path.exists():
-        return None
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-
-def build_cache_index(report: dict[str, Any] | None) -> dict[str, dict[str, Any]]:
-    if not report:
-        return {}
-    index: dict[str, dict[str, Any]] = {}
-    for skill in report.get("skills", []) if isinstance(report, dict) else []:
-        category = skill.get("category") or ""
-        name = skill.get("name") or ""
-        for test in skill.get("tests", []) or []:
-            key = cache_key(category, name, test.get("name"))
-            index[key] = test
-    return index
-
-
-def hash_bytes(*parts: bytes) -> str:
-    h = hashlib.sha256()
-    for part in parts:
-        h.update(part)
-    return h.hexdigest()
-
-
-def compute_test_fingerprint(
-    skill_dir: Path,
-    test: dict[str, Any],
-    input_value: str,
-    env_overrides: dict[str, Any],
-    mock_openai: bool,
-    harness_hash: str,
-) -> str:
-    h = hashlib.sha256()
-    for path in (
-        skill_dir / "pipeline-mcp.yaml",
-        skill_dir / "skill.yaml",
-        skill_dir / "test" / "test.yaml",
-    ):
-        if path.exists():
-            h.update(path.read_bytes())
-    h.update(json.dumps(test, sort_keys=True, default=str).encode())
-    h.update(str(input_value).encode())
-    h.update(json.dumps(env_overrides, sort_keys=True, default=str).encode())
-    h.update(b"mock_openai=1" if mock_openai else b"mock_openai=0")
-    h.update(harness_hash.encode())
-    return h.hexdigest()
-
-
-def find_free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("127.0.0.1", 0))
-        return s.getsockname()[1]
-
-
-def wait_for_port(port: int, timeout: float = 45.0) -> bool:
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(0.5)
-            try:
-                s.connect(("127.0.0.1", port))
-                return True
-            except OSError:
-                time.sleep(0.2)
-    return False
-
-
-def wait_for_api(endpoint: str, timeout: float = 10.0) -> bool:
-    expanso_cli = os.environ.get("EXPANSO_CLI_BIN") or shutil.which("expanso-cli")
-    if not expanso_cli:
-        raise RuntimeError("expanso-cli not found in PATH")
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        result = subprocess.run(
-            [expanso_cli, "job", "list", "--endpoint", endpoint],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        if result.returncode == 0:
-            return True
-        time.sleep(0.3)
-    return False
+        failed_tests = [t for t in skill.get("tests", []) if t.get("status") == "failed"]
+        if failed_tests:
+            skill["status"] = "failed"
+            summary["failed"] += 1
+        else:
+            skill["status"] = "passed"
+            summary["passed"] += 1
+    report_data["summary"] = summary
 
 
-def generate_command(instruction: str, shell: str) -> str:
-    inst = instruction.lower()
-    shell = (shell or "bash").lower()
-    if "find" in inst and ("python" in inst or ".py" in inst):
-        return 'find . -name "*.py"'
-    if "disk" in inst and "usage" in inst:
-        return "du -sh ."
-    if shell == "powershell":
-        return "Get-Process"
-    return 'echo "mock command"'
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse ``--shard i/n`` (1-based)."""
+    match = re.fullmatch(r"(\d+)/(\d+)", value.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected i/n with 1 <= i <= n, got {value!r}")
+    return int(match.group(1)), int(match.group(2))
 
 
-def placeholder_for_key(key: str, instruction: str = "", shell: str = "") -> Any:
-    key_lower = key.lower()
-    if key_lower == "name":
-        return "John Doe"
-    if key_lower == "email":
-        return "john@example.com"
-    if key_lower == "phone":
-        return "555-123-4567"
-    if key_lower == "address":
-        return "123 Main St"
-    if key_lower == "date":
-        return "2026-01-15"
-    if key_lower == "amount":
-        return "99.99"
-    if key_lower == "company":
-        return "Acme Corp"
-    if key_lower == "summary":
-        return "- Mock summary line 1\n- Mock summary line 2"
-    if key_lower == "explanation":
-        return "Mock explanation"
-    if key_lower == "command":
-        return generate_command(instruction, shell)
-    if key_lower == "sql":
-        return "SELECT 1;"
-    if key_lower == "dialect":
-        return "generic"
-    if key_lower == "language":
-        return "English"
-    if key_lower == "code":
-        return "en"
-    if key_lower == "confidence":
-        return 0.9
-    if key_lower == "score":
-        return 0.1
-    if key_lower == "label":
-        return "neutral"
-    if key_lower == "flagged":
-        return False
-    if key_lower == "reasoning":
-        return "Mock reasoning"
-    if key_lower == "categories":
+def load_durations(path: Path) -> dict[str, float]:
+    """Skill durations in ms from a ``{"category/skill": ms}`` file or a previous report."""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data.get("skills"), list):
         return {
-            "violence": False,
-            "sexual": False,
-            "hate": False,
-            "self_harm": False,
-            "illegal": False,
-            "dangerous": False,
+            f"{skill['category']}/{skill['name']}": float(skill["duration_ms"])
+            for skill in data["skills"]
+            if skill.get("duration_ms") is not None
         }
-    if key_lower == "scores":
-        return {
-            "violence": 0.0,
-            "sexual": 0.0,
-            "hate": 0.0,
-            "self_harm": 0.0,
-            "illegal": 0.0,
-            "dangerous": 0.0,
-        }
-    if key_lower == "entities":
-        return [{"text": "Mock", "type": "ORG", "start": 0, "end": 4}]
-    if key_lower in {"topics", "keywords"}:
-        return ["mock"]
-    return "mock"
-
-
-def build_findings(count: int, kind: str) -> list[dict[str, Any]]:
-    if count <= 0:
-        return []
-
-    findings = []
-    for idx in range(count):
-        if kind == "secrets":
-            findings.append({
-                "type": "api_key",
-                "value": f"mock-secret-{idx}",
-                "line": idx + 1,
-                "severity": "high",
-            })
-        else:
-            findings.append({
-                "type": "email",
-                "value": f"mock{idx}@example.com",
-                "start": 0,
-                "end": 10,
-                "confidence": 0.9,
-            })
-    return findings
-
-
-def mapping_uses_parse_json(processors: list[dict[str, Any]], start_idx: int) -> bool:
-    for proc in processors[start_idx + 1:]:
-        if "mapping" in proc:
-            return "parse_json" in proc.get("mapping", "")
-        if any(key.startswith("openai_") for key in proc.keys()):
-            return False
-    return False
-
-
-def command_from_tokens(tokens: list[str], instruction: str) -> str:
-    lowered = [t.lower() for t in tokens]
-    if "find" in lowered and any(".py" in t for t in tokens):
-        return 'find . -name "*.py"'
-    if "du" in lowered:
-        return "du -sh ."
-    if any("process" in t.lower() for t in tokens):
-        return "Get-Process"
-    return generate_command(instruction, "bash")
-
-
-def build_json_payload_from_expected(expected: dict[str, Any], instruction: str) -> dict[str, Any]:
-    payload: dict[str, Any] = {}
-
-    extracted = expected.get("extracted_contains")
-    if extracted:
-        for key in extracted:
-            payload[key] = placeholder_for_key(key)
-
-    analysis_keys = expected.get("analysis_has")
-    if analysis_keys:
-        for key in analysis_keys:
-            if key == "sentiment":
-                payload[key] = {"label": "neutral", "score": 0.5, "explanation": "Mock sentiment"}
-            elif key == "entities":
-                payload[key] = placeholder_for_key("entities")
-            elif key == "topics":
-                payload[key] = placeholder_for_key("topics")
-            elif key == "keywords":
-                payload[key] = placeholder_for_key("keywords")
-            else:
-                payload[key] = "mock"
-
-    command_tokens = expected.get("command_contains")
-    if command_tokens:
-        payload["command"] = command_from_tokens(command_tokens, instruction)
-        payload.setdefault("explanation", "Mock explanation")
-
-    explanation_tokens = expected.get("explanation_contains")
-    if explanation_tokens:
-        payload["explanation"] = " ".join(explanation_tokens)
-
-    has_field = expected.get("has_field")
-    allowed_keys = {
-        "corrected",
-        "issues",
-        "score",
-        "label",
-        "confidence",
-        "language",
-        "code",
-        "command",
-        "explanation",
-        "sql",
-        "dialect",
-        "flagged",
-        "categories",
-        "scores",
-        "reasoning",
-    }
-    if has_field:
-        fields = has_field if isinstance(has_field, list) else [has_field]
-        for field in fields:
-            if field in allowed_keys:
-                payload.setdefault(field, placeholder_for_key(field, instruction))
-
-    if "has_pii" in expected or "has_secrets" in expected or "findings_length" in expected:
-        has_pii = expected.get("has_pii")
-        has_secrets = expected.get("has_secrets")
-        findings_length = expected.get("findings_length")
-        if findings_length is None:
-            findings_length = 1 if (has_pii or has_secrets) else 0
-        kind = "secrets" if has_secrets else "pii"
-        payload.setdefault("findings", build_findings(int(findings_length), kind))
-        payload.setdefault("summary", "Mock summary")
-
-    if payload:
-        return payload
-
-    return {"result": "mock"}
-
-
-def mock_content_for_test(skill_name: str, expected: dict[str, Any], instruction: str, expects_json: bool) -> str:
-    if expects_json:
-        payload = build_json_payload_from_expected(expected, instruction)
-        return json.dumps(payload)
-
-    if expected.get("summary_contains_bullets"):
-        return "- Mock summary line 1\n- Mock summary line 2"
-
-    explanation_tokens = expected.get("explanation_contains")
-    if explanation_tokens:
-        return " ".join(explanation_tokens)
-
-    if "transcribe" in skill_name:
-        return "Mock transcript."
-    if "image" in skill_name or "caption" in skill_name or "alttext" in skill_name:
-        return "Mock image description."
-    if "summarize" in skill_name:
-        return "- Mock summary line 1\n- Mock summary line 2"
-
-    if instruction:
-        return f"Mock response: {instruction[:200]}".strip()
-    return "Mock response."
-
-
-def apply_openai_mocks(
-    processors: list[dict[str, Any]],
-    skill_name: str,
-    expected: dict[str, Any],
-    instruction: str,
-) -> None:
-    for idx, proc in enumerate(processors):
-        if "openai_chat_completion" in proc:
-            expects_json = mapping_uses_parse_json(processors, idx)
-            content = mock_content_for_test(skill_name, expected, instruction, expects_json)
-            literal = json.dumps(content)
-            mapping = (
-                "root = {\"choices\": [{\"message\": {\"content\": "
-                + literal +
-                "}}]}"
-            )
-            processors[idx] = {"mapping": mapping}
-        elif "openai_image_generation" in proc:
-            processors[idx] = {"mapping": "root = {\"data\": [{\"url\": \"https://example.com/mock.png\", \"revised_prompt\": \"mock prompt\"}]}"}
-        elif "openai_embeddings" in proc:
-            processors[idx] = {"mapping": "root = {\"data\": [{\"embedding\": [0.0, 0.0, 0.0, 0.0]}]}"}
-        elif "openai_speech" in proc:
-            processors[idx] = {"mapping": "root = \"MOCK_AUDIO\""}
-
-def missing_credentials(skill_yaml: dict[str, Any], ignore: set[str] | None = None) -> list[str]:
-    credentials = []
-    for cred in skill_yaml.get("credentials", []) if isinstance(skill_yaml, dict) else []:
-        if isinstance(cred, dict):
-            if cred.get("required", True):
-                name = cred.get("name")
-                if name:
-                    credentials.append(name)
-    for backend in skill_yaml.get("backends", []) if isinstance(skill_yaml, dict) else []:
-        if isinstance(backend, dict):
-            for req in backend.get("requires", []) or []:
-                credentials.append(req)
-
-    credentials = sorted({c for c in credentials if c})
-    if not credentials:
-        return []
-
-    ignore = ignore or set()
-    missing = [c for c in credentials if c not in ignore and not os.environ.get(c)]
-
-    # If there is a local backend, allow tests to proceed (it may still fail).
-    has_local = any(
-        isinstance(b, dict) and b.get("type") == "local" for b in skill_yaml.get("backends", []) if isinstance(skill_yaml, dict)
-    )
-    if missing and not has_local:
-        return missing
-    return []
-
-
-def normalize_input_value(value: str, input_type: str | None) -> Any:
-    if input_type in {"object", "array"}:
-        try:
-            return json.loads(value)
-        except Exception:
-            return value
-    if input_type in {"integer", "number"}:
+    return {str(key): float(value) for key, value in data.items()}
+
+
+def shard_skills(skills: list[Path], shard: tuple[int, int], durations: dict[str, float]) -> tuple[list[Path], float]:
+    """The skills of ``shard`` and their expected ms, balanced longest-first (identical on every machine)."""
+    index, count = shard
+    default = statistics.median(durations.values()) if durations else 1.0
+    expected = {skill_dir: durations.get(skill_key_for(skill_dir), default) for skill_dir in skills}
+    loads = [0.0] * count
+    assigned: dict[Path, int] = {}
+    for skill_dir in sorted(skills, key=lambda d: (-expected[d], skill_key_for(d))):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        assigned[skill_dir] = target
+        loads[target] += expected[skill_dir]
+    return [skill_dir for skill_dir in skills if assigned[skill_dir] == index - 1], loads[index - 1]
+
+
+def merge_reports(paths: list[Path]) -> dict[str, Any]:
+    """Combine shard reports into one, as if a single run had produced it."""
+    merged: dict[str, Any] = {"started_at": None, "skills": [], "edges": [], "shards": []}
+    seen: set[str] = set()
+    for path in paths:
+        report = load_previous_report(path)
+        if report is None:
+            raise RuntimeError(f"cannot read report {path}")
+        started_at = report.get("started_at")
+        if started_at and (merged["started_at"] is None or started_at < merged["started_at"]):
+            merged["started_at"] = started_at
+        for skill in report.get("skills", []):
+            key = f"{skill.get('category')}/{skill.get('name')}"
+            if key in seen:
+                raise RuntimeError(f"{key} appears in more than one shard report")
+            seen.add(key)
+            merged["skills"].append(skill)
+        merged["edges"].extend(report.get("edges", []))
+        merged["shards"].append({"report": str(path), "shard": report.get("shard"), "timings": report.get("timings")})
+    merged["skills"].sort(key=lambda skill: (skill.get("category") or "", skill.get("name") or ""))
+    finalize_report(merged)
+    return merged
+
+
+def merge_command(args: argparse.Namespace) -> int:
+    """``--merge-caches`` / ``--merge-reports``: fold shard outputs into one cache and report."""
+    if args.merge_caches:
+        cache = ResultCache(Path(args.cache_dir))
+        blobs = BlobStore(Path(args.cache_dir) / "blobs")
         try:
-            return int(value) if input_type == "integer" else float(value)
-        except Exception:
-            return value
-    if input_type == "boolean":
-        lowered = value.strip().lower()
-        if lowered in {"true", "false"}:
-            return lowered == "true"
-        return value
-    return value
-
-
-def build_payload(
-    input_value: str,
-    skill_inputs: list[dict[str, Any]],
-    env_overrides: dict[str, Any] | None,
-) -> dict[str, Any]:
-    env_overrides = env_overrides or {}
-
-    parsed_value = None
-    parsed_is_object = False
-    if input_value.strip():
+            for cache_dir in map(Path, args.merge_caches):
+                added = cache.merge_from(cache_dir / "results.sqlite") if (cache_dir / "results.sqlite").exists() else 0
+                copied = blobs.merge_from(BlobStore(cache_dir / "blobs"))
+                print(f"Merged {cache_dir}: {added} new cached results, {copied} output blobs")
+        finally:
+            cache.close()
+
+    if args.merge_reports:
         try:
-            parsed_value = json.loads(input_value)
-            parsed_is_object = isinstance(parsed_value, dict)
-        except Exception:
-            parsed_value = None
-
-    input_names = [i.get("name") for i in skill_inputs if isinstance(i, dict) and i.get("name")]
-    input_types = {i.get("name"): i.get("type") for i in skill_inputs if isinstance(i, dict)}
-
-    payload: dict[str, Any] = {}
-
-    if parsed_is_object:
-        payload = parsed_value  # type: ignore[assignment]
-    elif input_names:
-        primary = input_names[0]
-        payload[primary] = normalize_input_value(input_value, input_types.get(primary))
-    else:
-        payload["text"] = input_value
-
-    # Apply env overrides if they map to inputs
-    for key, value in env_overrides.items():
-        lower = key.lower()
-        match = None
-        for name in input_names:
-            if name and name.lower() == lower:
-                match = name
-                break
-        if match:
-            payload[match] = value
-
-    return payload
-
-
-def parse_env_overrides(env: dict[str, Any] | None, skill_inputs: list[dict[str, Any]]) -> dict[str, Any]:
-    if not env:
-        return {}
-    overrides = {}
-    input_names = [i.get("name") for i in skill_inputs if isinstance(i, dict) and i.get("name")]
-    for key, value in env.items():
-        if key.lower() in {"openai_api_key", "stripe_api_key", "slack_webhook", "github_token"}:
-            continue
-        if any(name and name.lower() == key.lower() for name in input_names):
-            overrides[key] = value
-        else:
-            # Map common env names to input names
-            if key.lower() == "algorithm" and "algorithm" in input_names:
-                overrides["algorithm"] = value
-            if key.lower() == "extract_fields" and "fields" in input_names:
-                overrides["fields"] = value
-            if key.lower() == "analyses" and "analyses" in input_names:
-                overrides["analyses"] = value
-            if key.lower() == "shell_type" and "shell" in input_names:
-                overrides["shell"] = value
-            if key.lower() == "language" and "language" in input_names:
-                overrides["language"] = value
-            if key.lower() == "detail_level" and "detail_level" in input_names:
-                overrides["detail_level"] = value
-            if key.lower() == "target" and "target" in input_names:
-                overrides["target"] = value
-            if key.lower() == "pii_types" and "types" in input_names:
-                overrides["types"] = value
-            if key.lower() == "secret_types" and "types" in input_names:
-                overrides["types"] = value
-    return overrides
-
-
-def check_expectations(expected: dict[str, Any], output: dict[str, Any], status_code: int) -> tuple[bool, list[str]]:
-    errors: list[str] = []
-
-    if expected.get("error_or_empty"):
-        if status_code >= 400 or not output or ("error" in output or "message" in output):
-            return True, []
-        if isinstance(output, dict):
-            metadata = output.get("metadata")
-            if not metadata:
-                return True, []
-            if isinstance(metadata, dict) and not metadata.get("trace_id"):
-                return True, []
-        return False, ["Expected error_or_empty but got output"]
-
-    has_field = expected.get("has_field")
-    if has_field:
-        fields = has_field if isinstance(has_field, list) else [has_field]
-        for field in fields:
-            if field not in output:
-                errors.append(f"Missing field: {field}")
-
-    metadata_has = expected.get("metadata_has")
-    if metadata_has:
-        metadata = output.get("metadata") if isinstance(output, dict) else None
-        for key in metadata_has:
-            if not isinstance(metadata, dict) or key not in metadata:
-                errors.append(f"Missing metadata key: {key}")
-
-    extracted_contains = expected.get("extracted_contains")
-    if extracted_contains:
-        extracted = output.get("extracted", {})
-        if isinstance(extracted, str):
-            try:
-                extracted = json.loads(extracted)
-            except Exception:
-                pass
-        for key in extracted_contains:
-            if isinstance(extracted, dict):
-                if key not in extracted:
-                    errors.append(f"Missing extracted key: {key}")
-            else:
-                if key not in str(extracted):
-                    errors.append(f"Missing extracted token: {key}")
-
-    analysis_has = expected.get("analysis_has")
-    if analysis_has:
-        analysis = output.get("analysis", {})
-        for key in analysis_has:
-            if not isinstance(analysis, dict) or key not in analysis:
-                errors.append(f"Missing analysis key: {key}")
-
-    command_contains = expected.get("command_contains")
-    if command_contains:
-        command = output.get("command", "")
-        for token in command_contains:
-            if token not in str(command):
-                errors.append(f"Command missing token: {token}")
-
-    if "hash_length" in expected:
-        hash_value = output.get("hash", "")
-        if len(str(hash_value)) != int(expected["hash_length"]):
-            errors.append("Hash length mismatch")
-
-    if "hash" in expected:
-        if output.get("hash") != expected["hash"]:
-            errors.append("Hash mismatch")
-
-    if "algorithm" in expected:
-        if output.get("algorithm") != expected["algorithm"]:
-            errors.append("Algorithm mismatch")
-
-    if "has_pii" in expected:
-        if output.get("has_pii") != expected["has_pii"]:
-            errors.append("has_pii mismatch")
-
-    if "has_secrets" in expected:
-        if output.get("has_secrets") != expected["has_secrets"]:
-            errors.append("has_secrets mismatch")
-
-    if "findings_length" in expected:
-        findings = output.get("findings", [])
-        if not isinstance(findings, list) or len(findings) != expected["findings_length"]:
-            errors.append("findings_length mismatch")
-
-    if "summary_contains_bullets" in expected:
-        summary = output.get("summary", "")
-        if not any(bullet in summary for bullet in ["\n-", "\n*", "\n•", "\n1."]):
-            errors.append("summary does not contain bullets")
-
-    if "min_length" in expected:
-        target = output.get("summary") or output.get("explanation") or ""
-        if len(str(target)) < int(expected["min_length"]):
-            errors.append("min_length not satisfied")
-
-    if "max_length" in expected:
-        target = output.get("summary") or output.get("explanation") or ""
-        if len(str(target)) > int(expected["max_length"]):
-            errors.append("max_length exceeded")
-
-    if "explanation_contains" in expected:
-        explanation = output.get("explanation", "")
-        for token in expected["explanation_contains"]:
-            if token not in str(explanation):
-                errors.append(f"explanation missing token: {token}")
-
-    return len(errors) == 0, errors
-
-
-def is_transient_failure(entry: dict[str, Any]) -> bool:
-    reason = (entry.get("reason") or "").lower()
-    if "http server did not start" in reason:
-        return True
-    if "request error" in reason:
-        return True
-    if "timeout" in reason:
-        return True
-    if "connection" in reason:
-        return True
-    return False
-
-
-def failure_signature(entry: dict[str, Any]) -> str:
-    payload = {
-        "reason": entry.get("reason"),
-        "errors": entry.get("errors") or [],
-        "status_code": entry.get("status_code"),
-    }
-    return json.dumps(payload, sort_keys=True, default=str)
-
-
-def is_permanent_failure(entry: dict[str, Any]) -> bool:
-    history = entry.get("history") or []
-    if len(history) < 2:
-        return False
-    last_sig = failure_signature(history[-1])
-    prev_sig = failure_signature(history[-2])
-    return last_sig == prev_sig
-
-
-def record_attempt(entry: dict[str, Any], result: dict[str, Any]) -> None:
-    history = entry.setdefault("history", [])
-    history.append({
-        "status": result.get("status"),
-        "reason": result.get("reason"),
-        "errors": result.get("errors"),
-        "status_code": result.get("status_code"),
-    })
-    entry.update(result)
-    entry["attempts"] = len(history)
-    if entry.get("status") == "failed" and is_permanent_failure(entry):
-        entry["permanent_failure"] = True
-
-
-def execute_test(
-    skill_name: str,
-    pipeline_mcp_path: Path,
-    input_value: str,
-    payload: dict[str, Any],
-    expected: dict[str, Any],
-    api_url: str,
-    expanso_cli: str,
-    mock_openai: bool,
-) -> tuple[dict[str, Any], bool]:
-    pipeline_spec = load_yaml(pipeline_mcp_path)
-    if not pipeline_spec:
-        return {
-            "status": "failed",
-            "reason": "failed to parse pipeline-mcp.yaml",
-            "errors": [],
-            "status_code": 0,
-            "output": {},
-        }, True
-
-    port = find_free_port()
-    config = pipeline_spec.setdefault("config", {})
-    input_cfg = config.get("input", {})
-    http_server = input_cfg.get("http_server") if isinstance(input_cfg, dict) else None
-    if not isinstance(http_server, dict):
-        return {
-            "status": "failed",
-            "reason": "pipeline-mcp has no http_server input",
-            "errors": [],
-            "status_code": 0,
-            "output": {},
-        }, True
-
-    http_server["address"] = f"127.0.0.1:{port}"
-    config.pop("http", None)
-    path = http_server.get("path", "/")
-    allowed = http_server.get("allowed_verbs", ["POST"])
-    method = allowed[0] if isinstance(allowed, list) and allowed else "POST"
-
-    if mock_openai:
-        processors = config.get("pipeline", {}).get("processors", [])
-        if isinstance(processors, list):
-            apply_openai_mocks(processors, skill_name, expected, str(input_value))
-
-    pipeline_spec["name"] = f"{skill_name}-mcp-test-{port}"
-
-    temp_job = Path(tempfile.mkdtemp(prefix="expanso-job-")) / "job.yaml"
-    with open(temp_job, "w") as f:
-        yaml.safe_dump(pipeline_spec, f, sort_keys=False)
-
-    deploy = subprocess.run(
-        [expanso_cli, "job", "deploy", str(temp_job), "--endpoint", api_url],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    if deploy.returncode != 0:
-        return {
-            "status": "failed",
-            "reason": f"job deploy failed: {deploy.stderr.strip()}",
-            "errors": [],
-            "status_code": 0,
-            "output": {},
-        }, False
-
-    if not wait_for_port(port, timeout=45.0):
-        if not wait_for_port(port, timeout=20.0):
-            subprocess.run(
-                [expanso_cli, "job", "delete", pipeline_spec["name"], "--endpoint", api_url, "--yes", "--force"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            return {
-                "status": "failed",
-                "reason": "http server did not start",
-                "errors": [],
-                "status_code": 0,
-                "output": {},
-            }, False
-
-    url = f"http://127.0.0.1:{port}{path}"
-    status_code = 0
-    output: dict[str, Any] = {}
-    try:
-        response = requests.request(method, url, json=payload, timeout=30)
-        status_code = response.status_code
-        if response.text:
-            output = response.json()
-    except Exception as exc:
-        subprocess.run(
-            [expanso_cli, "job", "delete", pipeline_spec["name"], "--endpoint", api_url, "--yes", "--force"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return {
-            "status": "failed",
-            "reason": f"request error: {exc}",
-            "errors": [],
-            "status_code": 0,
-            "output": {},
-        }, False
-
-    ok, errors = check_expectations(expected, output, status_code)
-    result = {
-        "status": "passed" if ok else "failed",
-        "errors": errors,
-        "status_code": status_code,
-        "output": output,
-    }
-
-    subprocess.run(
-        [expanso_cli, "job", "delete", pipeline_spec["name"], "--endpoint", api_url, "--yes", "--force"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-
-    return result, False
+            report = merge_reports([Path(path) for path in args.merge_reports])
+        except RuntimeError as exc:
+            print(f"Cannot merge reports: {exc}", file=sys.stderr)
+            return 1
+        write_report(Path(args.report), report, None)
+        print(f"Merged {len(args.merge_reports)} reports into {args.report}")
+        print("\nSummary:")
+        print(json.dumps(report["summary"], indent=2))
+    return 0
 
 
 def main() -> int:
@@ -861,301 +173,257 @@ def main() -> int:
     parser.add_argument("skills", nargs="*", help="Skill names to test")
     parser.add_argument("--limit-skills", type=int, default=None, help="Limit number of skills")
     parser.add_argument("--limit-tests", type=int, default=None, help="Limit number of tests")
-    parser.add_argument("--report", type=str, default="test-harness-report.json", help="Path to JSON report")
-    parser.add_argument("--api-url", type=str, default=None, help="Existing Edge API URL (skip starting Edge)")
+    parser.add_argument("--report", type=str, default="test-harness-report.json", help="Path to JSON report (--bench and --soak write <report>.bench.json / <report>.soak.json instead)")
+    parser.add_argument("--api-url", type=str, action="append", default=None, help="Existing Edge API URL (skip starting Edge); repeat to spread skills across several")
+    parser.add_argument("--edges", type=int, default=1, help="Number of local Edge runtimes to start and spread skills across (default: 1)")
+    parser.add_argument("--max-edge-restarts", type=int, default=3, help="Restarts per local Edge after it crashes or wedges before giving up on it (default: 3)")
     parser.add_argument("--keep-edge", action="store_true", help="Keep Edge running after tests")
     parser.add_argument("--allow-external", action="store_true", help="Run tests even if credentials are missing")
     parser.add_argument("--mock-openai", dest="mock_openai", action="store_true", default=True, help="Mock OpenAI processors (default)")
     parser.add_argument("--no-mock-openai", dest="mock_openai", action="store_false", help="Disable OpenAI mocking")
+    parser.add_argument("--openai-stand-in", action="store_true", help="Point OpenAI processors at a local OpenAI-compatible server instead of replacing them with mappings (MCP tests)")
+    parser.add_argument("--openai-latency", type=str, default="0", help="Latency the stand-in adds per request: MS, LOW-HIGH, exp:MEAN, normal:MEAN,SD or lognormal:MEDIAN,SIGMA (default: 0)")
+    parser.add_argument("--openai-rps", type=float, default=None, help="Requests per second the stand-in accepts before answering 429")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0, help="Fraction of stand-in requests answered with a 500 (default: 0)")
     parser.add_argument("--rerun-failed", dest="rerun_failed", action="store_true", default=True, help="Automatically rerun failed tests (default)")
     parser.add_argument("--no-rerun-failed", dest="rerun_failed", action="store_false", help="Disable automatic reruns")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false", help="Send every test's request, even when tests of one deployment or a rerun repeat a payload")
     parser.add_argument("--max-reruns", type=int, default=3, help="Maximum total attempts per test (default: 3)")
     parser.add_argument("--use-cache", dest="use_cache", action="store_true", default=True, help="Reuse cached passing results when inputs are unchanged (default)")
     parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Disable cached results")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR), help=f"Directory of the persistent result cache (default: {DEFAULT_CACHE_DIR.relative_to(REPO_ROOT)})")
+    parser.add_argument("--cache-max-mb", type=float, default=256, help="Evict least-recently-used cache entries, and separately output blobs, above this size (default: 256)")
+    parser.add_argument("--cache-max-age-days", type=float, default=30, help="Evict cache entries unused for this many days (default: 30)")
     parser.add_argument("--respect-skip", action="store_true", help="Respect skip flags in test.yaml (default: run anyway)")
     parser.add_argument("--test-name", type=str, default=None, help="Run only tests whose name contains this string")
+    parser.add_argument("--inline-output-bytes", type=int, default=2048, help="Truncate outputs above this size in the report; the full output is kept in the cache's blob store (default: 2048)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run: reuse tests already settled in the report's journal")
+    parser.add_argument("--cli", action="store_true", help="Also run each test through the skill's pipeline-cli.yaml via stdin/stdout")
     parser.add_argument("--show-io", action="store_true", help="Print request/response for each executed test")
+    parser.add_argument("--since", type=str, default=None, metavar="REF", help="Only run skills and tests affected by changes since this git ref")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N", help="Run only shard I of N (1-based), balanced by recorded durations")
+    parser.add_argument("--durations", type=str, default=None, help="Skill durations for --shard: a previous (merged) report or a {\"category/skill\": ms} JSON file; defaults to the cache history")
+    parser.add_argument("--merge-reports", nargs="+", default=None, metavar="REPORT", help="Merge shard reports into --report and exit")
+    parser.add_argument("--merge-caches", nargs="+", default=None, metavar="CACHE_DIR", help="Merge shard cache dirs into --cache-dir and exit")
+    parser.add_argument("--order", choices=["history", "name"], default="history", help="Run failing/flaky skills first, then the slowest, from recorded history (default), or by name")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of skills to run concurrently (default: 1)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio runner; --jobs then bounds in-flight deploys")
+    parser.add_argument("--multiplex", action="store_true", help="Serve all skills' MCP tests from one generated Edge job routed by path; --jobs then bounds in-flight requests")
+    parser.add_argument("--bench", action="store_true", help="Load-test each skill's MCP pipeline instead of checking expectations")
+    parser.add_argument("--bench-clients", type=int, default=8, help="Concurrent clients per skill in --bench mode (default: 8)")
+    parser.add_argument("--bench-duration", type=float, default=10.0, help="Seconds to drive each skill in --bench mode (default: 10)")
+    parser.add_argument("--bench-requests", type=int, default=None, help="Stop each skill's benchmark after this many requests")
+    parser.add_argument("--bench-repeat", type=int, default=3, help="Benchmark rounds per skill; each round is one sample for the confidence interval (default: 3)")
+    parser.add_argument("--baseline", type=str, default=None, help="Benchmark baseline file (default: <report>.bench-baseline.json next to the report)")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this --bench run as the new baseline for the skills it covered")
+    parser.add_argument("--regression-threshold", type=float, default=0.10, help="Fractional p95 or throughput change that counts as a regression (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a benchmark regressed against the baseline or a soak drifted")
+    parser.add_argument("--soak", type=parse_duration, default=None, metavar="DURATION", help="Keep the selected skills' MCP pipelines deployed and drive steady traffic for DURATION (e.g. 30m, 2h)")
+    parser.add_argument("--soak-interval", type=float, default=60.0, help="Seconds per --soak snapshot of latency and Edge resources (default: 60)")
+    parser.add_argument("--soak-clients", type=int, default=2, help="Concurrent clients per skill in --soak mode (default: 2)")
+    parser.add_argument("--drift-threshold", type=float, default=0.20, help="Fractional change over the soak that counts as drift (default: 0.20)")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH", help="Write a Chrome trace of harness phases to PATH (open in Perfetto or chrome://tracing)")
     args = parser.parse_args()
+    args.jobs = max(1, args.jobs)
+    if args.edges > args.jobs and not args.api_url:
+        print(f"--edges {args.edges} exceeds --jobs {args.jobs}; starting {args.jobs} Edge runtimes", file=sys.stderr)
+    args.edges = max(1, min(args.edges, args.jobs))
+    args.bench_clients = max(1, args.bench_clients)
+    args.bench_repeat = max(1, args.bench_repeat)
+    args.soak_clients = max(1, args.soak_clients)
+    if args.bench and args.soak:
+        parser.error("--bench and --soak are separate modes")
+    load_mode = args.bench or bool(args.soak)
+    if args.multiplex and (load_mode or args.use_async):
+        parser.error("--multiplex can't be combined with --bench, --soak or --async")
+    if args.openai_stand_in and not args.mock_openai:
+        parser.error("--openai-stand-in replaces the OpenAI API and can't be combined with --no-mock-openai")
+    try:
+        openai_latency = parse_latency(args.openai_latency)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(f"--openai-latency: {exc}")
+    if load_mode:
+        # Every test's payload is needed to drive load, cached or not.
+        args.use_cache = False
+    TRACER.enabled = bool(args.trace)
+    TRACE_LANE.set("main")
+    run_timings: dict[str, Any] = {}
+
+    if args.merge_reports or args.merge_caches:
+        return merge_command(args)
 
     skills = find_skills(args.skills or None)
+    selection = None
+    if args.since:
+        changes = select_changed(args.since)
+        if changes.full_run:
+            print(f"--since {args.since}: running everything ({changes.reason})")
+        else:
+            selection = changes.skills or {}
+            skills = [skill_dir for skill_dir in skills if skill_dir in selection]
+            print(f"--since {args.since}: {len(skills)} affected skills")
     if args.limit_skills:
         skills = skills[: args.limit_skills]
 
     report_path = Path(args.report)
-    previous_report = load_previous_report(report_path) if args.use_cache else None
-    cache_index = build_cache_index(previous_report)
-    harness_hash = hash_bytes(Path(__file__).read_bytes())
+    cache = ResultCache(
+        Path(args.cache_dir),
+        max_bytes=int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None,
+        max_age_days=args.cache_max_age_days or None,
+    )
+    if args.use_cache and cache.is_empty():
+        # One-time migration from the report-embedded cache used before the store existed.
+        imported = cache.import_report(load_previous_report(report_path))
+        if imported:
+            print(f"Seeded result cache with {imported} passing tests from {report_path}")
+
+    if args.shard:
+        if args.durations:
+            durations = load_durations(Path(args.durations))
+        else:
+            durations = expected_skill_durations(cache.load_history())
+            print("--shard without --durations: balancing on this machine's history; pass --durations so every shard agrees", file=sys.stderr)
+        skills, expected_ms = shard_skills(skills, args.shard, durations)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(skills)} skills, ~{expected_ms / 1000:.1f}s expected")
 
     report = {
         "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
         "skills": [],
         "summary": {"total_skills": 0, "passed": 0, "failed": 0, "skipped": 0, "manual": 0},
     }
-
-    edge = None
-    api_url = args.api_url
-    temp_dir = None
-    if not api_url:
-        api_port = find_free_port()
-        api_url = f"http://127.0.0.1:{api_port}"
-        temp_dir = Path(tempfile.mkdtemp(prefix="expanso-edge-data-"))
-        edge = EdgeProcess(api_url=api_url, data_dir=temp_dir, log_file=temp_dir / "edge.log")
-        edge.start()
-        if not wait_for_api(api_url):
+    if args.shard:
+        report["shard"] = f"{args.shard[0]}/{args.shard[1]}"
+
+    blobs = BlobStore(Path(args.cache_dir) / "blobs")
+    journal = None if load_mode else Journal(journal_path_for(report_path), resume=args.resume)
+    if journal is not None and args.resume:
+        print(f"Resuming from {journal.path}: {len(journal.index)} recorded test results")
+
+    stand_in = None
+    if args.openai_stand_in:
+        stand_in = OpenAIStandIn(openai_latency, args.openai_latency, args.openai_rps, args.openai_error_rate).start()
+        print(f"OpenAI stand-in listening on http://127.0.0.1:{stand_in.port}")
+    edges = EdgePool(count=args.edges, api_urls=args.api_url, pool_size=args.jobs, max_restarts=max(0, args.max_edge_restarts))
+    try:
+        with TRACER.span("edge_startup", run_timings):
+            started = edges.start()
+        if not started:
             print("Failed to start expanso-edge local API", file=sys.stderr)
-            edge.stop()
             return 1
 
-    expanso_cli = shutil.which("expanso-cli")
-    if not expanso_cli:
-        raise RuntimeError("expanso-cli not found in PATH")
-
-    total_tests_run = 0
-    rerun_candidates: list[dict[str, Any]] = []
-
-    for skill_dir in skills:
-        skill_name = skill_dir.name
-        category = skill_dir.parent.name
-        skill_result = {
-            "name": skill_name,
-            "category": category,
-            "path": str(skill_dir),
-            "status": "unknown",
-            "reason": None,
-            "tests": [],
-        }
-
-        test_yaml_path = skill_dir / "test" / "test.yaml"
-        pipeline_mcp_path = skill_dir / "pipeline-mcp.yaml"
-        skill_yaml = load_yaml(skill_dir / "skill.yaml") or {}
-
-        print(f"==> {category}/{skill_name}")
-
-        if not test_yaml_path.exists():
-            skill_result["status"] = "skipped"
-            skill_result["reason"] = "no tests defined"
-            report["skills"].append(skill_result)
-            print("  - skipped (no tests)")
-            continue
-
-        if not pipeline_mcp_path.exists():
-            skill_result["status"] = "manual"
-            skill_result["reason"] = "missing pipeline-mcp.yaml"
-            report["skills"].append(skill_result)
-            print("  - manual (missing pipeline-mcp.yaml)")
-            continue
-
-        test_yaml = load_yaml(test_yaml_path) or {}
-        tests = test_yaml.get("tests", [])
-        fixtures_dir = test_yaml.get("fixtures_dir")
-
-        if not tests:
-            skill_result["status"] = "skipped"
-            skill_result["reason"] = "tests empty"
-            report["skills"].append(skill_result)
-            print("  - skipped (tests empty)")
-            continue
-
-        if args.respect_skip and all(t.get("skip") for t in tests):
-            skill_result["status"] = "skipped"
-            skill_result["reason"] = "tests skipped"
-            report["skills"].append(skill_result)
-            print("  - skipped (tests marked skip)")
-            continue
-
-        ignore_creds = {"OPENAI_API_KEY"} if args.mock_openai else set()
-        missing = missing_credentials(skill_yaml, ignore=ignore_creds)
-        if missing and not args.allow_external:
-            skill_result["status"] = "skipped"
-            skill_result["reason"] = f"missing credentials: {', '.join(missing)}"
-            report["skills"].append(skill_result)
-            print(f"  - skipped (missing credentials: {', '.join(missing)})")
-            continue
-
-        skill_inputs = skill_yaml.get("inputs", []) if isinstance(skill_yaml, dict) else []
-        fatal_manual = False
-
-        for test in tests:
-            if args.limit_tests and total_tests_run >= args.limit_tests:
-                break
-            if args.test_name and args.test_name.lower() not in str(test.get("name", "")).lower():
-                continue
-            if test.get("skip") and args.respect_skip:
-                skill_result["tests"].append({"name": test.get("name"), "status": "skipped", "reason": "test marked skip"})
-                print(f"    - {test.get('name')}: skipped")
-                continue
-
-            input_value = test.get("input", "")
-            if "input_file" in test:
-                raw_path = str(test["input_file"])
-                if Path(raw_path).is_absolute():
-                    file_path = raw_path
-                else:
-                    fixtures_prefix = fixtures_dir.lstrip("./") if fixtures_dir else ""
-                    raw_parts = Path(raw_path).parts
-                    if fixtures_prefix and raw_parts and raw_parts[0] == fixtures_prefix:
-                        file_path = str((test_yaml_path.parent / raw_path).resolve())
-                    elif fixtures_dir:
-                        file_path = str((test_yaml_path.parent / fixtures_dir / raw_path).resolve())
-                    else:
-                        file_path = str((test_yaml_path.parent / raw_path).resolve())
-                try:
-                    input_value = Path(file_path).read_text()
-                except Exception as exc:
-                    skill_result["tests"].append({
-                        "name": test.get("name"),
-                        "status": "failed",
-                        "reason": f"failed to read input_file: {exc}",
-                    })
-                    print(f"    - {test.get('name')}: failed (input_file read)")
-                    total_tests_run += 1
-                    continue
-
-            env_overrides = parse_env_overrides(test.get("env"), skill_inputs)
-            payload = build_payload(str(input_value), skill_inputs, env_overrides)
-            expected = test.get("expected", {}) or {}
-
-            fingerprint = compute_test_fingerprint(
-                skill_dir,
-                test,
-                str(input_value),
-                env_overrides,
-                args.mock_openai,
-                harness_hash,
-            )
-
-            test_entry = {
-                "name": test.get("name"),
-                "fingerprint": fingerprint,
-            }
-            if test.get("skip") and not args.respect_skip:
-                test_entry["forced_run"] = True
-
-            cache_entry = cache_index.get(cache_key(category, skill_name, test.get("name")))
-            if args.use_cache and cache_entry and cache_entry.get("fingerprint") == fingerprint and cache_entry.get("status") == "passed":
-                test_entry.update({
-                    "status": "passed",
-                    "errors": cache_entry.get("errors", []),
-                    "status_code": cache_entry.get("status_code", 0),
-                    "output": cache_entry.get("output", {}),
-                    "cached": True,
-                    "attempts": cache_entry.get("attempts", 0),
-                })
-                skill_result["tests"].append(test_entry)
-                print(f"    - {test.get('name')}: passed (cached)")
-                total_tests_run += 1
-                continue
-
-            result, fatal_manual = execute_test(
-                skill_name=skill_name,
-                pipeline_mcp_path=pipeline_mcp_path,
-                input_value=str(input_value),
-                payload=payload,
-                expected=expected,
-                api_url=api_url,
-                expanso_cli=expanso_cli,
-                mock_openai=args.mock_openai,
-            )
-
-            if fatal_manual:
-                skill_result["status"] = "manual"
-                skill_result["reason"] = result.get("reason")
-                print(f"  - manual ({result.get('reason')})")
-                fatal_manual = True
-                break
-
-            record_attempt(test_entry, result)
-            skill_result["tests"].append(test_entry)
-            print(f"    - {test.get('name')}: {result['status']}")
-            if args.show_io:
-                print("      request:", json.dumps(payload, indent=2))
-                print("      response:", json.dumps(result.get("output", {}), indent=2))
-            total_tests_run += 1
-
-            if result["status"] == "failed" and args.rerun_failed:
-                rerun_candidates.append({
-                    "category": category,
-                    "skill_name": skill_name,
-                    "test_name": test.get("name"),
-                    "pipeline_mcp_path": pipeline_mcp_path,
-                    "input_value": str(input_value),
-                    "payload": payload,
-                    "expected": expected,
-                    "test_entry": test_entry,
-                })
-
-        if fatal_manual:
-            report["skills"].append(skill_result)
-            continue
-
-        failed_tests = [t for t in skill_result["tests"] if t.get("status") == "failed"]
-        if failed_tests:
-            skill_result["status"] = "failed"
-            print("  - status: failed")
-        else:
-            skill_result["status"] = "passed"
-            print("  - status: passed")
-
-        report["skills"].append(skill_result)
-
-        if args.limit_tests and total_tests_run >= args.limit_tests:
-            break
-
-    if args.rerun_failed and rerun_candidates and args.max_reruns > 1:
-        attempts = 1
-        remaining = rerun_candidates
-        while attempts < args.max_reruns and remaining:
-            attempts += 1
-            print(f"\n==> Rerun failed tests (attempt {attempts}/{args.max_reruns})")
-            next_remaining: list[dict[str, Any]] = []
-            for ctx in remaining:
-                if ctx["test_entry"].get("permanent_failure"):
-                    continue
-                result, _ = execute_test(
-                    skill_name=ctx["skill_name"],
-                    pipeline_mcp_path=ctx["pipeline_mcp_path"],
-                    input_value=ctx["input_value"],
-                    payload=ctx["payload"],
-                    expected=ctx["expected"],
-                    api_url=api_url,
-                    expanso_cli=expanso_cli,
-                    mock_openai=args.mock_openai,
-                )
-                record_attempt(ctx["test_entry"], result)
-                print(f"    - {ctx['category']}/{ctx['skill_name']} :: {ctx['test_name']}: {result['status']}")
-                if result["status"] == "failed" and not ctx["test_entry"].get("permanent_failure"):
-                    next_remaining.append(ctx)
-            remaining = next_remaining
-
-    if edge and not args.keep_edge:
-        edge.stop()
-
-    def finalize_report(report_data: dict[str, Any]) -> None:
-        summary = {"total_skills": 0, "passed": 0, "failed": 0, "skipped": 0, "manual": 0}
-        for skill in report_data.get("skills", []):
-            summary["total_skills"] += 1
-            status = skill.get("status")
-            if status in {"skipped", "manual"}:
-                summary[status] += 1
-                continue
-            failed_tests = [t for t in skill.get("tests", []) if t.get("status") == "failed"]
-            if failed_tests:
-                skill["status"] = "failed"
-                summary["failed"] += 1
+        run = RunContext(
+            args=args,
+            cache=cache,
+            budget=TestBudget(args.limit_tests),
+            selection=selection,
+            journal=journal,
+            blobs=blobs,
+            history=cache.load_history() if args.order == "history" else None,
+            stand_in=stand_in,
+        )
+        if args.use_async and httpx is None:
+            print("--async needs httpx; falling back to the threaded runner", file=sys.stderr)
+            args.use_async = False
+        with TRACER.span("run", run_timings, cat="run", jobs=args.jobs, runner="multiplex" if args.multiplex else "async" if args.use_async else "threaded"):
+            if args.bench:
+                report["bench"] = run_bench(skills, run, edges)
+            elif args.soak:
+                report["soak"] = run_soak(skills, run, edges)
+            elif args.multiplex:
+                report["skills"], report["multiplex"] = run_suite_multiplexed(skills, run, edges)
+            elif args.use_async:
+                report["skills"] = asyncio.run(run_suite_async(skills, run, edges))
             else:
-                skill["status"] = "passed"
-                summary["passed"] += 1
-        report_data["summary"] = summary
-
-    finalize_report(report)
+                report["skills"] = run_suite_threaded(skills, run, edges)
+    finally:
+        if not args.keep_edge:
+            edges.stop()
+        else:
+            edges.stop_supervising()
+        if stand_in is not None:
+            stand_in.stop()
+        cache.evict()
+        cache.close()
+        blobs.evict(args.cache_max_age_days, int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None)
+
+    report["edges"] = edges.summary()
+    if stand_in is not None:
+        report["openai_stand_in"] = stand_in.summary()
+        stats = report["openai_stand_in"]
+        print(
+            f"OpenAI stand-in: {stats['requests']} requests, {stats['rate_limited']} rate limited, "
+            f"{stats['injected_errors']} injected errors, {stats['unknown_token']} unknown routes"
+        )
+    if len(edges.edges) > 1 or any(edge_summary["restarts"] or edge_summary["failed_deletes"] for edge_summary in report["edges"]):
+        for edge_summary in report["edges"]:
+            state = "healthy" if edge_summary["healthy"] else f"unhealthy ({edge_summary['reason']})"
+            print(
+                f"Edge #{edge_summary['index']} {edge_summary['api_url']}: {edge_summary['tests_run']} tests, "
+                f"{edge_summary['restarts']} restarts, {edge_summary['replayed_groups']} groups replayed, "
+                f"{edge_summary['failed_deletes']} failed deletes, {state}"
+            )
 
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    mux = report.get("multiplex")
+    if mux and mux["routes"] and not mux.get("error"):
+        print(
+            f"Multiplexed job: {mux['tests']} tests over {mux['routes']} routes, ready in {mux['ready_ms']} ms; "
+            f"{len(mux['separate'])} skills had groups that ran in their own jobs"
+        )
 
-    print("\nSummary:")
-    print(json.dumps(report["summary"], indent=2))
+    with TRACER.span("report", run_timings):
+        finalize_report(report)
+    report["timings"] = summarize_timings(report["skills"], run_timings)
+    regressed = False
+    if args.bench:
+        print_bench_table(report["bench"])
+        baseline_path = Path(args.baseline) if args.baseline else baseline_path_for(report_path)
+        baseline = load_baseline(baseline_path)
+        comparisons = compare_to_baseline(report["bench"], baseline, args.regression_threshold)
+        print_regression_table(comparisons, args.regression_threshold)
+        report["bench_comparison"] = comparisons
+        regressed = any(c["regressed"] for c in comparisons)
+        if args.update_baseline or not baseline_path.exists():
+            updated = update_baseline(baseline_path, baseline, report["bench"])
+            print(f"Recorded {updated} skills in benchmark baseline {baseline_path}")
+    if args.soak:
+        print_soak_trends(report["soak"]["trends"], args.drift_threshold)
+        regressed = any(trend["drifting"] for trend in report["soak"]["trends"])
+
+    cold_starts = sorted(
+        ((max(skill["ready_ms"]), f"{skill['category']}/{skill['name']}") for skill in report["skills"] if skill.get("ready_ms")),
+        reverse=True,
+    )
+    if cold_starts:
+        print("\nSlowest deploy-to-ready times:")
+        for ready_ms, name in cold_starts[:5]:
+            print(f"  {ready_ms:>9.1f} ms  {name}")
+
+    leaky = [skill for skill in report["skills"] if skill.get("resource_leaks")]
+    if leaky:
+        print("\nSkills whose Edge resources did not return to baseline after delete:")
+        for skill in leaky:
+            detail = ", ".join(f"{key} +{value:g}" for key, value in skill["resource_leaks"].items())
+            print(f"  {skill['category']}/{skill['name']}: {detail}")
+
+    output_path = load_report_path_for(report_path, "bench" if args.bench else "soak") if load_mode else report_path
+    write_report(output_path, report, journal)
+    if load_mode:
+        print(f"Wrote {'benchmark' if args.bench else 'soak'} results to {output_path}")
+    if journal is not None:
+        journal.close()
+    if args.trace:
+        TRACER.write(Path(args.trace))
+        print(f"Wrote trace to {args.trace}")
+
+    if not load_mode:
+        print("\nSummary:")
+        print(json.dumps(report["summary"], indent=2))
+    if regressed and args.fail_on_regression:
+        print("Soak drift detected" if args.soak else "Benchmark regressions against baseline", file=sys.stderr)
+        return 1
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
+